@@ -0,0 +1,13 @@
+"""Performance benchmarks for the pharmacy inventory.
+
+Run a benchmark as a module from the project root, e.g. ``python -m benchmarks.fuzzy_lookup``.
+"""
+import os
+
+
+def setup_django():
+    """Configure Django so benchmarks can import the project's apps."""
+    import django
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "pharmacy_inventory.settings")
+    django.setup()
@@ -0,0 +1,200 @@
+"""Requests per second of the hot read endpoints served through ASGI and through WSGI.
+
+    python -m benchmarks.asgi_vs_wsgi --concurrency 200 --seconds 10
+
+Both Django handlers are driven in-process, against the same database file, so the
+numbers compare the handlers and the views rather than a network stack:
+
+- ASGI: one event loop runs `--concurrency` clients as coroutines, like a server such
+  as uvicorn holding that many open connections;
+- WSGI: a pool of `--wsgi-threads` threads takes the same clients' requests, like a
+  threaded WSGI server. Under WSGI Django runs the async views with async_to_sync.
+
+The request mix is product details (mostly from a hot set, so mostly cache hits),
+full-text searches and stock checks.
+"""
+import argparse
+import asyncio
+import io
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from . import setup_django
+
+SEARCHES = ["para", "amoxi", "biogesic", "soap", "cetirizine", "vitamin"]
+
+
+def make_paths(rng, products, count):
+    """Return `count` request paths following the POS traffic mix."""
+    hot = rng.sample(range(1, products + 1), min(200, products))
+    paths = []
+    for _ in range(count):
+        roll = rng.random()
+        if roll < 0.6:
+            product_id = rng.choice(hot) if rng.random() < 0.9 else rng.randint(1, products)
+            paths.append((f"/products/api/products/{product_id}/", ""))
+        elif roll < 0.8:
+            paths.append(("/products/api/products/search/", f"q={rng.choice(SEARCHES)}&limit=10"))
+        else:
+            paths.append((f"/inventory/api/stock/{rng.choice(hot)}/", "quantity=2"))
+    return paths
+
+
+def seed(products):
+    from django.core.management import call_command
+    from django.db import connection
+
+    from inventory.models import StockLevel
+    from products import search
+    from products.models import Product, Medicine, MedicineForm
+
+    call_command("migrate", verbosity=0)
+    form = MedicineForm.objects.create(name="Tablet", description="Solid dose")
+    names = ["Biogesic", "Amoxil", "Cetirizine", "Vitamin C", "Paracetamol", "Bar Soap"]
+    Product.objects.bulk_create(
+        Product(brand="Brand", name=f"{names[i % len(names)]} {i}", status="PUBLISHED") for i in range(products)
+    )
+    ids = list(Product.objects.values_list("id", flat=True))
+    Medicine.objects.bulk_create(
+        Medicine(product_id=pk, generic_name="paracetamol", dosage="500mg", form=form, usage="-", side_effects="-") for pk in ids
+    )
+    StockLevel.objects.bulk_create(StockLevel(product_id=pk, quantity=pk % 7) for pk in ids)
+    search.rebuild_index()
+    connection.close()
+
+
+def asgi_scope(path, query):
+    return {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query.encode(),
+        "headers": [(b"host", b"localhost")],
+        "server": ("localhost", 80),
+        "client": ("127.0.0.1", 50000),
+    }
+
+
+def run_asgi(paths, concurrency, seconds):
+    from pharmacy_inventory.asgi import application
+    counters = {"ok": 0, "errors": 0}
+
+    async def request(path, query):
+        status = None
+        body_sent = asyncio.Event()
+
+        async def receive():
+            if body_sent.is_set():
+                # The client stays connected; Django cancels this wait once it has responded
+                await asyncio.Future()
+            body_sent.set()
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+        async def send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+
+        await application(asgi_scope(path, query), receive, send)
+        counters["ok" if status == 200 else "errors"] += 1
+
+    async def client(offset, deadline):
+        i = offset
+        while time.monotonic() < deadline:
+            await request(*paths[i % len(paths)])
+            i += concurrency
+
+    async def main():
+        deadline = time.monotonic() + seconds
+        await asyncio.gather(*(client(i, deadline) for i in range(concurrency)))
+
+    asyncio.run(main())
+    return counters
+
+
+def run_wsgi(paths, concurrency, threads, seconds):
+    from django.core.wsgi import get_wsgi_application
+
+    application = get_wsgi_application()
+    counters = {"ok": 0, "errors": 0}
+    lock = threading.Lock()
+    deadline = time.monotonic() + seconds
+
+    def request(path, query):
+        status = []
+        environ = {
+            "REQUEST_METHOD": "GET",
+            "PATH_INFO": path,
+            "QUERY_STRING": query,
+            "SERVER_NAME": "localhost",
+            "SERVER_PORT": "80",
+            "HTTP_HOST": "localhost",
+            "wsgi.url_scheme": "http",
+            "wsgi.input": io.BytesIO(),
+            "wsgi.errors": sys.stderr,
+        }
+        response = application(environ, lambda line, headers: status.append(line))
+        b"".join(response)
+        response.close()
+        with lock:
+            counters["ok" if status[0].startswith("200") else "errors"] += 1
+
+    def client(offset):
+        i = offset
+        while time.monotonic() < deadline:
+            request(*paths[i % len(paths)])
+            i += concurrency
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        # Clients beyond the thread count wait for a thread, as they would in the server's queue
+        list(pool.map(client, range(min(concurrency, threads))))
+    return counters
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--products", type=int, default=20000)
+    parser.add_argument("--concurrency", type=int, default=200, help="concurrent clients")
+    parser.add_argument("--wsgi-threads", type=int, default=32, help="threads of the WSGI server")
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        os.environ["PHARMACY_SQLITE_PATH"] = str(Path(directory) / "bench.sqlite3")
+        os.environ.setdefault("PHARMACY_SQLITE_PROFILE", "performance")
+        setup_django()
+        from django.db import connections
+
+        seed(args.products)
+        paths = make_paths(random.Random(args.seed), args.products, 20000)
+
+        results = {}
+        for name, run in (
+            ("asgi", lambda: run_asgi(paths, args.concurrency, args.seconds)),
+            ("wsgi", lambda: run_wsgi(paths, args.concurrency, args.wsgi_threads, args.seconds)),
+        ):
+            start = time.perf_counter()
+            counters = run()
+            results[name] = (counters, time.perf_counter() - start)
+            connections.close_all()
+
+    print(f"products:             {args.products}")
+    print(f"clients:              {args.concurrency} (WSGI threads: {args.wsgi_threads})")
+    for name, (counters, elapsed) in results.items():
+        print(f"{name}:                 {counters['ok'] / elapsed:.0f} req/s ({counters['ok']} ok, {counters['errors']} errors)")
+    print(f"asgi / wsgi:          {(results['asgi'][0]['ok'] / results['asgi'][1]) / (results['wsgi'][0]['ok'] / results['wsgi'][1]):.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""Latency of warm barcode scans: the in-process map alone and the whole scan endpoint.
+
+    python -m benchmarks.barcode_scan --products 100000 --scans 20000
+
+The endpoint is driven in-process through the ASGI application, so the numbers cover
+Django's request handling and the view but not a network stack. Every scanned product
+has been scanned once before, so the map and the product detail cache are warm.
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from . import setup_django
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def report(label, samples_ms):
+    print(
+        f"{label:<22}p50 {statistics.median(samples_ms):.3f} ms, "
+        f"p99 {percentile(samples_ms, 0.99):.3f} ms, max {max(samples_ms):.3f} ms"
+    )
+
+
+def seed(products):
+    from django.core.management import call_command
+
+    from products.models import Product, Barcode, ProductCategory
+    from products.validators import gtin_check_digit
+
+    call_command("migrate", verbosity=0)
+    Product.objects.bulk_create(
+        Product(brand="Brand", name=f"Product {i}", category=ProductCategory.GENERAL_GOODS) for i in range(products)
+    )
+    codes = []
+    for product_id in Product.objects.values_list("id", flat=True).iterator():
+        digits = f"480{product_id:09d}"
+        codes.append(Barcode(product_id=product_id, code=(digits + gtin_check_digit(digits)).zfill(14)))
+    Barcode.objects.bulk_create(codes, batch_size=5000)
+    return [barcode.code[1:] for barcode in codes]
+
+
+async def scan_endpoint(application, code):
+    status = None
+    body_sent = asyncio.Event()
+
+    async def receive():
+        if body_sent.is_set():
+            await asyncio.Future()
+        body_sent.set()
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    path = f"/products/api/products/scan/{code}/"
+    await application({
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET", "scheme": "http",
+        "path": path, "raw_path": path.encode(), "query_string": b"",
+        "headers": [(b"host", b"localhost")], "server": ("localhost", 80), "client": ("127.0.0.1", 50000),
+    }, receive, send)
+    return status
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--products", type=int, default=100000)
+    parser.add_argument("--scans", type=int, default=20000)
+    parser.add_argument("--hot", type=int, default=2000, help="distinct products scanned")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        os.environ["PHARMACY_SQLITE_PATH"] = str(Path(directory) / "bench.sqlite3")
+        os.environ.setdefault("PHARMACY_SQLITE_PROFILE", "performance")
+        setup_django()
+        from pharmacy_inventory.asgi import application
+        from products.barcodes import barcodes
+
+        codes = seed(args.products)
+        rng = random.Random(args.seed)
+        hot = rng.sample(codes, min(args.hot, len(codes)))
+        scans = [rng.choice(hot) for _ in range(args.scans)]
+
+        start = time.perf_counter()
+        barcodes.lookup(hot[0])
+        warm_ms = (time.perf_counter() - start) * 1000
+
+        lookup_ms = []
+        for code in scans:
+            start = time.perf_counter()
+            barcodes.lookup(code)
+            lookup_ms.append((time.perf_counter() - start) * 1000)
+
+        async def run_endpoint():
+            for code in hot:
+                await scan_endpoint(application, code)
+            samples = []
+            for code in scans:
+                start = time.perf_counter()
+                status = await scan_endpoint(application, code)
+                samples.append((time.perf_counter() - start) * 1000)
+                assert status == 200, status
+            return samples
+
+        endpoint_ms = asyncio.run(run_endpoint())
+
+    print(f"barcodes:             {args.products}")
+    print(f"map load:             {warm_ms:.0f} ms")
+    report("map lookup:", lookup_ms)
+    report("scan endpoint:", endpoint_ms)
+
+
+if __name__ == "__main__":
+    main()
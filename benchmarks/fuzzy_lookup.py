@@ -0,0 +1,88 @@
+"""Compare the trigram index against a naive edit-distance scan for misspelt drug names.
+
+    python -m benchmarks.fuzzy_lookup --size 100000 --queries 50
+"""
+import argparse
+import random
+import statistics
+import time
+
+from . import setup_django
+
+ONSETS = ["b", "c", "d", "f", "g", "l", "m", "n", "p", "r", "s", "t", "v", "x", "z", "ph", "pr", "tr", "cl", "st"]
+VOWELS = ["a", "e", "i", "o", "u", "y", "ai", "io"]
+SUFFIXES = ["cillin", "mol", "fen", "pril", "sartan", "statin", "zole", "pine", "mycin", "olol", "tidine", "zine", "ide", "ate", "one"]
+
+
+def make_name(rng):
+    """Return a made-up generic name built like the real ones: a few syllables and a class suffix."""
+    stem = "".join(rng.choice(ONSETS) + rng.choice(VOWELS) for _ in range(rng.randint(2, 3)))
+    return stem + rng.choice(SUFFIXES)
+
+
+def misspell(name, rng):
+    """Drop, double or swap one character, the way names get mistyped at the counter."""
+    i = rng.randrange(1, len(name) - 1)
+    edit = rng.choice(("drop", "double", "swap"))
+    if edit == "drop":
+        return name[:i] + name[i + 1:]
+    if edit == "double":
+        return name[:i] + name[i] + name[i:]
+    return name[:i - 1] + name[i] + name[i - 1] + name[i + 1:]
+
+
+def levenshtein(a, b):
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        previous = current
+    return previous[-1]
+
+
+def naive_search(names, query, limit):
+    return sorted(range(len(names)), key=lambda i: levenshtein(query, names[i]))[:limit]
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=100000, help="number of names in the index")
+    parser.add_argument("--queries", type=int, default=20, help="number of misspelt lookups to time")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    setup_django()
+    from products.fuzzy import TrigramIndex
+
+    rng = random.Random(args.seed)
+    names = [make_name(rng) for _ in range(args.size)]
+
+    index = TrigramIndex()
+    _, build_ms = timed(lambda: [index.add(i, name) for i, name in enumerate(names)])
+
+    queries = [(i, misspell(names[i], rng)) for i in rng.sample(range(args.size), args.queries)]
+    trigram_ms, naive_ms, trigram_hits = [], [], 0
+    for expected, query in queries:
+        matches, elapsed = timed(index.search, query, 10)
+        trigram_ms.append(elapsed)
+        trigram_hits += any(names[key] == names[expected] for key, _, _ in matches)
+        _, elapsed = timed(naive_search, names, query, 10)
+        naive_ms.append(elapsed)
+
+    print(f"names indexed:        {args.size}")
+    print(f"index build:          {build_ms:.0f} ms")
+    print(f"trigram lookup:       median {statistics.median(trigram_ms):.2f} ms, max {max(trigram_ms):.2f} ms")
+    print(f"naive scan lookup:    median {statistics.median(naive_ms):.2f} ms, max {max(naive_ms):.2f} ms")
+    print(f"speedup:              {statistics.median(naive_ms) / statistics.median(trigram_ms):.0f}x")
+    print(f"trigram top-10 recall: {trigram_hits}/{len(queries)}")
+
+
+if __name__ == "__main__":
+    main()
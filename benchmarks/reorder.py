@@ -0,0 +1,94 @@
+"""Time the vectorized reorder computation against a per-product Python loop.
+
+    python -m benchmarks.reorder --products 100000 --days 365
+
+The usage history is synthetic: every product is dispensed on a random share of the
+days, so the arrays have the shape the aggregate query in inventory.reorder returns.
+The Python loop is timed on a sample of products and scaled to the whole catalog.
+"""
+import argparse
+import math
+import time
+
+import numpy as np
+
+from . import setup_django
+
+
+def make_usage(rng, products, days):
+    """Return (usage_product_ids, usage_quantities) with one entry per product and day of usage."""
+    active_days = rng.integers(0, days + 1, size=products)
+    usage_product_ids = np.repeat(np.arange(1, products + 1), active_days)
+    usage_quantities = rng.integers(1, 20, size=len(usage_product_ids))
+    return usage_product_ids, usage_quantities
+
+
+def loop_reorder(product_ids, usage_product_ids, usage_quantities, days, on_hand, lead_time, review_period, service_factor):
+    """The same statistics as compute_reorder, one product at a time."""
+    daily = {}
+    for product_id, quantity in zip(usage_product_ids.tolist(), usage_quantities.tolist()):
+        daily.setdefault(product_id, []).append(quantity)
+
+    quantities = []
+    for i, product_id in enumerate(product_ids.tolist()):
+        used = daily.get(product_id, [])
+        used = used + [0] * (days - len(used))
+        average = sum(used) / days
+        deviation = math.sqrt(sum((q - average) ** 2 for q in used) / days)
+        reorder_point = average * lead_time[i] + service_factor[i] * deviation * math.sqrt(lead_time[i])
+        target = reorder_point + average * review_period[i]
+        needs_order = average > 0 and on_hand[i] <= reorder_point
+        quantities.append(math.ceil(max(target - on_hand[i], 0)) if needs_order else 0)
+    return quantities
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--products", type=int, default=100000, help="number of products in the catalog")
+    parser.add_argument("--days", type=int, default=365, help="days of usage history")
+    parser.add_argument("--sample", type=int, default=2000, help="products timed with the Python loop")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    setup_django()
+    from inventory.reorder import compute_reorder
+
+    rng = np.random.default_rng(args.seed)
+    product_ids = np.arange(1, args.products + 1)
+    usage_product_ids, usage_quantities = make_usage(rng, args.products, args.days)
+    on_hand = rng.integers(0, 500, size=args.products)
+    lead_time = np.full(args.products, 7.0)
+    review_period = np.full(args.products, 7.0)
+    service_factor = np.full(args.products, 1.65)
+
+    stats, vector_ms = timed(
+        compute_reorder, product_ids, usage_product_ids, usage_quantities, args.days,
+        on_hand, lead_time, review_period, service_factor,
+    )
+
+    sample = min(args.sample, args.products)
+    in_sample = usage_product_ids <= sample
+    expected, loop_ms = timed(
+        loop_reorder, product_ids[:sample], usage_product_ids[in_sample], usage_quantities[in_sample], args.days,
+        on_hand[:sample], lead_time[:sample], review_period[:sample], service_factor[:sample],
+    )
+    loop_ms *= args.products / sample
+    mismatches = int(np.count_nonzero(stats["quantity"][:sample] != np.array(expected)))
+
+    print(f"products:             {args.products}")
+    print(f"usage rows:           {len(usage_product_ids)} ({args.days} days)")
+    print(f"vectorized:           {vector_ms:.0f} ms")
+    print(f"python loop:          {loop_ms:.0f} ms (scaled from {sample} products)")
+    print(f"speedup:              {loop_ms / vector_ms:.0f}x")
+    print(f"products to reorder:  {int(np.count_nonzero(stats['quantity']))}")
+    print(f"sample mismatches:    {mismatches}")
+
+
+if __name__ == "__main__":
+    main()
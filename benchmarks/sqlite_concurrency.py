@@ -0,0 +1,105 @@
+"""Concurrent read/write throughput of the default and the performance SQLite profiles.
+
+    python -m benchmarks.sqlite_concurrency --readers 8 --writers 2 --seconds 10
+
+Each profile runs in its own process against a fresh database file. Reader threads
+fetch products by id and writer threads create products; after every operation the
+thread ends its "request" the way Django does, so connection reuse is measured too.
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from . import setup_django
+
+PROFILES = ("default", "performance")
+
+
+def run_workload(readers, writers, seconds, seed_rows):
+    """Run the workload in this process and return its counters."""
+    setup_django()
+    from django.core.management import call_command
+    from django.db import OperationalError, close_old_connections, connection
+
+    from products.models import Product
+
+    call_command("migrate", verbosity=0)
+    Product.objects.bulk_create(Product(brand="Brand", name=f"Product {i}") for i in range(seed_rows))
+    connection.close()
+
+    counters = {"reads": 0, "writes": 0, "locked": 0}
+    lock = threading.Lock()
+    deadline = time.monotonic() + seconds
+
+    def worker(kind):
+        rng = random.Random()
+        done = locked = 0
+        while time.monotonic() < deadline:
+            try:
+                if kind == "reads":
+                    Product.objects.filter(pk=rng.randint(1, seed_rows)).first()
+                else:
+                    Product.objects.create(brand="Brand", name="New product")
+                done += 1
+            except OperationalError:
+                locked += 1
+            # End of the simulated request: closes the connection unless it is persistent
+            close_old_connections()
+        connection.close()
+        with lock:
+            counters[kind] += done
+            counters["locked"] += locked
+
+    threads = [threading.Thread(target=worker, args=("reads",)) for _ in range(readers)]
+    threads += [threading.Thread(target=worker, args=("writes",)) for _ in range(writers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return counters
+
+
+def run_profile(profile, args):
+    with tempfile.TemporaryDirectory() as directory:
+        env = dict(os.environ, PHARMACY_SQLITE_PROFILE=profile, PHARMACY_SQLITE_PATH=str(Path(directory) / "bench.sqlite3"))
+        command = [
+            sys.executable, "-m", "benchmarks.sqlite_concurrency", "--worker",
+            "--readers", str(args.readers), "--writers", str(args.writers),
+            "--seconds", str(args.seconds), "--seed-rows", str(args.seed_rows),
+        ]
+        output = subprocess.run(command, env=env, check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--seed-rows", type=int, default=10000)
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_workload(args.readers, args.writers, args.seconds, args.seed_rows)))
+        return
+
+    results = {profile: run_profile(profile, args) for profile in PROFILES}
+    print(f"{'profile':<12} {'reads/s':>10} {'writes/s':>10} {'locked errors':>14}")
+    for profile, counters in results.items():
+        print(f"{profile:<12} {counters['reads'] / args.seconds:>10.0f} {counters['writes'] / args.seconds:>10.0f} {counters['locked']:>14}")
+    baseline, tuned = results["default"], results["performance"]
+    for kind in ("reads", "writes"):
+        if baseline[kind]:
+            print(f"{kind} speedup: {tuned[kind] / baseline[kind]:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
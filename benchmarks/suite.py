@@ -0,0 +1,283 @@
+"""Timings of the key catalog paths at several catalog sizes, written as JSON for comparison between commits.
+
+    python -m benchmarks.suite --sizes 10000 100000 1000000 --output results.json
+    python -m benchmarks.suite --compare base.json results.json --threshold 0.2
+
+Every size runs in its own process against a fresh SQLite file filled by
+generate_catalog() with a fixed seed, so two runs on different commits measure the same
+data. The cases cover the admin changelists, full-text and fuzzy search, the catalog
+import and export, and the lookups of the POS and purchasing screens.
+
+The JSON file holds the commit, the environment and one entry per (case, size) with the
+median, p95, min and max in milliseconds. --compare prints the change of every median
+between two such files and exits with status 1 when one got slower by more than the
+threshold, so it can fail a CI job.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from io import StringIO
+from pathlib import Path
+
+from . import setup_django
+
+DEFAULT_SIZES = [10000, 100000, 1000000]
+
+# Rows imported by the import case, whatever the catalog size
+IMPORT_ROWS = 10000
+
+SEARCHES = ["paracetamol", "amoxi", "biogesic", "soap", "cetirizine tablet", "vitamin"]
+FUZZY_SEARCHES = ["paracetmol", "amoxicilin", "cetirizin", "ibuprofin"]
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def measure(function, repeat, warmup=1):
+    """Call function `warmup` times untimed, then `repeat` times; return the timings in ms."""
+    for _ in range(warmup):
+        function()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def summarize(name, size, samples, **extra):
+    result = {
+        "case": name,
+        "size": size,
+        "runs": len(samples),
+        "median_ms": round(statistics.median(samples), 3),
+        "p95_ms": round(percentile(samples, 0.95), 3),
+        "min_ms": round(min(samples), 3),
+        "max_ms": round(max(samples), 3),
+    }
+    result.update(extra)
+    return result
+
+
+def import_csv(rows, offset):
+    header = "brand,name,category,generic_name,dosage,dosage_unit,form,usage,side_effects,prescription_type,type,unit,notes\n"
+    lines = [header]
+    for i in range(offset, offset + rows):
+        if i % 2:
+            lines.append(f"Imported,Paracetamol {i},MEDICINE,paracetamol,500,mg,Tablet,Fever,-,OTC,,,\n")
+        else:
+            lines.append(f"Imported,Bar Soap {i},GG,,,,,,,,Personal care,bar,-\n")
+    return "".join(lines)
+
+
+def run_cases(size, repeat, heavy_repeat):
+    """Fill a fresh database with `size` products and time every case; returns the result entries."""
+    from django.contrib.auth import get_user_model
+    from django.core.cache import cache
+    from django.core.management import call_command
+    from django.test import Client
+
+    from products import cache as detail_cache, fuzzy, search
+    from products.barcodes import barcodes
+    from products.exporters import export_catalog
+    from products.generator import generate_catalog
+    from products.importers import import_catalog
+    from products.models import Barcode, Product
+    from suppliers.pricing import cheapest_offers
+
+    results = []
+    call_command("migrate", verbosity=0)
+
+    start = time.perf_counter()
+    generate_catalog(size, suppliers=20, seed=0)
+    results.append(summarize("generate_catalog", size, [(time.perf_counter() - start) * 1000]))
+
+    user = get_user_model().objects.create_superuser("bench", "bench@example.com", "bench")
+    client = Client(SERVER_NAME="localhost")
+    client.force_login(user)
+
+    for name, path in (
+        ("admin_product_changelist", "/admin/products/product/"),
+        ("admin_product_changelist_filtered", "/admin/products/product/?category__exact=MEDICINE&status=PUBLISHED"),
+        ("admin_product_changelist_search", "/admin/products/product/?q=Paracetamol"),
+        ("admin_product_changelist_last_page", f"/admin/products/product/?p={max(size // 50 - 1, 0)}"),
+        ("admin_medicine_changelist", "/admin/products/medicine/"),
+        ("admin_catalogentry_changelist_filtered", "/admin/products/catalogentry/?category__exact=MEDICINE&form=Tablet"),
+        ("admin_supplierprice_changelist", "/admin/suppliers/supplierprice/"),
+    ):
+        def get(path=path):
+            response = client.get(path)
+            assert response.status_code == 200, (path, response.status_code)
+        results.append(summarize(name, size, measure(get, repeat)))
+
+    def search_all():
+        for query in SEARCHES:
+            search.search_products(query, limit=20)
+    results.append(summarize("search_fts", size, measure(search_all, repeat), queries=len(SEARCHES)))
+
+    start = time.perf_counter()
+    fuzzy.get_index()
+    results.append(summarize("fuzzy_index_load", size, [(time.perf_counter() - start) * 1000]))
+
+    def fuzzy_all():
+        for query in FUZZY_SEARCHES:
+            fuzzy.fuzzy_search(query)
+    results.append(summarize("search_fuzzy", size, measure(fuzzy_all, repeat), queries=len(FUZZY_SEARCHES)))
+    fuzzy.reset_index()
+
+    class Sink:
+        def write(self, value):
+            pass
+
+    for format in ("csv", "jsonl"):
+        samples = measure(lambda: export_catalog(Sink(), format), heavy_repeat, warmup=0)
+        results.append(summarize(f"export_{format}", size, samples, rows=size))
+
+    imported = [0]
+
+    def import_rows():
+        result = import_catalog(StringIO(import_csv(IMPORT_ROWS, size + imported[0])))
+        assert result.failed == 0, result.errors[:3]
+        imported[0] += IMPORT_ROWS
+    results.append(summarize("import_csv", size, measure(import_rows, heavy_repeat, warmup=0), rows=IMPORT_ROWS))
+
+    # Lookups spread over the whole id range, so they aren't all answered from the same pages
+    step = max(size // 500, 1)
+    product_ids = list(Product.objects.filter(pk__lte=size).values_list("pk", flat=True)[::step][:500])
+
+    def cold_details():
+        cache.clear()
+        detail_cache.get_many(product_ids)
+    results.append(summarize("product_details_cold", size, measure(cold_details, repeat), products=len(product_ids)))
+    results.append(summarize(
+        "product_details_warm", size, measure(lambda: detail_cache.get_many(product_ids), repeat), products=len(product_ids),
+    ))
+
+    codes = list(Barcode.objects.filter(product_id__in=product_ids).values_list("code", flat=True))
+    start = time.perf_counter()
+    barcodes.lookup(codes[0])
+    results.append(summarize("barcode_map_load", size, [(time.perf_counter() - start) * 1000]))
+
+    def scan_all():
+        for code in codes:
+            barcodes.lookup(code)
+    results.append(summarize("barcode_scan", size, measure(scan_all, repeat), scans=len(codes)))
+    barcodes.clear()
+
+    results.append(summarize(
+        "cheapest_offers", size, measure(lambda: cheapest_offers(product_ids), repeat), products=len(product_ids),
+    ))
+    return results
+
+
+def run_size(size, repeat, heavy_repeat):
+    """Run the cases of one size in this process against a throwaway database."""
+    with tempfile.TemporaryDirectory() as directory:
+        os.environ["PHARMACY_SQLITE_PATH"] = str(Path(directory) / "bench.sqlite3")
+        os.environ.setdefault("PHARMACY_SQLITE_PROFILE", "performance")
+        setup_django()
+        from django.db import connections
+
+        results = run_cases(size, repeat, heavy_repeat)
+        connections.close_all()
+    return results
+
+
+def environment():
+    import django
+    import sqlite3
+
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=Path(__file__).resolve().parent.parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "django": django.get_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "platform": platform.platform(),
+        "sqlite_profile": os.environ.get("PHARMACY_SQLITE_PROFILE", "performance"),
+    }
+
+
+def compare(base_path, new_path, threshold):
+    """Print the change of every median between two result files; return the number of regressions."""
+    base = {(entry["case"], entry["size"]): entry for entry in json.loads(Path(base_path).read_text())["results"]}
+    new = json.loads(Path(new_path).read_text())["results"]
+
+    regressions = 0
+    print(f"{'case':<42}{'size':>9}{'base ms':>12}{'new ms':>12}{'change':>9}")
+    for entry in new:
+        before = base.get((entry["case"], entry["size"]))
+        if before is None:
+            print(f"{entry['case']:<42}{entry['size']:>9}{'-':>12}{entry['median_ms']:>12.3f}{'new':>9}")
+            continue
+        change = (entry["median_ms"] - before["median_ms"]) / before["median_ms"] if before["median_ms"] else 0.0
+        flag = ""
+        if change > threshold:
+            regressions += 1
+            flag = "  REGRESSION"
+        print(f"{entry['case']:<42}{entry['size']:>9}{before['median_ms']:>12.3f}{entry['median_ms']:>12.3f}{change:>+9.0%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="catalog sizes to run")
+    parser.add_argument("--repeat", type=int, default=20, help="timed runs of the fast cases")
+    parser.add_argument("--heavy-repeat", type=int, default=3, help="timed runs of the import and export cases")
+    parser.add_argument("--output", "-o", help="JSON file to write; defaults to standard output")
+    parser.add_argument("--compare", nargs=2, metavar=("BASE", "NEW"), help="compare two result files instead of running")
+    parser.add_argument("--threshold", type=float, default=0.2, help="slowdown of a median that counts as a regression")
+    parser.add_argument("--single-size", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.compare:
+        regressions = compare(*args.compare, args.threshold)
+        print(f"\n{regressions} regression(s) above {args.threshold:.0%}")
+        sys.exit(1 if regressions else 0)
+
+    if args.single_size is not None:
+        # Child process: run one size and hand the entries back on stdout
+        json.dump(run_size(args.single_size, args.repeat, args.heavy_repeat), sys.stdout)
+        return
+
+    results = []
+    for size in args.sizes:
+        print(f"running size {size}...", file=sys.stderr)
+        child = subprocess.run(
+            [sys.executable, "-m", "benchmarks.suite", "--single-size", str(size),
+             "--repeat", str(args.repeat), "--heavy-repeat", str(args.heavy_repeat)],
+            capture_output=True, text=True, cwd=Path(__file__).resolve().parent.parent,
+        )
+        if child.returncode:
+            sys.stderr.write(child.stderr)
+            sys.exit(f"size {size} failed")
+        for entry in json.loads(child.stdout):
+            results.append(entry)
+            print(f"  {entry['case']:<42}median {entry['median_ms']:>10.3f} ms  p95 {entry['p95_ms']:>10.3f} ms", file=sys.stderr)
+
+    document = {"environment": environment(), "results": results}
+    if args.output:
+        Path(args.output).write_text(json.dumps(document, indent=2) + "\n")
+        print(f"results written to {args.output}", file=sys.stderr)
+    else:
+        json.dump(document, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+from django.contrib import admin
+
+from products.admin import CatalogModelAdmin
+
+from .models import StockMovement, StockLevel
+from .services import apply_to_stock_level
+
+
+@admin.register(StockMovement)
+class StockMovementAdmin(CatalogModelAdmin):
+    list_display = ("date_created", "product", "movement_type", "quantity", "lot_number", "reference")
+    list_filter = ("movement_type",)
+    list_select_related = ("product",)
+    search_fields = ("^lot_number", "^reference", "^product__name")
+    autocomplete_fields = ("product",)
+    ordering = ("-date_created", "-id")
+
+    def save_model(self, request, obj, form, change):
+        # The admin saves inside a transaction, so the stock level moves together with the new row
+        super().save_model(request, obj, form, change)
+        apply_to_stock_level(obj.product_id, obj.quantity)
+
+    def has_change_permission(self, request, obj=None):
+        # The ledger is append-only; corrections are new adjustment movements
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(StockLevel)
+class StockLevelAdmin(CatalogModelAdmin):
+    list_display = ("product", "quantity", "date_updated")
+    list_select_related = ("product",)
+    search_fields = ("^product__name",)
+    readonly_fields = ("product", "quantity", "date_updated")
+
+    def has_add_permission(self, request):
+        # Stock levels only change through movements
+        return False
@@ -0,0 +1,108 @@
+"""First-expired-first-out (FEFO) allocation of stock across lots.
+
+The lots to draw from are picked by the database in one query: a running total of the
+lot quantities, in expiry order, is computed with a window function and only the lots
+needed to reach the requested quantity come back. That query walks the partial
+stocklot_fefo_idx index, which only holds lots with stock left.
+"""
+from collections import namedtuple
+
+from django.db import transaction
+from django.db.models import F, Q, Sum, Window
+from django.utils import timezone
+
+from .models import MovementType, StockMovement, StockLot
+from .services import InsufficientStock, StockError, take_from_stock_level
+
+Allocation = namedtuple("Allocation", ["lot_id", "lot_number", "expiry_date", "quantity"])
+
+
+def fefo_order():
+    # Lots without an expiry date go last
+    return [F("expiry_date").asc(nulls_last=True), F("id").asc()]
+
+
+def available_lots(product_id, today=None):
+    """Lots of the product with stock left that haven't expired yet, soonest expiry first."""
+    today = today or timezone.localdate()
+    return (
+        StockLot.objects
+        .filter(product_id=product_id, quantity__gt=0)
+        .filter(Q(expiry_date__gte=today) | Q(expiry_date__isnull=True))
+        .order_by(*fefo_order())
+    )
+
+
+def allocation_lots(product_id, quantity, today=None):
+    """Return the query picking the lots allocate_fefo() draws a quantity from, with their running totals."""
+    return (
+        available_lots(product_id, today)
+        .annotate(running_total=Window(Sum("quantity"), order_by=fefo_order()))
+        # A lot is needed while the lots before it don't cover the quantity yet
+        .filter(running_total__lt=quantity + F("quantity"))
+        .values_list("id", "lot_number", "expiry_date", "quantity", "running_total")
+    )
+
+
+def allocate_fefo(product, quantity, today=None):
+    """Split a quantity across the lots of a product, first-expired-first-out.
+
+    Returns a list of Allocation; raises InsufficientStock if the unexpired lots don't hold
+    enough. Nothing is written.
+    """
+    if quantity <= 0:
+        raise StockError("Allocated quantity must be positive.")
+    product_id = getattr(product, "pk", product)
+
+    allocations = []
+    remaining = quantity
+    for lot_id, lot_number, expiry_date, lot_quantity, _ in allocation_lots(product_id, quantity, today):
+        take = min(lot_quantity, remaining)
+        allocations.append(Allocation(lot_id, lot_number, expiry_date, take))
+        remaining -= take
+
+    if remaining > 0:
+        raise InsufficientStock(f"Only {quantity - remaining} of {quantity} units in stock for product {product_id}.")
+    return allocations
+
+
+def dispense_fefo(product, quantity, reference="", today=None):
+    """Dispense a quantity from the lots that expire first and return the allocations used.
+
+    Every lot is decremented with a conditional UPDATE, so a lot emptied by a concurrent
+    sale in the meantime makes the whole dispense fail instead of going negative.
+    """
+    product_id = getattr(product, "pk", product)
+    with transaction.atomic():
+        allocations = take_from_lots(product_id, quantity, reference, today)
+        take_from_stock_level(product_id, quantity)
+    return allocations
+
+
+def take_from_lots(product_id, quantity, reference="", today=None, prescription=""):
+    """Decrement the lots picked by allocate_fefo and write their movements, leaving the stock level alone.
+
+    Call it inside a transaction; raises InsufficientStock, which should roll it back.
+    """
+    allocations = allocate_fefo(product_id, quantity, today)
+    for allocation in allocations:
+        updated = (
+            StockLot.objects
+            .filter(pk=allocation.lot_id, quantity__gte=allocation.quantity)
+            .update(quantity=F("quantity") - allocation.quantity)
+        )
+        if not updated:
+            raise InsufficientStock(f"Lot {allocation.lot_number} changed while dispensing; try again.")
+
+    StockMovement.objects.bulk_create(
+        StockMovement(
+            product_id=product_id,
+            movement_type=MovementType.DISPENSE,
+            quantity=-allocation.quantity,
+            lot_number=allocation.lot_number,
+            reference=reference,
+            prescription=prescription,
+        )
+        for allocation in allocations
+    )
+    return allocations
@@ -0,0 +1,227 @@
+"""Dispensing for sales, with the sales of many terminals committed together.
+
+A sale is checked against the prescription rules and then taken from stock with
+conditional UPDATEs: the stock level only goes down where it holds the quantity
+(`quantity >= n`), and medicines are taken from their lots first-expired-first-out, each
+lot with the same condition (see inventory.allocation). A sale that doesn't fit fails
+with InsufficientStock; stock never goes negative, however many terminals sell the last
+units at once.
+
+SQLite runs one write transaction at a time, so one transaction per scan would make
+every terminal wait for every other terminal's commit. Instead, sales are handed to a
+single writer thread, which takes every sale queued while it was committing the
+previous ones, plus those arriving within DISPENSE_BATCH_WINDOW seconds, up to
+DISPENSE_BATCH_SIZE, and commits them in one transaction. Each sale runs in its own
+savepoint, so a sale that fails is rolled back on its own and the others still commit;
+every caller gets its own result or exception. Under load the batches grow by
+themselves, and the commits, the expensive part, stay few.
+
+Callers wait for their sale to commit, so the queue never holds more sales than there
+are callers. Sales made inside a transaction of their own, and all sales with
+DISPENSE_GROUP_COMMIT off, are dispensed right away in the calling thread.
+"""
+import asyncio
+import logging
+import queue
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import Future
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+
+from pharmacy_inventory.db import run_in_database_thread
+from products.models import Product, ProductCategory, MedicineType
+
+from .allocation import take_from_lots
+from .models import MovementType, StockMovement
+from .services import StockError, take_from_stock_level
+
+DEFAULT_BATCH_WINDOW = 0.002
+DEFAULT_BATCH_SIZE = 100
+
+logger = logging.getLogger(__name__)
+
+Sale = namedtuple("Sale", ["product_id", "quantity", "prescription", "reference"])
+
+# The lots a sale was taken from; empty for products that aren't kept in lots
+Dispensed = namedtuple("Dispensed", ["product_id", "quantity", "allocations"])
+
+# Sent through the queue to stop the writer thread
+_STOP = object()
+
+
+class PrescriptionRequired(StockError):
+    """Raised when a prescription medicine is dispensed without a prescription number."""
+
+
+def make_sale(product, quantity, prescription="", reference=""):
+    """Return a validated Sale; raises StockError."""
+    product_id = getattr(product, "pk", product)
+    if not isinstance(product_id, int) or isinstance(product_id, bool):
+        raise StockError("A sale needs a product id.")
+    if not isinstance(quantity, int) or isinstance(quantity, bool) or quantity <= 0:
+        raise StockError("Dispensed quantity must be a positive whole number.")
+    return Sale(product_id, quantity, (prescription or "").strip(), reference or "")
+
+
+def check_prescription(sale, category, prescription_type):
+    """Raise PrescriptionRequired unless the sale may be dispensed with the prescription it has."""
+    if category != ProductCategory.MEDICINE or prescription_type == MedicineType.OTC:
+        return
+    # A medicine without its detail row counts as prescription-only, the default of the field
+    if not sale.prescription:
+        raise PrescriptionRequired(f"Product {sale.product_id} is a prescription medicine; give the prescription number.")
+
+
+def _take(sale, category, today):
+    # The stock level first: when it doesn't hold the quantity, nothing else is touched
+    take_from_stock_level(sale.product_id, sale.quantity)
+    if category == ProductCategory.MEDICINE:
+        allocations = take_from_lots(sale.product_id, sale.quantity, sale.reference, today, sale.prescription)
+    else:
+        StockMovement.objects.create(
+            product_id=sale.product_id,
+            movement_type=MovementType.DISPENSE,
+            quantity=-sale.quantity,
+            reference=sale.reference,
+            prescription=sale.prescription,
+        )
+        allocations = []
+    return Dispensed(sale.product_id, sale.quantity, allocations)
+
+
+def dispense_sales(sales, today=None):
+    """Dispense a list of sales in one transaction; returns a Dispensed or the exception of each sale, in order."""
+    outcomes = []
+    with transaction.atomic():
+        products = {
+            product_id: (category, prescription_type)
+            for product_id, category, prescription_type in Product.objects.filter(
+                pk__in={sale.product_id for sale in sales}
+            ).values_list("pk", "category", "medicine__prescription_type")
+        }
+        for sale in sales:
+            try:
+                if sale.product_id not in products:
+                    raise Product.DoesNotExist(f"Product {sale.product_id} does not exist.")
+                category, prescription_type = products[sale.product_id]
+                check_prescription(sale, category, prescription_type)
+                # A savepoint per sale, so a sale failing halfway leaves the batch as it was
+                with transaction.atomic():
+                    outcomes.append(_take(sale, category, today))
+            except (StockError, Product.DoesNotExist) as exc:
+                outcomes.append(exc)
+    return outcomes
+
+
+class Dispenser:
+    """Queue of sales committed in batches by a single writer thread."""
+
+    def __init__(self, batch_window=None, batch_size=None):
+        self.batch_window = batch_window if batch_window is not None else getattr(settings, "DISPENSE_BATCH_WINDOW", DEFAULT_BATCH_WINDOW)
+        self.batch_size = batch_size or getattr(settings, "DISPENSE_BATCH_SIZE", DEFAULT_BATCH_SIZE)
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        # Totals since start, for tests and tuning: sales per batch is the coalescing achieved
+        self.batches_committed = 0
+        self.sales_committed = 0
+
+    def submit(self, sale):
+        """Queue a sale and return a Future of its Dispensed; dispenses it right away when batching is off."""
+        if not getattr(settings, "DISPENSE_GROUP_COMMIT", True) or connection.in_atomic_block:
+            # Inside the caller's transaction, so the sale commits or rolls back with it
+            future = Future()
+            outcome = dispense_sales([sale])[0]
+            if isinstance(outcome, Exception):
+                future.set_exception(outcome)
+            else:
+                future.set_result(outcome)
+            return future
+        return self._enqueue(sale)
+
+    def dispense(self, sale):
+        """Dispense a sale and return its Dispensed once committed; raises its StockError."""
+        return self.submit(sale).result()
+
+    async def adispense(self, sale):
+        """Dispense a sale from async code, waiting for the commit without holding a thread."""
+        if not getattr(settings, "DISPENSE_GROUP_COMMIT", True):
+            return await run_in_database_thread(self.dispense, sale)
+        return await asyncio.wrap_future(self._enqueue(sale))
+
+    def _enqueue(self, sale):
+        self._start()
+        future = Future()
+        self._queue.put((sale, future))
+        return future
+
+    def _start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="dispenser", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            batch = []
+            deadline = time.monotonic() + self.batch_window
+            while True:
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    break
+                try:
+                    # Sales queued during the previous commit are taken without waiting
+                    item = self._queue.get(timeout=max(deadline - time.monotonic(), 0)) if self.batch_window else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            if batch:
+                self._commit(batch)
+        connection.close()
+
+    def _commit(self, batch):
+        # The thread lives outside the request cycle, so retire expired or broken connections here
+        close_old_connections()
+        try:
+            outcomes = dispense_sales([sale for sale, _ in batch])
+        except Exception as exc:
+            # Nothing of the batch was committed; every caller gets the error, and the
+            # thread carries on with the next batch
+            logger.exception("Dispensing a batch of %d sales failed.", len(batch))
+            for _, future in batch:
+                future.set_exception(exc)
+            return
+        self.batches_committed += 1
+        self.sales_committed += len(batch)
+        for (_, future), outcome in zip(batch, outcomes):
+            if isinstance(outcome, Exception):
+                future.set_exception(outcome)
+            else:
+                future.set_result(outcome)
+
+    def close(self):
+        """Stop the writer thread once the sales queued so far are committed."""
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join()
+
+
+dispenser = Dispenser()
+
+
+def dispense(product, quantity, prescription="", reference=""):
+    """Dispense a sale of `quantity` units and return its Dispensed once committed.
+
+    Raises PrescriptionRequired, InsufficientStock or another StockError when the sale
+    can't be made, and Product.DoesNotExist for an unknown product.
+    """
+    return dispenser.dispense(make_sale(product, quantity, prescription, reference))
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count, Sum
+
+from ...models import ReorderSuggestion
+from ...reorder import DEFAULT_HISTORY_DAYS, run_reorder
+
+
+class Command(BaseCommand):
+    help = "Recompute reorder points and reorder quantities of every product from its usage history."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--history-days", type=int, default=DEFAULT_HISTORY_DAYS, help="Days of dispensing history to base the usage on.")
+
+    def handle(self, *args, **options):
+        if options["history_days"] < 1:
+            raise CommandError("--history-days must be at least 1.")
+
+        result = run_reorder(history_days=options["history_days"])
+
+        per_supplier = (
+            ReorderSuggestion.objects
+            .values("supplier_id", "supplier__name")
+            .annotate(lines=Count("product"), units=Sum("quantity"))
+            .order_by("supplier__name")
+        )
+        for row in per_supplier:
+            name = row["supplier__name"] or "(no supplier)"
+            self.stdout.write(f"{name}: {row['lines']} products, {row['units']} units")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{result.suggestions} of {result.products} products need reordering "
+            f"({result.created} new, {result.updated} updated, {result.removed} cleared)."
+        ))
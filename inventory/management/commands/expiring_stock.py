@@ -0,0 +1,20 @@
+import csv
+
+from django.core.management.base import BaseCommand
+
+from ...reports import expiring_within
+
+
+class Command(BaseCommand):
+    help = "List the lots with stock left that expire within the given number of days."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=30)
+        parser.add_argument("--include-expired", action="store_true", help="Also list lots that have already expired.")
+
+    def handle(self, *args, **options):
+        writer = csv.writer(self.stdout)
+        writer.writerow(["expiry_date", "product_id", "product", "lot_number", "quantity"])
+        lots = expiring_within(options["days"], include_expired=options["include_expired"])
+        for lot in lots.iterator(chunk_size=2000):
+            writer.writerow([lot.expiry_date.isoformat(), lot.product_id, lot.product.name, lot.lot_number, lot.quantity])
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from ...services import find_drift, fix_drift
+
+
+class Command(BaseCommand):
+    help = "Recompute stock on hand from the movement ledger and report products whose stock level has drifted from it or from their lots."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--fix", action="store_true", help="Overwrite drifted stock levels with the ledger totals.")
+
+    def handle(self, *args, **options):
+        drift = find_drift()
+        for item in drift:
+            lots = f", lots {item.lots}" if item.lots is not None and item.lots != item.recorded else ""
+            self.stdout.write(f"product {item.product_id}: stock level {item.recorded}, ledger {item.ledger} ({item.ledger - item.recorded:+d}){lots}")
+
+        if not drift:
+            self.stdout.write(self.style.SUCCESS("Stock levels match the ledger."))
+        elif options["fix"]:
+            fix_drift(drift)
+            self.stdout.write(self.style.SUCCESS(f"Fixed {len(drift)} stock levels."))
+            lot_drift = [item for item in drift if item.lots is not None and item.lots != item.ledger]
+            if lot_drift:
+                raise CommandError(f"The lots of {len(lot_drift)} products don't add up to their stock; adjust them by lot after a stock count.")
+        else:
+            raise CommandError(f"{len(drift)} stock levels drifted from the ledger; rerun with --fix to correct them.")
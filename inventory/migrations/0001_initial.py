@@ -0,0 +1,39 @@
+# Generated by Django 5.2.3 on 2026-10-18 06:21
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('products', '0008_product_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockLevel',
+            fields=[
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stock_level', serialize=False, to='products.product')),
+                ('quantity', models.IntegerField(default=0)),
+                ('date_updated', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='StockMovement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('movement_type', models.CharField(choices=[('RECEIPT', 'Receipt'), ('DISPENSE', 'Dispense'), ('ADJUSTMENT', 'Adjustment')], max_length=15)),
+                ('quantity', models.IntegerField()),
+                ('lot_number', models.CharField(blank=True, max_length=50)),
+                ('reference', models.CharField(blank=True, max_length=100)),
+                ('date_created', models.DateTimeField(auto_now_add=True)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='stock_movements', to='products.product')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['product', 'date_created'], name='movement_product_date_idx'), models.Index(fields=['product', 'lot_number'], name='movement_product_lot_idx')],
+            },
+        ),
+    ]
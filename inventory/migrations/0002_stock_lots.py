@@ -0,0 +1,30 @@
+# Generated by Django 5.2.3 on 2026-10-18 06:22
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0001_initial'),
+        ('products', '0008_product_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockLot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('lot_number', models.CharField(max_length=50)),
+                ('expiry_date', models.DateField(blank=True, null=True)),
+                ('quantity', models.IntegerField(default=0)),
+                ('date_created', models.DateTimeField(auto_now_add=True)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='stock_lots', to='products.product')),
+            ],
+            options={
+                'indexes': [models.Index(condition=models.Q(('quantity__gt', 0)), fields=['product', 'expiry_date', 'id'], name='stocklot_fefo_idx'), models.Index(condition=models.Q(('quantity__gt', 0)), fields=['expiry_date'], name='stocklot_expiry_idx')],
+                'constraints': [models.UniqueConstraint(fields=('product', 'lot_number'), name='stocklot_product_lot_unique')],
+            },
+        ),
+    ]
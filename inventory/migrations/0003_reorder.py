@@ -0,0 +1,55 @@
+# Generated by Django 5.2.3 on 2026-10-18 06:23
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0002_stock_lots'),
+        ('products', '0008_product_search_index'),
+        ('suppliers', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReorderPolicy',
+            fields=[
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='reorder_policy', serialize=False, to='products.product')),
+                ('lead_time_days', models.PositiveIntegerField(default=7)),
+                ('review_period_days', models.PositiveIntegerField(default=7)),
+                ('service_factor', models.FloatField(default=1.65)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ReorderSuggestion',
+            fields=[
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='reorder_suggestion', serialize=False, to='products.product')),
+                ('average_daily_usage', models.FloatField()),
+                ('safety_stock', models.FloatField()),
+                ('reorder_point', models.FloatField()),
+                ('stock_on_hand', models.IntegerField()),
+                ('quantity', models.PositiveIntegerField()),
+                ('date_updated', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='stockmovement',
+            index=models.Index(fields=['movement_type', 'date_created', 'product', 'quantity'], name='movement_type_date_idx'),
+        ),
+        migrations.AddField(
+            model_name='reorderpolicy',
+            name='supplier',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='reorder_policies', to='suppliers.suppliers'),
+        ),
+        migrations.AddField(
+            model_name='reordersuggestion',
+            name='supplier',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='reorder_suggestions', to='suppliers.suppliers'),
+        ),
+        migrations.AddIndex(
+            model_name='reordersuggestion',
+            index=models.Index(fields=['supplier', 'product'], name='suggestion_supplier_idx'),
+        ),
+    ]
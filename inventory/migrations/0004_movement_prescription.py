@@ -0,0 +1,18 @@
+# Generated by Django 5.2.3 on 2026-10-18 07:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0003_reorder'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='stockmovement',
+            name='prescription',
+            field=models.CharField(blank=True, max_length=50),
+        ),
+    ]
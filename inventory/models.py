@@ -0,0 +1,106 @@
+from django.db import models
+
+from products.models import Product
+from suppliers.models import Suppliers
+
+class MovementType(models.TextChoices):
+    """Constant choices for the kind of stock movement."""
+    RECEIPT = "RECEIPT", "Receipt"
+    DISPENSE = "DISPENSE", "Dispense"
+    ADJUSTMENT = "ADJUSTMENT", "Adjustment"
+
+class StockMovement(models.Model):
+    """A single change in the quantity of a product. The ledger is append-only."""
+    product = models.ForeignKey(Product, on_delete=models.PROTECT, related_name="stock_movements")
+    movement_type = models.CharField(max_length=15, choices=MovementType.choices)
+    # Signed: positive for stock coming in, negative for stock going out
+    quantity = models.IntegerField()
+    lot_number = models.CharField(max_length=50, blank=True)
+    reference = models.CharField(max_length=100, blank=True)
+    # Number of the prescription a prescription medicine was dispensed against
+    prescription = models.CharField(max_length=50, blank=True)
+    date_created = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["product", "date_created"], name="movement_product_date_idx"),
+            models.Index(fields=["product", "lot_number"], name="movement_product_lot_idx"),
+            # Covers the catalog-wide usage history read by the reorder run
+            models.Index(fields=["movement_type", "date_created", "product", "quantity"], name="movement_type_date_idx"),
+        ]
+
+    def __str__(self):
+        """Return a string representation of the model."""
+        return f"{self.get_movement_type_display()} {self.quantity:+d} of product {self.product_id}"
+
+class StockLevel(models.Model):
+    """Stock on hand of a product, updated in the same transaction as every movement."""
+    product = models.OneToOneField(Product, primary_key=True, on_delete=models.CASCADE, related_name="stock_level")
+    quantity = models.IntegerField(default=0)
+    date_updated = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        """Return a string representation of the model."""
+        return f"{self.quantity} of product {self.product_id}"
+
+class StockLot(models.Model):
+    """Stock on hand of one lot of a product, with its expiry date."""
+    product = models.ForeignKey(Product, on_delete=models.PROTECT, related_name="stock_lots")
+    lot_number = models.CharField(max_length=50)
+    # Left empty for goods that don't expire; required for medicines
+    expiry_date = models.DateField(null=True, blank=True)
+    quantity = models.IntegerField(default=0)
+    date_created = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["product", "lot_number"], name="stocklot_product_lot_unique"),
+        ]
+        indexes = [
+            # Only lots with stock left are ever allocated from or reported on, so keep the indexes small
+            models.Index(
+                fields=["product", "expiry_date", "id"],
+                name="stocklot_fefo_idx",
+                condition=models.Q(quantity__gt=0),
+            ),
+            models.Index(fields=["expiry_date"], name="stocklot_expiry_idx", condition=models.Q(quantity__gt=0)),
+        ]
+
+    def __str__(self):
+        """Return a string representation of the model."""
+        return f"{self.lot_number} (expires {self.expiry_date or 'never'})"
+
+class ReorderPolicy(models.Model):
+    """Replenishment settings of a product; products without a policy use the defaults of inventory.reorder."""
+    product = models.OneToOneField(Product, primary_key=True, on_delete=models.CASCADE, related_name="reorder_policy")
+    supplier = models.ForeignKey(Suppliers, null=True, blank=True, on_delete=models.SET_NULL, related_name="reorder_policies")
+    # Days between placing an order and receiving it
+    lead_time_days = models.PositiveIntegerField(default=7)
+    # Days of usage an order should cover on top of the reorder point
+    review_period_days = models.PositiveIntegerField(default=7)
+    # Number of standard deviations of demand kept as safety stock (1.65 is roughly a 95% service level)
+    service_factor = models.FloatField(default=1.65)
+
+    def __str__(self):
+        """Return a string representation of the model."""
+        return f"Reorder policy of product {self.product_id}"
+
+class ReorderSuggestion(models.Model):
+    """Latest reorder suggestion of a product, written by the nightly reorder run."""
+    product = models.OneToOneField(Product, primary_key=True, on_delete=models.CASCADE, related_name="reorder_suggestion")
+    supplier = models.ForeignKey(Suppliers, null=True, blank=True, on_delete=models.SET_NULL, related_name="reorder_suggestions")
+    average_daily_usage = models.FloatField()
+    safety_stock = models.FloatField()
+    reorder_point = models.FloatField()
+    stock_on_hand = models.IntegerField()
+    quantity = models.PositiveIntegerField()
+    date_updated = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["supplier", "product"], name="suggestion_supplier_idx"),
+        ]
+
+    def __str__(self):
+        """Return a string representation of the model."""
+        return f"Reorder {self.quantity} of product {self.product_id}"
@@ -0,0 +1,149 @@
+"""Catalog-wide reorder point and reorder quantity computation.
+
+The whole run is a handful of bulk queries and NumPy array operations, whatever the
+number of products:
+
+1. the daily dispensed quantity of every product over the history window is read with
+   one aggregate query (served by the covering movement_type_date_idx index);
+2. average daily usage, its standard deviation, the safety stock and the reorder point
+   are computed for all products at once;
+3. the suggestions are written back with bulk_create/bulk_update.
+
+For a product with average daily usage d, standard deviation s, lead time L, review
+period R and service factor z:
+
+    safety stock  = z * s * sqrt(L)
+    reorder point = d * L + safety stock
+    order         = reorder point + d * R - stock on hand, when stock on hand <= reorder point
+"""
+from collections import namedtuple
+from datetime import timedelta
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from products.models import Product
+
+from .models import MovementType, StockMovement, StockLevel, ReorderPolicy, ReorderSuggestion
+
+DEFAULT_HISTORY_DAYS = 90
+DEFAULT_LEAD_TIME_DAYS = 7
+DEFAULT_REVIEW_PERIOD_DAYS = 7
+DEFAULT_SERVICE_FACTOR = 1.65
+
+WRITE_BATCH_SIZE = 1000
+
+ReorderResult = namedtuple("ReorderResult", ["products", "suggestions", "created", "updated", "removed"])
+
+
+def compute_reorder(product_ids, usage_product_ids, usage_quantities, days, on_hand, lead_time, review_period, service_factor):
+    """Compute the reorder statistics of every product at once.
+
+    `product_ids` is a sorted array of all product ids; `on_hand`, `lead_time`,
+    `review_period` and `service_factor` are arrays aligned with it. `usage_product_ids`
+    and `usage_quantities` hold one entry per product and day with usage; days without
+    usage count as zero. Returns a dict of arrays aligned with `product_ids`.
+    """
+    positions = np.searchsorted(product_ids, usage_product_ids)
+    quantities = np.asarray(usage_quantities, dtype=np.float64)
+    total = np.bincount(positions, weights=quantities, minlength=len(product_ids))
+    squares = np.bincount(positions, weights=quantities * quantities, minlength=len(product_ids))
+
+    average = total / days
+    deviation = np.sqrt(np.maximum(squares / days - average * average, 0.0))
+    safety_stock = service_factor * deviation * np.sqrt(lead_time)
+    reorder_point = average * lead_time + safety_stock
+    target = reorder_point + average * review_period
+
+    needs_order = (average > 0) & (on_hand <= reorder_point)
+    quantity = np.where(needs_order, np.ceil(np.maximum(target - on_hand, 0.0)), 0.0).astype(np.int64)
+    return {
+        "average_daily_usage": average,
+        "safety_stock": safety_stock,
+        "reorder_point": reorder_point,
+        "quantity": quantity,
+    }
+
+
+def load_usage(start, end):
+    """Return (product_ids, quantities) arrays of the quantity dispensed per product and day."""
+    rows = (
+        StockMovement.objects
+        .filter(movement_type=MovementType.DISPENSE, date_created__gte=start, date_created__lt=end)
+        .annotate(day=TruncDate("date_created"))
+        .order_by()
+        .values("product_id", "day")
+        .annotate(used=Sum("quantity"))
+        .values_list("product_id", "used")
+    )
+    usage = np.fromiter(rows.iterator(chunk_size=10000), dtype=[("product_id", np.int64), ("used", np.float64)])
+    # Dispensed quantities are stored as negative movements
+    return usage["product_id"], -usage["used"]
+
+
+def _aligned(product_ids, rows, default, dtype):
+    """Spread (product_id, value) rows onto an array aligned with the sorted product ids."""
+    values = np.full(len(product_ids), default, dtype=dtype)
+    if rows:
+        keys, found = zip(*rows)
+        values[np.searchsorted(product_ids, keys)] = found
+    return values
+
+
+def _chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def run_reorder(history_days=DEFAULT_HISTORY_DAYS, now=None):
+    """Recompute the reorder suggestion of every product and return a ReorderResult."""
+    now = now or timezone.now()
+    product_ids = np.fromiter(Product.objects.order_by("id").values_list("id", flat=True).iterator(chunk_size=10000), dtype=np.int64)
+
+    policies = list(ReorderPolicy.objects.values_list("product_id", "supplier_id", "lead_time_days", "review_period_days", "service_factor"))
+    lead_time = _aligned(product_ids, [(row[0], row[2]) for row in policies], DEFAULT_LEAD_TIME_DAYS, np.float64)
+    review_period = _aligned(product_ids, [(row[0], row[3]) for row in policies], DEFAULT_REVIEW_PERIOD_DAYS, np.float64)
+    service_factor = _aligned(product_ids, [(row[0], row[4]) for row in policies], DEFAULT_SERVICE_FACTOR, np.float64)
+    suppliers = {row[0]: row[1] for row in policies}
+    on_hand = _aligned(product_ids, list(StockLevel.objects.values_list("product_id", "quantity")), 0, np.int64)
+
+    usage_product_ids, usage_quantities = load_usage(now - timedelta(days=history_days), now)
+    stats = compute_reorder(product_ids, usage_product_ids, usage_quantities, history_days, on_hand, lead_time, review_period, service_factor)
+
+    suggestions = [
+        ReorderSuggestion(
+            product_id=int(product_ids[i]),
+            supplier_id=suppliers.get(int(product_ids[i])),
+            average_daily_usage=float(stats["average_daily_usage"][i]),
+            safety_stock=float(stats["safety_stock"][i]),
+            reorder_point=float(stats["reorder_point"][i]),
+            stock_on_hand=int(on_hand[i]),
+            quantity=int(stats["quantity"][i]),
+            # bulk_update doesn't fill auto_now fields
+            date_updated=now,
+        )
+        for i in np.flatnonzero(stats["quantity"] > 0)
+    ]
+    return ReorderResult(len(product_ids), len(suggestions), *save_suggestions(suggestions))
+
+
+def save_suggestions(suggestions):
+    """Replace the stored suggestions; returns the (created, updated, removed) counts."""
+    with transaction.atomic():
+        existing = set(ReorderSuggestion.objects.values_list("product_id", flat=True))
+        to_update = [suggestion for suggestion in suggestions if suggestion.product_id in existing]
+        to_create = [suggestion for suggestion in suggestions if suggestion.product_id not in existing]
+        stale = list(existing - {suggestion.product_id for suggestion in suggestions})
+
+        for chunk in _chunks(stale, WRITE_BATCH_SIZE):
+            ReorderSuggestion.objects.filter(product_id__in=chunk).delete()
+        ReorderSuggestion.objects.bulk_update(
+            to_update,
+            ["supplier", "average_daily_usage", "safety_stock", "reorder_point", "stock_on_hand", "quantity", "date_updated"],
+            batch_size=WRITE_BATCH_SIZE,
+        )
+        ReorderSuggestion.objects.bulk_create(to_create, batch_size=WRITE_BATCH_SIZE)
+    return len(to_create), len(to_update), len(stale)
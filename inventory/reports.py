@@ -0,0 +1,19 @@
+"""Stock reports."""
+from datetime import timedelta
+
+from django.utils import timezone
+
+from .models import StockLot
+
+
+def expiring_within(days, today=None, include_expired=False):
+    """Lots with stock left that expire within the given number of days, soonest first.
+
+    Served by the partial stocklot_expiry_idx index, which only holds lots with stock left,
+    so the cost depends on the number of lots reported rather than on the number of lots kept.
+    """
+    today = today or timezone.localdate()
+    lots = StockLot.objects.filter(quantity__gt=0, expiry_date__lte=today + timedelta(days=days))
+    if not include_expired:
+        lots = lots.filter(expiry_date__gte=today)
+    return lots.select_related("product").order_by("expiry_date", "id")
@@ -0,0 +1,175 @@
+"""Stock ledger operations.
+
+Every change in stock is written as a StockMovement and applied to the product's
+StockLevel in the same transaction, with an F() expression so concurrent movements
+can't overwrite each other. Reading the stock on hand is then a single primary key
+lookup instead of a SUM over the ledger.
+"""
+from collections import namedtuple
+
+from django.db import transaction
+from django.db.models import F, Sum
+
+from products.models import Product, ProductCategory
+
+from .models import MovementType, StockMovement, StockLevel, StockLot
+
+# `lots` is the total of the product's lots, or None for a product kept without lots
+Drift = namedtuple("Drift", ["product_id", "recorded", "ledger", "lots"])
+
+
+class StockError(ValueError):
+    """Raised for a stock movement that doesn't make sense, such as receiving zero units."""
+
+
+class InsufficientStock(StockError):
+    """Raised when the stock of a product, or of one of its lots, doesn't hold the requested quantity."""
+
+
+def apply_to_stock_level(product_id, quantity):
+    """Add a signed quantity to the stock on hand; call it inside the transaction that writes the movement."""
+    updated = StockLevel.objects.filter(product_id=product_id).update(quantity=F("quantity") + quantity)
+    if not updated:
+        # First movement of the product; another transaction may create the row at the same time
+        StockLevel.objects.get_or_create(product_id=product_id)
+        StockLevel.objects.filter(product_id=product_id).update(quantity=F("quantity") + quantity)
+
+
+def take_from_stock_level(product_id, quantity):
+    """Take a positive quantity off the stock on hand, only if it holds that much; raises InsufficientStock.
+
+    The condition is part of the UPDATE, so concurrent movements can't take the stock
+    below zero between a check and the write.
+    """
+    taken = StockLevel.objects.filter(product_id=product_id, quantity__gte=quantity).update(quantity=F("quantity") - quantity)
+    if not taken:
+        raise InsufficientStock(f"Not enough stock of product {product_id} for {quantity} units.")
+
+
+def apply_to_lot(product_id, lot_number, quantity, expiry_date=None, create=False):
+    """Add a signed quantity to the stock of a lot; only a receipt (`create`) may create the lot.
+
+    Taking stock out of a lot is conditional like take_from_stock_level(): it raises
+    InsufficientStock when the lot holds less, and StockError when there is no such lot.
+    """
+    lots = StockLot.objects.filter(product_id=product_id, lot_number=lot_number)
+    if quantity < 0:
+        lots = lots.filter(quantity__gte=-quantity)
+    if lots.update(quantity=F("quantity") + quantity):
+        return
+    if not create:
+        if StockLot.objects.filter(product_id=product_id, lot_number=lot_number).exists():
+            raise InsufficientStock(f"Lot {lot_number} holds fewer than {-quantity} units.")
+        raise StockError(f"Product {product_id} has no lot {lot_number}.")
+    StockLot.objects.get_or_create(product_id=product_id, lot_number=lot_number, defaults={"expiry_date": expiry_date})
+    StockLot.objects.filter(product_id=product_id, lot_number=lot_number).update(quantity=F("quantity") + quantity)
+
+
+def record_movement(product, quantity, movement_type, lot_number="", reference="", expiry_date=None):
+    """Write a signed movement to the ledger and apply it to the stock on hand and to its lot.
+
+    Movements taking stock out raise InsufficientStock rather than take the stock on hand or
+    the lot below zero.
+    """
+    if quantity == 0:
+        raise StockError("A stock movement needs a non-zero quantity.")
+    product_id = getattr(product, "pk", product)
+
+    with transaction.atomic():
+        movement = StockMovement.objects.create(
+            product_id=product_id,
+            movement_type=movement_type,
+            quantity=quantity,
+            lot_number=lot_number,
+            reference=reference,
+        )
+        if quantity < 0:
+            take_from_stock_level(product_id, -quantity)
+        else:
+            apply_to_stock_level(product_id, quantity)
+        if lot_number:
+            apply_to_lot(product_id, lot_number, quantity, expiry_date, create=movement_type == MovementType.RECEIPT)
+    return movement
+
+
+def receive(product, quantity, lot_number="", reference="", expiry_date=None):
+    """Record stock coming in, e.g. a delivery from a supplier.
+
+    Medicines have to be received into a lot with an expiry date, so they can be
+    dispensed first-expired-first-out.
+    """
+    if quantity <= 0:
+        raise StockError("Received quantity must be positive.")
+    if not isinstance(product, Product):
+        product = Product.objects.only("category").get(pk=product)
+    if product.category == ProductCategory.MEDICINE and not (lot_number and expiry_date):
+        raise StockError("Medicines must be received with a lot number and an expiry date.")
+    return record_movement(product, quantity, MovementType.RECEIPT, lot_number, reference, expiry_date)
+
+
+def require_lot(product, lot_number):
+    """Raise StockError for a movement of a medicine that doesn't name its lot.
+
+    Medicines are kept in lots; moving their stock level alone would leave stock in the
+    lots that allocate_fefo() would hand out again.
+    """
+    if lot_number:
+        return
+    category = product.category if isinstance(product, Product) else Product.objects.filter(pk=product).values_list("category", flat=True).first()
+    if category == ProductCategory.MEDICINE:
+        raise StockError("Medicines are taken out of stock by lot; give a lot number, or use allocation.dispense_fefo().")
+
+
+def dispense(product, quantity, lot_number="", reference=""):
+    """Record stock going out for a sale; medicines need the lot it comes from."""
+    if quantity <= 0:
+        raise StockError("Dispensed quantity must be positive.")
+    require_lot(product, lot_number)
+    return record_movement(product, -quantity, MovementType.DISPENSE, lot_number, reference)
+
+
+def adjust(product, quantity, lot_number="", reference=""):
+    """Record a correction found at a stock count; the quantity is signed, and medicines need their lot."""
+    require_lot(product, lot_number)
+    return record_movement(product, quantity, MovementType.ADJUSTMENT, lot_number, reference)
+
+
+def stock_on_hand(product):
+    """Return the current quantity of a product; products without movements have none."""
+    product_id = getattr(product, "pk", product)
+    quantity = StockLevel.objects.filter(product_id=product_id).values_list("quantity", flat=True).first()
+    return quantity or 0
+
+
+def find_drift():
+    """Compare every stock level with the sum of its ledger and with the total of its lots.
+
+    Returns a list of Drift for the products where either doesn't match.
+    """
+    ledger = dict(
+        StockMovement.objects.order_by().values("product_id").annotate(total=Sum("quantity")).values_list("product_id", "total")
+    )
+    recorded = dict(StockLevel.objects.values_list("product_id", "quantity"))
+    lots = dict(
+        StockLot.objects.order_by().values("product_id").annotate(total=Sum("quantity")).values_list("product_id", "total")
+    )
+
+    drift = []
+    for product_id in sorted(ledger.keys() | recorded.keys() | lots.keys()):
+        expected = ledger.get(product_id, 0)
+        actual = recorded.get(product_id, 0)
+        in_lots = lots.get(product_id)
+        if expected != actual or (in_lots is not None and in_lots != actual):
+            drift.append(Drift(product_id, actual, expected, in_lots))
+    return drift
+
+
+def fix_drift(drift):
+    """Overwrite the drifted stock levels with the totals of their ledger.
+
+    Lots are left alone: the ledger doesn't say which lot a difference belongs to, so
+    they are corrected with lot adjustments after a stock count.
+    """
+    with transaction.atomic():
+        for item in drift:
+            StockLevel.objects.update_or_create(product_id=item.product_id, defaults={"quantity": item.ledger})
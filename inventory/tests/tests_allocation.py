@@ -0,0 +1,99 @@
+from datetime import date, timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from products.models import Product
+from products.queryplans import find_table_scans
+
+from .. import services
+from ..allocation import InsufficientStock, allocate_fefo, allocation_lots, dispense_fefo
+from ..models import StockLot
+from ..reports import expiring_within
+
+TODAY = date(2026, 1, 1)
+
+
+class FefoAllocationTestCase(TestCase):
+    """Test cases for first-expired-first-out allocation across lots."""
+
+    def setUp(self):
+        self.product = Product.objects.create(brand="Unilab", name="Biogesic")
+        self.receive("LATE", 50, TODAY + timedelta(days=300))
+        self.receive("SOON", 10, TODAY + timedelta(days=10))
+        self.receive("MIDDLE", 20, TODAY + timedelta(days=100))
+        self.receive("EXPIRED", 99, TODAY - timedelta(days=1))
+
+    # Boilerplate; helper method to receive a lot of the product
+    def receive(self, lot_number, quantity, expiry_date):
+        services.receive(self.product, quantity, lot_number=lot_number, expiry_date=expiry_date)
+
+    def lot_quantities(self):
+        return dict(StockLot.objects.values_list("lot_number", "quantity"))
+
+    def test_allocates_soonest_expiry_first(self):
+        allocations = allocate_fefo(self.product, 25, today=TODAY)
+
+        self.assertEqual([(a.lot_number, a.quantity) for a in allocations], [("SOON", 10), ("MIDDLE", 15)])
+
+    def test_allocation_returns_only_the_lots_needed(self):
+        allocations = allocate_fefo(self.product, 10, today=TODAY)
+
+        self.assertEqual([(a.lot_number, a.quantity) for a in allocations], [("SOON", 10)])
+
+    def test_allocation_is_one_query(self):
+        with self.assertNumQueries(1):
+            allocate_fefo(self.product, 75, today=TODAY)
+
+    def test_expired_lots_are_never_allocated(self):
+        with self.assertRaises(InsufficientStock):
+            allocate_fefo(self.product, 81, today=TODAY)
+
+    def test_dispense_decrements_lots_and_stock_level(self):
+        dispense_fefo(self.product, 35, reference="Sale 1", today=TODAY)
+
+        self.assertEqual(self.lot_quantities(), {"LATE": 45, "SOON": 0, "MIDDLE": 0, "EXPIRED": 99})
+        self.assertEqual(services.stock_on_hand(self.product), 179 - 35)
+        self.assertEqual(services.find_drift(), [])
+
+    def test_failed_dispense_changes_nothing(self):
+        with self.assertRaises(InsufficientStock):
+            dispense_fefo(self.product, 500, today=TODAY)
+
+        self.assertEqual(self.lot_quantities()["SOON"], 10)
+        self.assertEqual(services.stock_on_hand(self.product), 179)
+
+    def test_medicine_needs_lot_and_expiry(self):
+        with self.assertRaises(services.StockError):
+            services.receive(self.product, 5, lot_number="NOEXPIRY")
+
+    def test_queries_use_indexes(self):
+        queries = [
+            ("fefo allocation", allocation_lots(self.product.pk, 25, today=TODAY)),
+            ("expiring report", expiring_within(30, today=TODAY)),
+        ]
+
+        self.assertEqual(find_table_scans(queries), [])
+
+
+class ExpiringStockReportTestCase(TestCase):
+    """Test cases for the expiring stock report."""
+
+    def setUp(self):
+        product = Product.objects.create(brand="Unilab", name="Biogesic")
+        for lot_number, days in [("A", -5), ("B", 5), ("C", 20), ("D", 60)]:
+            services.receive(product, 10, lot_number=lot_number, expiry_date=TODAY + timedelta(days=days))
+        StockLot.objects.filter(lot_number="C").update(quantity=0)
+
+    def test_lists_lots_with_stock_expiring_soon(self):
+        self.assertEqual([lot.lot_number for lot in expiring_within(30, today=TODAY)], ["B"])
+        self.assertEqual([lot.lot_number for lot in expiring_within(90, today=TODAY, include_expired=True)], ["A", "B", "D"])
+
+    def test_command(self):
+        out = StringIO()
+        call_command("expiring_stock", days=100000, include_expired=True, stdout=out)
+        lines = out.getvalue().splitlines()
+
+        self.assertEqual(lines[0], "expiry_date,product_id,product,lot_number,quantity")
+        self.assertEqual([line.split(",")[3] for line in lines[1:]], ["A", "B", "D"])
@@ -0,0 +1,38 @@
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from products.models import Product, ProductCategory
+
+from .. import services
+
+
+# Run the queries on the test's own connection, which holds the uncommitted test data
+@override_settings(ASYNC_DATABASE_THREADS=0)
+class StockCheckTestCase(TestCase):
+    """Test cases for the async stock check endpoint."""
+
+    def setUp(self):
+        self.stocked = Product.objects.create(brand="Safeguard", name="Bar Soap", category=ProductCategory.GENERAL_GOODS)
+        self.empty = Product.objects.create(brand="Colgate", name="Toothpaste", category=ProductCategory.GENERAL_GOODS)
+        services.receive(self.stocked, 5)
+
+    async def check(self, pk, **params):
+        return await self.async_client.get(reverse("inventory:api-stock-check", args=[pk]), params)
+
+    async def test_stock_on_hand(self):
+        response = await self.check(self.stocked.pk, quantity=5)
+
+        self.assertEqual(response.json(), {"product": self.stocked.pk, "quantity": 5, "available": True})
+        self.assertFalse((await self.check(self.stocked.pk, quantity=6)).json()["available"])
+
+    def test_stock_check_is_one_query(self):
+        # The sync test client runs the async view too, inside a context that can count queries
+        with self.assertNumQueries(1):
+            self.client.get(reverse("inventory:api-stock-check", args=[self.stocked.pk]))
+
+    async def test_product_without_movements(self):
+        self.assertEqual((await self.check(self.empty.pk)).json()["quantity"], 0)
+
+    async def test_errors(self):
+        self.assertEqual((await self.check(0)).status_code, 404)
+        self.assertEqual((await self.check(self.stocked.pk, quantity="a lot")).status_code, 400)
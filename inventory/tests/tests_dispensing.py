@@ -0,0 +1,214 @@
+import json
+import threading
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Permission
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from products.models import Product, Medicine, MedicineForm, ProductCategory, MedicineType
+from products.tests.tests_async import asgi_request
+
+from .. import services
+from ..allocation import InsufficientStock
+from ..dispensing import Dispenser, PrescriptionRequired, dispense, dispense_sales, make_sale
+from ..models import StockLot, StockMovement
+
+
+# Boilerplate; helper functions to stock a medicine in lots and a general good without
+def create_medicine(name, prescription_type, lots):
+    form, _ = MedicineForm.objects.get_or_create(name="Tablet", defaults={"description": "Solid dose"})
+    product = Product.objects.create(brand="Unilab", name=name)
+    Medicine.objects.create(
+        product=product, generic_name=name.lower(), dosage="500mg", form=form, usage="-", side_effects="-",
+        prescription_type=prescription_type,
+    )
+    for days, quantity in lots:
+        services.receive(product, quantity, lot_number=f"LOT-{days}", expiry_date=timezone.localdate() + timedelta(days=days))
+    return product
+
+
+def create_general_good(name, quantity):
+    product = Product.objects.create(brand="Safeguard", name=name, category=ProductCategory.GENERAL_GOODS)
+    services.receive(product, quantity)
+    return product
+
+
+class DispensingTestCase(TestCase):
+    """Test cases for the prescription rules and conditional stock decrements of sales."""
+
+    def setUp(self):
+        self.otc = create_medicine("Biogesic", MedicineType.OTC, [(300, 10), (30, 5)])
+        self.rx = create_medicine("Amoxicillin", MedicineType.PRESCRIPTION, [(100, 20)])
+        self.soap = create_general_good("Bar Soap", 3)
+
+    def test_medicines_are_taken_from_the_lots_expiring_first(self):
+        dispensed = dispense(self.otc, 7, reference="OR-1")
+
+        self.assertEqual([(a.lot_number, a.quantity) for a in dispensed.allocations], [("LOT-30", 5), ("LOT-300", 2)])
+        self.assertEqual(services.stock_on_hand(self.otc), 8)
+        self.assertEqual(services.find_drift(), [])
+
+    def test_prescription_medicines_need_a_prescription(self):
+        with self.assertRaises(PrescriptionRequired):
+            dispense(self.rx, 1)
+        self.assertEqual(services.stock_on_hand(self.rx), 20)
+
+        dispense(self.rx, 2, prescription="RX-0042")
+
+        movement = StockMovement.objects.filter(product=self.rx, quantity__lt=0).get()
+        self.assertEqual(movement.prescription, "RX-0042")
+
+    def test_general_goods(self):
+        dispense(self.soap, 3)
+
+        self.assertEqual(services.stock_on_hand(self.soap), 0)
+        with self.assertRaises(InsufficientStock):
+            dispense(self.soap, 1)
+        self.assertEqual(services.stock_on_hand(self.soap), 0)
+
+    def test_each_sale_of_a_batch_fails_on_its_own(self):
+        sales = [make_sale(self.otc, 5), make_sale(self.soap, 4), make_sale(self.rx, 1), make_sale(0, 1), make_sale(self.soap, 3)]
+
+        outcomes = dispense_sales(sales)
+
+        self.assertEqual(outcomes[0].quantity, 5)
+        self.assertIsInstance(outcomes[1], InsufficientStock)
+        self.assertIsInstance(outcomes[2], PrescriptionRequired)
+        self.assertIsInstance(outcomes[3], Product.DoesNotExist)
+        self.assertEqual(outcomes[4].quantity, 3)
+        self.assertEqual(services.stock_on_hand(self.soap), 0)
+        self.assertEqual(services.find_drift(), [])
+
+    def test_lots_short_of_the_stock_level_roll_the_sale_back(self):
+        # Stock level and lots disagree, e.g. a lot adjusted by hand
+        StockLot.objects.filter(product=self.otc).update(quantity=1)
+
+        with self.assertRaises(InsufficientStock):
+            dispense(self.otc, 5)
+
+        self.assertEqual(services.stock_on_hand(self.otc), 15)
+
+    def test_invalid_sales(self):
+        for product, quantity in ((self.soap, 0), (self.soap, 1.5), ("1", 1), (self.soap, True)):
+            with self.assertRaises(services.StockError):
+                make_sale(product, quantity)
+
+
+# Run the queries on the test's own connection, which holds the uncommitted test data
+@override_settings(ASYNC_DATABASE_THREADS=0)
+class DispenseApiTestCase(TestCase):
+    """Test cases for the dispensing endpoint."""
+
+    def setUp(self):
+        self.soap = create_general_good("Bar Soap", 3)
+        self.user = get_user_model().objects.create_user("pharmacist")
+        self.user.user_permissions.add(Permission.objects.get(codename="add_stockmovement"))
+        self.client.force_login(self.user)
+
+    def post(self, body):
+        return self.client.post(reverse("inventory:api-dispense"), json.dumps(body), content_type="application/json")
+
+    def test_dispense(self):
+        response = self.post({"product": self.soap.pk, "quantity": 2, "reference": "OR-1"})
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json(), {"product": self.soap.pk, "quantity": 2, "lots": []})
+        self.assertEqual(self.post({"product": self.soap.pk, "quantity": 2}).status_code, 409)
+
+    def test_errors(self):
+        self.assertEqual(self.post({"product": 0, "quantity": 1}).status_code, 404)
+        self.assertEqual(self.post({"product": self.soap.pk, "quantity": -1}).status_code, 400)
+        self.assertEqual(self.post({"quantity": 1}).status_code, 400)
+
+        self.client.logout()
+        self.assertEqual(self.post({"product": self.soap.pk, "quantity": 1}).status_code, 403)
+
+
+class DispenseAsgiTestCase(TransactionTestCase):
+    """Test cases for the dispensing endpoint served by the ASGI application, under the full middleware stack."""
+
+    def setUp(self):
+        self.soap = create_general_good("Bar Soap", 3)
+        self.user = get_user_model().objects.create_user("pharmacist")
+        self.user.user_permissions.add(Permission.objects.get(codename="add_stockmovement"))
+
+    async def post(self, body, cookies=""):
+        # Any 32 character secret passes as a CSRF token when the cookie holds the same one
+        token = "x" * 32
+        headers = [
+            (b"content-type", b"application/json"),
+            (b"cookie", f"csrftoken={token}; {cookies}".encode()),
+            (b"x-csrftoken", token.encode()),
+        ]
+        status, _, content = await asgi_request(reverse("inventory:api-dispense"), "POST", json.dumps(body).encode(), headers)
+        return status, json.loads(content)
+
+    async def test_dispense(self):
+        await sync_to_async(self.client.force_login)(self.user)
+
+        status, content = await self.post({"product": self.soap.pk, "quantity": 2}, f"sessionid={self.client.cookies['sessionid'].value}")
+
+        self.assertEqual(status, 201)
+        self.assertEqual(content["quantity"], 2)
+        self.assertEqual(await sync_to_async(services.stock_on_hand)(self.soap), 1)
+
+    async def test_anonymous_sales_are_refused(self):
+        status, _ = await self.post({"product": self.soap.pk, "quantity": 1})
+
+        self.assertEqual(status, 403)
+
+
+@override_settings(DISPENSE_GROUP_COMMIT=True)
+class GroupCommitStressTestCase(TransactionTestCase):
+    """Test cases for many terminals selling the same stock at once through the group commit."""
+
+    THREADS = 16
+    SALES_PER_THREAD = 10
+
+    def setUp(self):
+        self.dispenser = Dispenser(batch_window=0.005)
+
+    def tearDown(self):
+        self.dispenser.close()
+
+    def test_stock_never_goes_negative(self):
+        medicine = create_medicine("Biogesic", MedicineType.OTC, [(30, 20), (300, 25)])
+        soap = create_general_good("Bar Soap", 40)
+        # More units asked for than there are in stock, from every thread at once
+        sales = [make_sale(medicine, 1), make_sale(soap, 1), make_sale(medicine, 2)]
+        start = threading.Barrier(self.THREADS)
+        sold, refused, errors = [], [], []
+
+        def terminal():
+            start.wait()
+            for number in range(self.SALES_PER_THREAD):
+                sale = sales[number % len(sales)]
+                try:
+                    sold.append(self.dispenser.dispense(sale))
+                except InsufficientStock:
+                    refused.append(sale)
+                except Exception as exc:
+                    errors.append(exc)
+
+        threads = [threading.Thread(target=terminal) for _ in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(len(sold) + len(refused), self.THREADS * self.SALES_PER_THREAD)
+        self.assertGreater(len(refused), 0)
+        for product, received in ((medicine, 45), (soap, 40)):
+            stock = services.stock_on_hand(product)
+            self.assertGreaterEqual(stock, 0)
+            self.assertEqual(stock, received - sum(d.quantity for d in sold if d.product_id == product.pk))
+        self.assertFalse(StockLot.objects.filter(quantity__lt=0).exists())
+        self.assertEqual(services.find_drift(), [])
+        # Sales that arrived together were committed together
+        self.assertLess(self.dispenser.batches_committed, self.dispenser.sales_committed)
@@ -0,0 +1,134 @@
+from datetime import date
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db.models import ProtectedError
+from django.test import TestCase
+
+from products.models import Product, ProductCategory
+
+from .. import services
+from ..models import MovementType, StockLot, StockMovement, StockLevel
+
+
+class StockLedgerTestCase(TestCase):
+    """Test cases for the stock ledger and the stock on hand it maintains."""
+
+    def setUp(self):
+        self.product = Product.objects.create(brand="Safeguard", name="Bar Soap", category=ProductCategory.GENERAL_GOODS)
+
+    def test_movements_update_stock_on_hand(self):
+        services.receive(self.product, 100, lot_number="L1")
+        services.dispense(self.product, 30, lot_number="L1")
+        services.adjust(self.product, -2, reference="Stock count")
+
+        self.assertEqual(services.stock_on_hand(self.product), 68)
+        self.assertEqual(
+            list(StockMovement.objects.order_by("id").values_list("movement_type", "quantity")),
+            [(MovementType.RECEIPT, 100), (MovementType.DISPENSE, -30), (MovementType.ADJUSTMENT, -2)],
+        )
+
+    def test_stock_on_hand_is_one_query(self):
+        services.receive(self.product, 5)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(services.stock_on_hand(self.product.pk), 5)
+
+    def test_product_without_movements_has_no_stock(self):
+        self.assertEqual(services.stock_on_hand(self.product), 0)
+
+    def test_invalid_quantities(self):
+        with self.assertRaises(services.StockError):
+            services.receive(self.product, 0)
+        with self.assertRaises(services.StockError):
+            services.dispense(self.product, -1)
+        with self.assertRaises(services.StockError):
+            services.adjust(self.product, 0)
+        self.assertFalse(StockMovement.objects.exists())
+
+    def test_stock_is_never_taken_below_zero(self):
+        services.receive(self.product, 10, lot_number="L1")
+
+        with self.assertRaises(services.InsufficientStock):
+            services.dispense(self.product, 11)
+        with self.assertRaises(services.InsufficientStock):
+            services.adjust(self.product, -11)
+
+        self.assertEqual(services.stock_on_hand(self.product), 10)
+        self.assertEqual(StockMovement.objects.count(), 1)
+
+    def test_only_receipts_create_lots(self):
+        services.receive(self.product, 10, lot_number="L1")
+
+        with self.assertRaises(services.StockError):
+            services.dispense(self.product, 1, lot_number="L2")
+        with self.assertRaises(services.InsufficientStock):
+            services.dispense(self.product, 5, lot_number="L1")
+            services.dispense(self.product, 6, lot_number="L1")
+
+        self.assertEqual(list(StockLot.objects.values_list("lot_number", "quantity")), [("L1", 5)])
+        self.assertEqual(services.stock_on_hand(self.product), 5)
+
+    def test_medicines_are_taken_out_by_lot(self):
+        medicine = Product.objects.create(brand="Unilab", name="Biogesic", category=ProductCategory.MEDICINE)
+        services.receive(medicine, 10, lot_number="A", expiry_date=date(2030, 1, 1))
+
+        with self.assertRaises(services.StockError):
+            services.dispense(medicine, 10)
+        with self.assertRaises(services.StockError):
+            services.adjust(medicine.pk, -1)
+        services.dispense(medicine, 4, lot_number="A")
+
+        self.assertEqual(services.stock_on_hand(medicine), 6)
+        self.assertEqual(StockLot.objects.get(product=medicine).quantity, 6)
+        self.assertEqual(services.find_drift(), [])
+
+    def test_product_with_ledger_cannot_be_deleted(self):
+        services.receive(self.product, 1)
+
+        with self.assertRaises(ProtectedError):
+            self.product.delete()
+
+
+class ReconcileStockTestCase(TestCase):
+    """Test cases for finding and fixing drift between the stock levels and the ledger."""
+
+    def setUp(self):
+        self.first = Product.objects.create(brand="Safeguard", name="Bar Soap", category=ProductCategory.GENERAL_GOODS)
+        self.second = Product.objects.create(brand="Colgate", name="Toothpaste", category=ProductCategory.GENERAL_GOODS)
+        services.receive(self.first, 10)
+        services.receive(self.second, 20)
+        services.dispense(self.second, 5)
+
+    def test_no_drift(self):
+        out = StringIO()
+        call_command("reconcile_stock", stdout=out)
+
+        self.assertEqual(services.find_drift(), [])
+        self.assertIn("match the ledger", out.getvalue())
+
+    def test_reports_and_fixes_drift(self):
+        StockLevel.objects.filter(product=self.second).update(quantity=99)
+        StockLevel.objects.filter(product=self.first).delete()
+
+        self.assertEqual(services.find_drift(), [(self.first.pk, 0, 10, None), (self.second.pk, 99, 15, None)])
+        with self.assertRaises(CommandError):
+            call_command("reconcile_stock", stdout=StringIO())
+
+        call_command("reconcile_stock", fix=True, stdout=StringIO())
+
+        self.assertEqual(services.find_drift(), [])
+        self.assertEqual(services.stock_on_hand(self.first), 10)
+
+    def test_reports_lots_out_of_step_with_the_stock_level(self):
+        services.receive(self.first, 5, lot_number="L1")
+        StockLot.objects.filter(product=self.first).update(quantity=8)
+
+        self.assertEqual(services.find_drift(), [(self.first.pk, 15, 15, 8)])
+        out = StringIO()
+        with self.assertRaises(CommandError):
+            call_command("reconcile_stock", fix=True, stdout=out)
+
+        self.assertIn("lots 8", out.getvalue())
+        self.assertEqual(services.stock_on_hand(self.first), 15)
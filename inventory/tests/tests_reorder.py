@@ -0,0 +1,104 @@
+from datetime import timedelta
+from io import StringIO
+
+import numpy as np
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from products.models import Product, ProductCategory
+from suppliers.models import Suppliers
+
+from .. import services
+from ..models import StockMovement, ReorderPolicy, ReorderSuggestion
+from ..reorder import compute_reorder, run_reorder
+
+
+class ComputeReorderTestCase(TestCase):
+    """Test cases for the vectorized reorder statistics."""
+
+    def test_statistics_match_the_formulas(self):
+        product_ids = np.array([1, 2, 3])
+        # Product 1 uses 4 a day on 5 of 10 days, product 3 never
+        usage_products = np.array([1, 1, 1, 1, 1, 2])
+        usage_quantities = np.array([4, 4, 4, 4, 4, 10])
+        ones = np.ones(3)
+
+        stats = compute_reorder(product_ids, usage_products, usage_quantities, 10, np.array([0, 100, 0]), 4 * ones, 2 * ones, ones)
+
+        self.assertAlmostEqual(stats["average_daily_usage"][0], 2.0)
+        # Daily usage of product 1 is [4, 4, 4, 4, 4, 0, 0, 0, 0, 0]: standard deviation 2, times sqrt(4)
+        self.assertAlmostEqual(stats["safety_stock"][0], 4.0)
+        self.assertAlmostEqual(stats["reorder_point"][0], 12.0)
+        self.assertEqual(list(stats["quantity"]), [16, 0, 0])
+
+
+class RunReorderTestCase(TestCase):
+    """Test cases for the catalog-wide reorder run."""
+
+    def setUp(self):
+        self.supplier = Suppliers.objects.create(
+            name="Zuellig", address="-", telephone_number="-", mobile_number="-",
+            email_address="orders@example.com", contact_person="-", remarks="-",
+        )
+        self.fast = self.create_product("Fast mover")
+        self.slow = self.create_product("Slow mover")
+        self.idle = self.create_product("Idle")
+        ReorderPolicy.objects.create(product=self.fast, supplier=self.supplier, lead_time_days=2, review_period_days=3)
+
+        services.receive(self.fast, 10)
+        services.receive(self.slow, 1000)
+        now = timezone.now()
+        for days_ago in range(10):
+            when = now - timedelta(days=days_ago, hours=1)
+            self.backdate(services.dispense(self.fast, 1), when)
+            self.backdate(services.dispense(self.slow, 1), when)
+
+    # Boilerplate; helper methods for the usage history
+    def create_product(self, name):
+        return Product.objects.create(brand="Brand", name=name, category=ProductCategory.GENERAL_GOODS)
+
+    def backdate(self, movement, when):
+        StockMovement.objects.filter(pk=movement.pk).update(date_created=when)
+
+    def test_suggests_reorder_for_products_below_reorder_point(self):
+        result = run_reorder(history_days=10)
+
+        self.assertEqual((result.products, result.suggestions, result.created), (3, 1, 1))
+        suggestion = ReorderSuggestion.objects.get()
+        self.assertEqual(suggestion.product, self.fast)
+        self.assertEqual(suggestion.supplier, self.supplier)
+        self.assertAlmostEqual(suggestion.average_daily_usage, 1.0)
+        self.assertEqual(suggestion.stock_on_hand, 0)
+        # Constant usage, so no safety stock: 1 a day for 2 days of lead time plus 3 days of review
+        self.assertEqual(suggestion.quantity, 5)
+
+    def test_rerun_updates_and_clears_suggestions(self):
+        run_reorder(history_days=10)
+        services.receive(self.fast, 100)
+        services.dispense(self.slow, 990)
+
+        result = run_reorder(history_days=10)
+
+        self.assertEqual((result.created, result.updated, result.removed), (1, 0, 1))
+        self.assertEqual(ReorderSuggestion.objects.get().product, self.slow)
+
+    def test_query_count_does_not_depend_on_catalog_size(self):
+        def count_queries():
+            # Products, policies, stock levels, usage, then the savepoint around the writes
+            with self.assertNumQueries(8):
+                run_reorder(history_days=10)
+
+        count_queries()
+        for i in range(20):
+            product = self.create_product(f"Product {i}")
+            services.receive(product, 1)
+            services.dispense(product, 1)
+        ReorderSuggestion.objects.all().delete()
+        count_queries()
+
+    def test_command_groups_by_supplier(self):
+        out = StringIO()
+        call_command("compute_reorder", history_days=10, stdout=out)
+
+        self.assertIn("Zuellig: 1 products, 5 units", out.getvalue())
@@ -0,0 +1,10 @@
+from django.urls import path
+
+from . import views
+
+app_name = "inventory"
+
+urlpatterns = [
+    path("api/stock/<int:pk>/", views.stock_check, name="api-stock-check"),
+    path("api/dispense/", views.dispense, name="api-dispense"),
+]
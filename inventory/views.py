@@ -0,0 +1,70 @@
+import json
+
+from django.http import JsonResponse
+from django.views.decorators.http import require_GET, require_POST
+
+from pharmacy_inventory.db import run_in_database_thread
+from products.models import Product
+
+from .allocation import InsufficientStock
+from .dispensing import PrescriptionRequired, dispenser, make_sale
+from .services import StockError
+
+
+def stock_row(product_id):
+    # One query: the stock level is LEFT JOINed, so products without movements come back too
+    return Product.objects.filter(pk=product_id).values("stock_level__quantity").first()
+
+
+@require_GET
+async def stock_check(request, pk):
+    """Return the stock on hand of a product; ?quantity=N also says whether N units are available."""
+    try:
+        wanted = int(request.GET.get("quantity", 1))
+    except ValueError:
+        return JsonResponse({"detail": "Invalid quantity."}, status=400)
+
+    row = await run_in_database_thread(stock_row, pk)
+    if row is None:
+        return JsonResponse({"detail": "Product not found."}, status=404)
+
+    quantity = row["stock_level__quantity"] or 0
+    return JsonResponse({"product": pk, "quantity": quantity, "available": quantity >= wanted})
+
+
+def serialize_dispensed(dispensed):
+    return {
+        "product": dispensed.product_id,
+        "quantity": dispensed.quantity,
+        "lots": [
+            {"lot_number": allocation.lot_number, "expiry_date": allocation.expiry_date, "quantity": allocation.quantity}
+            for allocation in dispensed.allocations
+        ],
+    }
+
+
+@require_POST
+async def dispense(request):
+    """Dispense a sale: a JSON body with product, quantity, and for prescription medicines a prescription number.
+
+    Concurrent sales are committed together (see inventory.dispensing); each still gets
+    its own answer: 201, or 409 when the stock doesn't hold the quantity.
+    """
+    user = await request.auser()
+    if not await user.ahas_perm("inventory.add_stockmovement"):
+        return JsonResponse({"detail": "You may not dispense stock."}, status=403)
+    try:
+        body = json.loads(request.body)
+        sale = make_sale(body["product"], body["quantity"], str(body.get("prescription", "")), str(body.get("reference", "")))
+    except (ValueError, KeyError, TypeError, StockError) as exc:
+        return JsonResponse({"detail": f"Invalid sale: {exc}"}, status=400)
+
+    try:
+        dispensed = await dispenser.adispense(sale)
+    except Product.DoesNotExist:
+        return JsonResponse({"detail": "Product not found."}, status=404)
+    except InsufficientStock as exc:
+        return JsonResponse({"detail": str(exc)}, status=409)
+    except PrescriptionRequired as exc:
+        return JsonResponse({"detail": str(exc)}, status=400)
+    return JsonResponse(serialize_dispensed(dispensed), status=201)
@@ -3,14 +3,139 @@ ASGI config for pharmacy_inventory project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+The anonymous, read-only JSON views of the POS terminals, listed in API_VIEWS, run
+under a shorter middleware stack: settings.MIDDLEWARE without the session, CSRF, auth,
+message and other synchronous middleware of SYNC_ONLY_MIDDLEWARE. Under ASGI each of
+those costs a round trip to a worker thread on every request, and those views use none
+of them, so their cache hits never leave the event loop. The rest of the stack, the
+query instrumentation, replica pinning, audit actor and security headers, still runs;
+SecurityMiddleware is swapped for an async-native copy of itself, and CommonMiddleware
+for AllowedHostsMiddleware, which keeps its check of the Host header.
+
+Every other request, including the API views that write or need the logged-in user,
+goes through the full stack.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
 
 import os
 
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
 from django.core.asgi import get_asgi_application
+from django.core.exceptions import ImproperlyConfigured
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.exception import convert_exception_to_response
+from django.middleware.security import SecurityMiddleware
+from django.urls import Resolver404, resolve
+from django.utils.module_loading import import_string
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'pharmacy_inventory.settings')
 
-application = get_asgi_application()
+# Views served by APIHandler; only anonymous, read-only views belong here
+API_VIEWS = {
+    'products:api-product-list',
+    'products:api-product-search',
+    'products:api-basket-scan',
+    'products:api-product-scan',
+    'products:api-product-detail',
+    'products:api-changes',
+    'inventory:api-stock-check',
+}
+
+# Middleware of settings.MIDDLEWARE that APIHandler leaves out
+SYNC_ONLY_MIDDLEWARE = {
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+}
+
+
+class AsyncSecurityMiddleware(SecurityMiddleware):
+    """SecurityMiddleware that runs its hooks on the event loop; they don't touch the database."""
+    sync_capable = False
+    async_capable = True
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        markcoroutinefunction(self)
+
+    async def __call__(self, request):
+        response = self.process_request(request)
+        if response is None:
+            response = await self.get_response(request)
+        return self.process_response(request, response)
+
+
+class AllowedHostsMiddleware:
+    """Checks the Host header against ALLOWED_HOSTS, the part of CommonMiddleware the API views need."""
+    sync_capable = False
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        markcoroutinefunction(self)
+
+    async def __call__(self, request):
+        # Raises DisallowedHost, which the handler turns into a 400
+        request.get_host()
+        return await self.get_response(request)
+
+
+# The async-native replacements APIHandler uses for middleware of settings.MIDDLEWARE
+ASYNC_MIDDLEWARE = {
+    'django.middleware.security.SecurityMiddleware': AsyncSecurityMiddleware,
+    'django.middleware.common.CommonMiddleware': AllowedHostsMiddleware,
+}
+
+
+def api_middleware():
+    """Return the middleware classes APIHandler runs, outermost first."""
+    return [
+        ASYNC_MIDDLEWARE.get(path) or import_string(path)
+        for path in settings.MIDDLEWARE
+        if path not in SYNC_ONLY_MIDDLEWARE
+    ]
+
+
+class APIHandler(ASGIHandler):
+    """ASGI handler that runs views under the async-capable middleware of settings.MIDDLEWARE."""
+
+    def load_middleware(self, is_async=False):
+        self._view_middleware = []
+        self._template_response_middleware = []
+        self._exception_middleware = []
+        handler = convert_exception_to_response(self._get_response_async)
+        for middleware in reversed(api_middleware()):
+            if not getattr(middleware, 'async_capable', False) or hasattr(middleware, 'process_view'):
+                raise ImproperlyConfigured(
+                    f"{middleware.__qualname__} can't run in APIHandler; make it async-capable "
+                    f"without a process_view(), or add it to SYNC_ONLY_MIDDLEWARE."
+                )
+            instance = middleware(handler)
+            if not iscoroutinefunction(instance):
+                raise ImproperlyConfigured(f"{middleware.__qualname__} didn't mark itself as a coroutine function.")
+            handler = convert_exception_to_response(instance)
+        self._middleware_chain = handler
+
+
+django_application = get_asgi_application()
+api_application = APIHandler()
+
+
+def is_api_view(path):
+    """Return whether a request path resolves to one of API_VIEWS."""
+    try:
+        match = resolve(path)
+    except Resolver404:
+        return False
+    return match.view_name in API_VIEWS
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'http' and is_api_view(scope['path'].removeprefix(scope.get('root_path', ''))):
+        return await api_application(scope, receive, send)
+    return await django_application(scope, receive, send)
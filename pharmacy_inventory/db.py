@@ -0,0 +1,92 @@
+"""Database connection tuning.
+
+The SQLite pragmas come from the SQLITE_PRAGMAS setting and are applied to every new
+SQLite connection through the connection_created signal (connected in ProductsConfig.ready).
+
+Async views send their database work to a fixed pool of threads (the
+ASYNC_DATABASE_THREADS setting) through run_in_database_thread(). Django's own async
+ORM methods run on a thread of the current request instead, which under ASGI means a
+new thread and a new connection for every request; with the pool, a burst of requests
+queues for a thread without holding one, and each pool thread keeps its connection
+for as long as CONN_MAX_AGE allows.
+
+refresh_replica() copies the primary SQLite database into a replica's file with SQLite's
+online backup API, which is how a second SQLite file stands in for a read replica (see
+pharmacy_inventory.routers).
+
+Setting ASYNC_DATABASE_THREADS to 0 runs the work the way sync_to_async does by default,
+on the request's own thread. Tests that wrap every test in a transaction need that, as
+the pool threads' own connections can't see the uncommitted test data.
+"""
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, close_old_connections, connections
+
+DEFAULT_ASYNC_DATABASE_THREADS = 8
+
+# Thread count -> pool; there is only ever one outside of tests overriding the setting
+_executors = {}
+_executors_lock = threading.Lock()
+
+
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    """Run the configured PRAGMA statements on a freshly opened SQLite connection."""
+    if connection.vendor != "sqlite":
+        return
+    pragmas = getattr(settings, "SQLITE_PRAGMAS", {})
+    if not pragmas:
+        return
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+
+
+def refresh_replica(alias, source=DEFAULT_DB_ALIAS):
+    """Copy the `source` SQLite database into the file of the `alias` database and return its size in pages.
+
+    The copy is written in place, page by page, so connections already open on the replica
+    keep working and see the new copy once it is complete.
+    """
+    primary, replica = connections[source], connections[alias]
+    if primary.vendor != "sqlite" or replica.vendor != "sqlite":
+        raise ValueError("Only SQLite databases can be copied into a replica.")
+    primary.ensure_connection()
+    target = sqlite3.connect(replica.settings_dict["NAME"])
+    try:
+        primary.connection.backup(target)
+        return target.execute("PRAGMA page_count").fetchone()[0]
+    finally:
+        target.close()
+
+
+def database_executor():
+    """Return the thread pool that runs the database work of async views, or None when disabled."""
+    threads = getattr(settings, "ASYNC_DATABASE_THREADS", DEFAULT_ASYNC_DATABASE_THREADS)
+    if not threads:
+        return None
+    with _executors_lock:
+        if threads not in _executors:
+            _executors[threads] = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="database")
+        return _executors[threads]
+
+
+def _in_database_thread(function, args, kwargs):
+    # Pool threads live outside the request cycle, so retire expired or broken connections here
+    close_old_connections()
+    return function(*args, **kwargs)
+
+
+async def run_in_database_thread(function, *args, **kwargs):
+    """Await a synchronous function that queries the database on one of the database threads.
+
+        product = await run_in_database_thread(Product.objects.filter(pk=pk).first)
+    """
+    executor = database_executor()
+    if executor is None:
+        return await sync_to_async(function)(*args, **kwargs)
+    run = sync_to_async(_in_database_thread, thread_sensitive=False, executor=executor)
+    return await run(function, args, kwargs)
@@ -0,0 +1,179 @@
+"""Per-request SQL instrumentation.
+
+QueryInstrumentationMiddleware records, for a sampled share of the requests
+(QUERY_INSTRUMENTATION_SAMPLE_RATE), how many queries the request ran, how long they
+took and how often each query shape came back. The numbers go out as a Server-Timing
+header, which the browser's network panel shows, and as one JSON log line on the
+"pharmacy_inventory.queries" logger. A request that runs the same query shape at least
+QUERY_INSTRUMENTATION_REPEAT_THRESHOLD times is logged as a warning: that is the
+signature of an N+1 query, such as a changelist calling GeneralGood.__str__ without
+joining the product in.
+
+Queries are caught by record_query(), an execute wrapper added to every connection
+when it opens (see ProductsConfig.ready). It reads a context variable and returns
+straight away when the current request isn't sampled, so unsampled requests cost one
+lookup per query. The context variable follows the request into sync_to_async threads
+and the database threads of the async views.
+
+Queries are counted by their SQL text as Django sends it, with %s placeholders; the
+text is only normalized (literals and IN lists collapsed) once per distinct statement
+when the request ends.
+
+The POS JSON endpoints served by asgi.APIHandler run under a shorter middleware stack,
+which keeps this middleware, so they are instrumented too.
+"""
+import json
+import logging
+import random
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+logger = logging.getLogger("pharmacy_inventory.queries")
+
+DEFAULT_SAMPLE_RATE = 1.0
+DEFAULT_REPEAT_THRESHOLD = 10
+
+# Query shapes listed in a log line, most repeated first
+MAX_LOGGED_SHAPES = 5
+
+_recorder = ContextVar("query_recorder", default=None)
+
+_NORMALIZERS = [
+    (re.compile(r"\bIN \((?:%s, )*%s\)"), "IN (...)"),
+    (re.compile(r"'(?:[^']|'')*'"), "?"),
+    (re.compile(r'"s\d+_x\d+"'), "?"),
+    (re.compile(r"\b\d+(?:\.\d+)?\b"), "?"),
+]
+
+
+def normalize_sql(sql):
+    """Return the shape of a statement: literals and IN lists collapsed, so repeats with other values match."""
+    for pattern, replacement in _NORMALIZERS:
+        sql = pattern.sub(replacement, sql)
+    return sql
+
+
+class QueryRecorder:
+    """Counts and times the queries run while it is the current recorder."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.count = 0
+        self.duration = 0.0
+        self.statements = Counter()
+
+    def record(self, sql, duration):
+        with self._lock:
+            self.count += 1
+            self.duration += duration
+            self.statements[sql] += 1
+
+    def shapes(self):
+        """Return a Counter of normalized query shape -> number of runs."""
+        shapes = Counter()
+        for sql, count in self.statements.items():
+            shapes[normalize_sql(sql)] += count
+        return shapes
+
+    def repeated(self, threshold):
+        """Return the (shape, count) pairs run at least `threshold` times, most repeated first."""
+        return [(shape, count) for shape, count in self.shapes().most_common() if count >= threshold]
+
+
+def record_query(execute, sql, params, many, context):
+    """Execute wrapper that reports the query to the current recorder, if any."""
+    recorder = _recorder.get()
+    if recorder is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        recorder.record(sql, time.perf_counter() - start)
+
+
+def install_query_recorder(sender, connection, **kwargs):
+    """connection_created receiver that adds record_query to the connection's execute wrappers."""
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+@contextmanager
+def record_queries():
+    """Record the queries run inside the block, in this thread and the threads it hands work to.
+
+        with record_queries() as recorder:
+            ...
+        recorder.count, recorder.repeated(10)
+    """
+    recorder = QueryRecorder()
+    token = _recorder.set(recorder)
+    try:
+        yield recorder
+    finally:
+        _recorder.reset(token)
+
+
+class QueryInstrumentationMiddleware:
+    """Adds query count and SQL time to sampled responses and logs repeated query shapes."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = getattr(settings, "QUERY_INSTRUMENTATION_SAMPLE_RATE", DEFAULT_SAMPLE_RATE)
+        self.threshold = getattr(settings, "QUERY_INSTRUMENTATION_REPEAT_THRESHOLD", DEFAULT_REPEAT_THRESHOLD)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def sampled(self):
+        return self.sample_rate >= 1 or random.random() < self.sample_rate
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.sampled():
+            return self.get_response(request)
+        start = time.perf_counter()
+        with record_queries() as recorder:
+            response = self.get_response(request)
+        self.report(request, response, recorder, time.perf_counter() - start)
+        return response
+
+    async def __acall__(self, request):
+        if not self.sampled():
+            return await self.get_response(request)
+        start = time.perf_counter()
+        with record_queries() as recorder:
+            response = await self.get_response(request)
+        self.report(request, response, recorder, time.perf_counter() - start)
+        return response
+
+    def report(self, request, response, recorder, elapsed):
+        repeated = recorder.repeated(self.threshold)
+        sql_ms = recorder.duration * 1000
+        description = f"{recorder.count} queries" + (f", {len(repeated)} repeated" if repeated else "")
+        timings = [f'db;dur={sql_ms:.2f};desc="{description}"', f"total;dur={elapsed * 1000:.2f}"]
+        if response.has_header("Server-Timing"):
+            timings.insert(0, response["Server-Timing"])
+        response["Server-Timing"] = ", ".join(timings)
+
+        payload = {
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            "queries": recorder.count,
+            "sql_ms": round(sql_ms, 3),
+            "total_ms": round(elapsed * 1000, 3),
+            "repeated": [{"sql": shape, "count": count} for shape, count in repeated[:MAX_LOGGED_SHAPES]],
+        }
+        level = logging.WARNING if repeated else logging.INFO
+        if logger.isEnabledFor(level):
+            logger.log(level, json.dumps(payload), extra={"queries": payload})
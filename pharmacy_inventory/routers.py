@@ -0,0 +1,166 @@
+"""Database router that sends catalog reads to read replicas.
+
+Reads of the models in REPLICA_ROUTED_MODELS go to one of the DATABASE_REPLICAS aliases,
+picked at random; every write, and every other model, stays on the primary ('default').
+With no replicas configured the router has no opinion and everything uses the primary.
+
+A replica lags behind the primary, so reads go to the primary instead:
+
+- inside a transaction on the primary, so a transaction reads its own writes;
+- for REPLICA_PIN_SECONDS after a write, so a user sees what they just saved. Writes
+  are spotted by pin_on_write(), an execute wrapper of the primary connection, so
+  raw SQL and queryset.update() count too. ReplicaPinMiddleware carries the window
+  over to the user's next requests in a cookie; outside requests (management
+  commands, tests) it holds for the current thread or task;
+- inside read_from_primary(), which the process-local caches use when they load, as a
+  stale copy loaded from a replica would stay cached until the next write.
+
+In development, a second SQLite file refreshed with `manage.py refresh_replicas` stands
+in for a replica.
+"""
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+DEFAULT_PIN_SECONDS = 5
+
+DEFAULT_ROUTED_MODELS = (
+    "products.product", "products.medicine", "products.generalgood", "products.medicineform",
+    "products.dosageunit", "products.catalogentry", "suppliers.suppliers",
+)
+
+PIN_COOKIE = "primary_until"
+
+# Wall clock time until which reads stay on the primary
+_pinned_until = ContextVar("replica_pinned_until", default=0.0)
+_force_primary = ContextVar("replica_force_primary", default=False)
+
+
+def _replicas():
+    return getattr(settings, "DATABASE_REPLICAS", [])
+
+
+def pin_seconds():
+    return getattr(settings, "REPLICA_PIN_SECONDS", DEFAULT_PIN_SECONDS)
+
+
+def pin_primary(seconds=None):
+    """Send this context's catalog reads to the primary for the next `seconds` seconds."""
+    _pinned_until.set(max(_pinned_until.get(), time.time() + (pin_seconds() if seconds is None else seconds)))
+
+
+def is_pinned():
+    return _pinned_until.get() > time.time()
+
+
+@contextmanager
+def read_from_primary():
+    """Send the catalog reads inside the block to the primary."""
+    token = _force_primary.set(True)
+    try:
+        yield
+    finally:
+        _force_primary.reset(token)
+
+
+WRITE_STATEMENTS = ("INSERT", "UPDATE", "DELETE", "REPLACE")
+
+
+def pin_on_write(execute, sql, params, many, context):
+    """Execute wrapper of the primary that pins reads to it when a statement writes."""
+    if sql.lstrip()[:7].upper().startswith(WRITE_STATEMENTS) and _replicas():
+        pin_primary()
+    return execute(sql, params, many, context)
+
+
+def install_write_detector(sender, connection, **kwargs):
+    """connection_created receiver that adds pin_on_write to the primary's execute wrappers."""
+    if connection.alias == DEFAULT_DB_ALIAS and pin_on_write not in connection.execute_wrappers:
+        connection.execute_wrappers.append(pin_on_write)
+
+
+class ReplicaRouter:
+    """Routes catalog reads to the read replicas when it is safe to read a slightly stale copy."""
+
+    def __init__(self):
+        self.routed = {label.lower() for label in getattr(settings, "REPLICA_ROUTED_MODELS", DEFAULT_ROUTED_MODELS)}
+
+    def db_for_read(self, model, **hints):
+        replicas = _replicas()
+        if not replicas or model._meta.label_lower not in self.routed:
+            return None
+        if _force_primary.get() or is_pinned() or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        # Not a sign of a write on its own: Django also asks for the write database of
+        # transactions that only read, such as the admin's change form
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas are copies of the primary, so objects read from any of them can be related
+        databases = {DEFAULT_DB_ALIAS, *_replicas()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get the schema with the copied data
+        if db in _replicas():
+            return False
+        return None
+
+
+class ReplicaPinMiddleware:
+    """Keeps a user's reads on the primary for REPLICA_PIN_SECONDS after their last write."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        pinned_until = self.read_cookie(request)
+        token = _pinned_until.set(pinned_until)
+        try:
+            response = self.get_response(request)
+            pinned_until_after = _pinned_until.get()
+        finally:
+            _pinned_until.reset(token)
+        return self.write_cookie(response, pinned_until, pinned_until_after)
+
+    async def __acall__(self, request):
+        pinned_until = self.read_cookie(request)
+        token = _pinned_until.set(pinned_until)
+        try:
+            response = await self.get_response(request)
+            pinned_until_after = _pinned_until.get()
+        finally:
+            _pinned_until.reset(token)
+        return self.write_cookie(response, pinned_until, pinned_until_after)
+
+    def read_cookie(self, request):
+        try:
+            return float(request.COOKIES.get(PIN_COOKIE, 0))
+        except ValueError:
+            return 0.0
+
+    def write_cookie(self, response, pinned_until, pinned_until_after):
+        # Only when this request wrote, so read-only requests don't send a cookie
+        if pinned_until_after > pinned_until and pinned_until_after > time.time():
+            response.set_cookie(
+                PIN_COOKIE, f"{pinned_until_after:.3f}", max_age=int(pinned_until_after - time.time()) + 1,
+                httponly=True, samesite="Lax",
+            )
+        return response
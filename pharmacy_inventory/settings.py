@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -34,6 +35,7 @@ INSTALLED_APPS = [
     # Dev generated apps
     'products',
     'suppliers',
+    'inventory',
     
     'django.contrib.admin',
     'django.contrib.auth',
@@ -44,11 +46,17 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # First, so the queries of the other middleware are counted too
+    'pharmacy_inventory.middleware.QueryInstrumentationMiddleware',
+    # Keeps a user's catalog reads on the primary database for a while after a write
+    'pharmacy_inventory.routers.ReplicaPinMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    # Makes the logged-in user the actor of the audit entries a request records
+    'products.audit.AuditActorMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -79,10 +87,156 @@ WSGI_APPLICATION = 'pharmacy_inventory.wsgi.application'
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'NAME': os.environ.get('PHARMACY_SQLITE_PATH', BASE_DIR / 'db.sqlite3'),
     }
 }
 
+# SQLite profile, picked with the PHARMACY_SQLITE_PROFILE environment variable.
+# 'default' keeps Django's stock behaviour; 'performance' is meant for deployments with
+# concurrent admin and POS traffic. The pragmas are applied by pharmacy_inventory.db.
+SQLITE_PROFILE = os.environ.get('PHARMACY_SQLITE_PROFILE', 'default')
+
+SQLITE_PRAGMAS = {}
+
+if SQLITE_PROFILE == 'performance':
+    DATABASES['default'].update({
+        # Keep connections open between requests instead of reconnecting every time
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            # Seconds to wait for a lock before raising "database is locked"
+            'timeout': 20,
+            # Take the write lock when the transaction starts, so two transactions can't
+            # both read and then deadlock trying to upgrade to a write
+            'transaction_mode': 'IMMEDIATE',
+        },
+    })
+    SQLITE_PRAGMAS = {
+        # Readers no longer block the writer and the writer no longer blocks readers
+        'journal_mode': 'WAL',
+        # Safe with WAL: only fsync at checkpoints instead of at every commit
+        'synchronous': 'NORMAL',
+        'busy_timeout': 20000,
+        # 64 MB page cache per connection (negative values are in KiB)
+        'cache_size': -64000,
+        'mmap_size': 268435456,
+        'temp_store': 'MEMORY',
+    }
+elif SQLITE_PROFILE != 'default':
+    raise ValueError(f"Unknown PHARMACY_SQLITE_PROFILE '{SQLITE_PROFILE}'; expected 'default' or 'performance'.")
+
+# Read replicas: catalog reads go to them through pharmacy_inventory.routers.ReplicaRouter.
+# PHARMACY_SQLITE_REPLICAS lists SQLite files, separated by commas, that
+# `manage.py refresh_replicas` fills with copies of the primary; leave it empty to read
+# everything from the primary. Tests read the replicas from the test database.
+REPLICA_PATHS = [path for path in os.environ.get('PHARMACY_SQLITE_REPLICAS', '').split(',') if path]
+
+DATABASE_REPLICAS = []
+
+for index, path in enumerate(REPLICA_PATHS, start=1):
+    DATABASES[f'replica{index}'] = {**DATABASES['default'], 'NAME': path, 'TEST': {'MIRROR': 'default'}}
+    DATABASE_REPLICAS.append(f'replica{index}')
+
+DATABASE_ROUTERS = ['pharmacy_inventory.routers.ReplicaRouter']
+
+# Seconds a user's catalog reads stay on the primary after they write, so they see
+# their own changes before the replicas catch up
+REPLICA_PIN_SECONDS = int(os.environ.get('PHARMACY_REPLICA_PIN_SECONDS', 5))
+
+# Threads (and so connections) that run the database work of async views; requests
+# beyond that wait for a thread. See pharmacy_inventory.db.run_in_database_thread.
+ASYNC_DATABASE_THREADS = int(os.environ.get('PHARMACY_ASYNC_DB_THREADS', 8))
+
+# Audit log of catalog and supplier changes, see products.audit. Entries are queued and
+# written by a background thread, AUDIT_BATCH_SIZE at a time or AUDIT_FLUSH_INTERVAL
+# seconds after the first one was queued. At most AUDIT_QUEUE_SIZE entries wait in
+# memory; past that a save waits up to AUDIT_ENQUEUE_TIMEOUT seconds, then writes its
+# entry itself. PHARMACY_AUDIT_ASYNC=0 writes every entry as its change commits, which
+# is how the tests run (see pharmacy_inventory.testing).
+AUDIT_LOG_ASYNC = os.environ.get('PHARMACY_AUDIT_ASYNC', '1') == '1'
+AUDIT_BATCH_SIZE = int(os.environ.get('PHARMACY_AUDIT_BATCH_SIZE', 500))
+AUDIT_FLUSH_INTERVAL = float(os.environ.get('PHARMACY_AUDIT_FLUSH_INTERVAL', 1.0))
+AUDIT_QUEUE_SIZE = int(os.environ.get('PHARMACY_AUDIT_QUEUE_SIZE', 10000))
+AUDIT_ENQUEUE_TIMEOUT = float(os.environ.get('PHARMACY_AUDIT_ENQUEUE_TIMEOUT', 0.5))
+
+# Group commit of sales, see inventory.dispensing. A writer thread commits the sales
+# queued while it was busy, plus those arriving within DISPENSE_BATCH_WINDOW seconds, up
+# to DISPENSE_BATCH_SIZE per transaction. PHARMACY_DISPENSE_GROUP_COMMIT=0 gives every
+# sale its own transaction, which is how the tests run, like the audit log.
+DISPENSE_GROUP_COMMIT = os.environ.get('PHARMACY_DISPENSE_GROUP_COMMIT', '1') == '1'
+DISPENSE_BATCH_WINDOW = float(os.environ.get('PHARMACY_DISPENSE_BATCH_WINDOW', 0.002))
+DISPENSE_BATCH_SIZE = int(os.environ.get('PHARMACY_DISPENSE_BATCH_SIZE', 100))
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/ref/settings/#caches
+
+# The product detail cache keeps two entries per product; Django's default of 300
+# entries would keep culling the POS hot set.
+#
+# The cache also carries the invalidations between processes: the product detail
+# versions, and the version counters of the lookup tables and the barcode map. The
+# in-memory backend is private to its process, which is only right when a single
+# process serves traffic. Set PHARMACY_SERVING_PROCESSES to the number of processes
+# (workers) and pick a shared backend with PHARMACY_CACHE_BACKEND: 'file' for the
+# processes of one host (a directory, PHARMACY_CACHE_DIR), or 'redis'
+# (PHARMACY_CACHE_URL; needs the redis package). The products.E001 check refuses an
+# in-memory cache when more than one process serves traffic.
+SERVING_PROCESSES = int(os.environ.get('PHARMACY_SERVING_PROCESSES', 1))
+CACHE_BACKEND = os.environ.get('PHARMACY_CACHE_BACKEND', 'locmem')
+CACHE_MAX_ENTRIES = int(os.environ.get('PHARMACY_CACHE_MAX_ENTRIES', 100000))
+
+if CACHE_BACKEND == 'redis':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ.get('PHARMACY_CACHE_URL', 'redis://127.0.0.1:6379/1'),
+        }
+    }
+elif CACHE_BACKEND == 'file':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.environ.get('PHARMACY_CACHE_DIR', str(BASE_DIR / 'cache')),
+            'OPTIONS': {
+                'MAX_ENTRIES': CACHE_MAX_ENTRIES,
+            },
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'OPTIONS': {
+                'MAX_ENTRIES': CACHE_MAX_ENTRIES,
+            },
+        }
+    }
+
+
+# SQL instrumentation, see pharmacy_inventory.middleware. Production sets a low sample
+# rate such as 0.01; a request running one query shape this many times is logged as N+1.
+# Every sampled request is logged at INFO, so the default level only shows the N+1 ones.
+QUERY_INSTRUMENTATION_SAMPLE_RATE = float(os.environ.get('PHARMACY_QUERY_SAMPLE_RATE', 1.0))
+QUERY_INSTRUMENTATION_REPEAT_THRESHOLD = int(os.environ.get('PHARMACY_QUERY_REPEAT_THRESHOLD', 10))
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'pharmacy_inventory.queries': {
+            'handlers': ['console'],
+            'level': os.environ.get('PHARMACY_QUERY_LOG_LEVEL', 'WARNING'),
+            'propagate': False,
+        },
+    },
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -124,3 +278,10 @@ STATIC_URL = 'static/'
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+
+# Testing
+# https://docs.djangoproject.com/en/5.2/ref/settings/#test-runner
+
+# Runs the tests with the background writers off
+TEST_RUNNER = 'pharmacy_inventory.testing.TestRunner'
@@ -0,0 +1,29 @@
+"""Test runner of the project, set as TEST_RUNNER.
+
+The audit log and the group commit of sales write from a background thread, with a
+connection of its own; inside the transaction every TestCase runs in, that connection
+would wait on the test's write lock and never see its rows. The runner turns the background writers off
+for the whole run, the way Django's runner swaps the email backend. Test cases of the
+background writers turn them back on with override_settings.
+"""
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+# Settings every test starts with, whatever the environment says
+TEST_SETTINGS = {
+    "AUDIT_LOG_ASYNC": False,
+    "DISPENSE_GROUP_COMMIT": False,
+}
+
+
+class TestRunner(DiscoverRunner):
+    """DiscoverRunner that runs the tests with TEST_SETTINGS."""
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._test_settings = override_settings(**TEST_SETTINGS)
+        self._test_settings.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self._test_settings.disable()
+        super().teardown_test_environment(**kwargs)
@@ -1,9 +1,160 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Max
+from django.utils.functional import cached_property
 
-from .models import Product, Medicine, GeneralGood, MedicineForm, DosageUnit
+from . import bulk
+from .models import Product, Medicine, GeneralGood, MedicineForm, DosageUnit, Barcode, CatalogEntry, ProductCategory, AuditEntry
 
-admin.site.register(Product)
-admin.site.register(Medicine)
-admin.site.register(GeneralGood)
-admin.site.register(MedicineForm)
-admin.site.register(DosageUnit)
\ No newline at end of file
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator that uses a cheap row estimate instead of COUNT(*) on unfiltered changelists."""
+    # Below this many rows an exact count is cheap enough to just run it
+    exact_count_threshold = 10000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        # Filters and searches narrow the result set, so the estimate would be wrong there
+        if queryset.query.where:
+            return super().count
+
+        estimate = estimate_row_count(queryset.model, queryset.db)
+        if estimate < self.exact_count_threshold:
+            return super().count
+        return estimate
+
+
+def estimate_row_count(model, using="default"):
+    """Return an approximate number of rows of the model's table without scanning it."""
+    connection = connections[using]
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT reltuples FROM pg_class WHERE oid = %s::regclass", [model._meta.db_table])
+            row = cursor.fetchone()
+        if row and row[0] > 0:
+            return int(row[0])
+    # MAX() on the primary key is answered from the index; deleted rows make it a slight overestimate
+    return model._default_manager.using(using).aggregate(highest=Max("pk"))["highest"] or 0
+
+
+class CatalogModelAdmin(admin.ModelAdmin):
+    """Base admin for catalog models; every page should run a fixed number of queries."""
+    paginator = EstimatedCountPaginator
+    # Avoids the second COUNT(*) over the whole table when a filter is applied
+    show_full_result_count = False
+    list_per_page = 50
+
+
+class BarcodeInline(admin.TabularInline):
+    model = Barcode
+    fields = ("code",)
+    extra = 1
+
+
+@admin.register(Product)
+class ProductAdmin(CatalogModelAdmin):
+    list_display = ("name", "brand", "category", "status", "date_created")
+    list_filter = ("category", "status")
+    # '^' turns the search into a prefix match so an index on the column can be used
+    search_fields = ("^name", "^brand", "=id")
+    ordering = ("-date_created", "-id")
+    inlines = (BarcodeInline,)
+    # Each action is a few UPDATE statements per 500 products rather than a save() per product
+    actions = ("publish_products", "unpublish_products", "retire_products", "move_to_medicine", "move_to_general_goods")
+
+    def report(self, request, result, done, skipped_reason=""):
+        self.message_user(request, f"{result.updated} product(s) {done}.", messages.SUCCESS)
+        if result.skipped:
+            self.message_user(request, f"{result.skipped} product(s) skipped: {skipped_reason}.", messages.WARNING)
+
+    @admin.action(description="Publish selected products", permissions=["change"])
+    def publish_products(self, request, queryset):
+        self.report(request, bulk.publish(queryset), "published", "their detail doesn't match their category")
+
+    @admin.action(description="Unpublish selected products", permissions=["change"])
+    def unpublish_products(self, request, queryset):
+        self.report(request, bulk.unpublish(queryset), "moved back to draft")
+
+    @admin.action(description="Retire selected products", permissions=["change"])
+    def retire_products(self, request, queryset):
+        self.report(request, bulk.retire(queryset), "retired")
+
+    @admin.action(description="Move selected products to Medicine", permissions=["change"])
+    def move_to_medicine(self, request, queryset):
+        result = bulk.recategorize(queryset, ProductCategory.MEDICINE)
+        self.report(request, result, "moved to Medicine", "they have general good details")
+
+    @admin.action(description="Move selected products to General Goods", permissions=["change"])
+    def move_to_general_goods(self, request, queryset):
+        result = bulk.recategorize(queryset, ProductCategory.GENERAL_GOODS)
+        self.report(request, result, "moved to General Goods", "they have medicine details")
+
+
+@admin.register(Medicine)
+class MedicineAdmin(CatalogModelAdmin):
+    list_display = ("generic_name", "product", "form", "dosage", "prescription_type")
+    list_filter = ("prescription_type",)
+    list_select_related = ("product", "form")
+    search_fields = ("^generic_name", "^product__name")
+    autocomplete_fields = ("product", "form")
+
+
+@admin.register(GeneralGood)
+class GeneralGoodAdmin(CatalogModelAdmin):
+    list_display = ("__str__", "type", "unit")
+    # GeneralGood.__str__ reads product.name, so the product has to be joined in
+    list_select_related = ("product",)
+    search_fields = ("^product__name", "^type")
+    autocomplete_fields = ("product",)
+
+
+@admin.register(MedicineForm)
+class MedicineFormAdmin(admin.ModelAdmin):
+    list_display = ("name", "date_created")
+    search_fields = ("^name",)
+
+
+@admin.register(DosageUnit)
+class DosageUnitAdmin(admin.ModelAdmin):
+    list_display = ("name", "date_created")
+    search_fields = ("^name",)
+
+
+@admin.register(CatalogEntry)
+class CatalogEntryAdmin(CatalogModelAdmin):
+    """Read-only catalog listing served from the flattened read table, without joins."""
+    list_display = ("name", "brand", "category", "status", "generic_name", "form", "dosage", "unit", "prescription_type")
+    list_filter = ("category", "status", "prescription_type", "form")
+    search_fields = ("^name", "^brand", "^generic_name")
+    ordering = ("-date_created", "-pk")
+
+    def has_add_permission(self, request):
+        # Entries follow the catalog through signals; edit the product instead
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(AuditEntry)
+class AuditEntryAdmin(CatalogModelAdmin):
+    """Read-only listing of the audit log."""
+    list_display = ("date_changed", "action", "model", "object_id", "actor")
+    list_filter = ("action", "model")
+    search_fields = ("^actor",)
+    ordering = ("-date_changed", "-pk")
+
+    def has_add_permission(self, request):
+        # Entries are written by products.audit only
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,273 @@
+"""Read-only JSON API over the product catalog.
+
+Lists are paged by cursor (keyset pagination): the cursor holds the sort value and id of
+the last product of the page, and the next page is fetched with a WHERE on those values
+instead of an OFFSET, so every page costs the same however deep into the catalog it is.
+
+The detail and search views are the hot paths of the POS terminals and are async: under
+ASGI a cache hit is answered on the event loop, and database work queues for one of the
+threads of pharmacy_inventory.db.run_in_database_thread().
+"""
+import base64
+import json
+
+from django.db.models import Q
+from django.http import JsonResponse
+from django.utils.dateparse import parse_datetime
+from django.views.decorators.http import require_GET
+
+from pharmacy_inventory.db import run_in_database_thread
+
+from . import cache as detail_cache, sync
+from .barcodes import barcodes, normalize as normalize_barcode
+from .search import search_ids
+from .lookups import medicine_forms
+from .models import Product, ProductCategory, MedicineType
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# ?ordering= value -> (field, descending)
+ORDERINGS = {
+    "-date_created": ("date_created", True),
+    "date_created": ("date_created", False),
+    "name": ("name", False),
+}
+DEFAULT_ORDERING = "-date_created"
+
+DEFAULT_SEARCH_LIMIT = 20
+MAX_SEARCH_LIMIT = 50
+
+# Most items a single basket scan can hold
+MAX_BASKET_SIZE = 200
+
+
+class BadRequest(Exception):
+    """Raised for query parameters the API can't make sense of."""
+
+
+def serialize_medicine(medicine):
+    form = medicine_forms.get(medicine.form_id)
+    return {
+        "generic_name": medicine.generic_name,
+        "dosage": medicine.dosage,
+        "form": form.name if form is not None else "",
+        "usage": medicine.usage,
+        "side_effects": medicine.side_effects,
+        "prescription_type": medicine.prescription_type,
+    }
+
+
+def serialize_general_good(general_good):
+    return {
+        "type": general_good.type,
+        "unit": general_good.unit,
+        "notes": general_good.notes,
+    }
+
+
+def serialize_product(product):
+    """Return the JSON-ready representation of a product fetched with catalog_queryset()."""
+    medicine = getattr(product, "medicine", None)
+    general_good = getattr(product, "generalgood", None)
+    return {
+        "id": product.pk,
+        "brand": product.brand,
+        "name": product.name,
+        "category": product.category,
+        "status": product.status,
+        "date_created": product.date_created.isoformat(),
+        "date_updated": product.date_updated.isoformat(),
+        "medicine": serialize_medicine(medicine) if medicine else None,
+        "general_good": serialize_general_good(general_good) if general_good else None,
+    }
+
+
+def catalog_queryset():
+    """Products with their details joined in, so serializing them doesn't run further queries.
+
+    The medicine form comes from the process-local lookup cache rather than a join.
+    """
+    return Product.objects.select_related("medicine", "generalgood")
+
+
+def encode_cursor(field, product):
+    value = getattr(product, field)
+    if field == "date_created":
+        value = value.isoformat()
+    payload = json.dumps([value, product.pk]).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+def decode_cursor(field, cursor):
+    """Return the (value, id) pair stored in a cursor; raises BadRequest for a malformed cursor."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        value, pk = json.loads(base64.urlsafe_b64decode(padded))
+        if field == "date_created":
+            value = parse_datetime(value)
+        if value is None or not isinstance(pk, int):
+            raise ValueError
+    except (ValueError, TypeError):
+        raise BadRequest("Invalid cursor.")
+    return value, pk
+
+
+def filter_products(queryset, params):
+    if "category" in params:
+        if params["category"] not in ProductCategory.values:
+            raise BadRequest("Invalid category.")
+        queryset = queryset.filter(category=params["category"])
+    if "status" in params:
+        queryset = queryset.filter(status=params["status"])
+    if "prescription_type" in params:
+        if params["prescription_type"] not in MedicineType.values:
+            raise BadRequest("Invalid prescription_type.")
+        queryset = queryset.filter(medicine__prescription_type=params["prescription_type"])
+    return queryset
+
+
+def get_page_size(params, default=DEFAULT_PAGE_SIZE, maximum=MAX_PAGE_SIZE):
+    try:
+        limit = int(params.get("limit", default))
+    except ValueError:
+        raise BadRequest("Invalid limit.")
+    return max(1, min(limit, maximum))
+
+
+def product_page_queryset(params, field, descending, after=None):
+    """Return the filtered, keyset ordered queryset of products following the (value, id) pair `after`."""
+    queryset = filter_products(catalog_queryset(), params)
+    if after is not None:
+        value, pk = after
+        # Rows strictly after the last one of the previous page, with the id breaking ties.
+        # The separate range on the field lets the database seek into its index.
+        if descending:
+            queryset = queryset.filter(**{f"{field}__lte": value}).filter(Q(**{f"{field}__lt": value}) | Q(pk__lt=pk))
+        else:
+            queryset = queryset.filter(**{f"{field}__gte": value}).filter(Q(**{f"{field}__gt": value}) | Q(pk__gt=pk))
+
+    prefix = "-" if descending else ""
+    return queryset.order_by(f"{prefix}{field}", f"{prefix}pk")
+
+
+def product_page(params):
+    """Return (products, next_cursor) for the list query parameters."""
+    ordering = params.get("ordering", DEFAULT_ORDERING)
+    if ordering not in ORDERINGS:
+        raise BadRequest(f"Invalid ordering; expected one of {', '.join(ORDERINGS)}.")
+    field, descending = ORDERINGS[ordering]
+    limit = get_page_size(params)
+    after = decode_cursor(field, params["cursor"]) if params.get("cursor") else None
+
+    # Fetch one extra row to know whether there is a next page
+    products = list(product_page_queryset(params, field, descending, after)[:limit + 1])
+    next_cursor = encode_cursor(field, products[limit - 1]) if len(products) > limit else None
+    return products[:limit], next_cursor
+
+
+def error_response(message, status=400):
+    return JsonResponse({"detail": message}, status=status)
+
+
+@require_GET
+def product_list(request):
+    """List products a page at a time; follow `next` to get the following page."""
+    try:
+        products, next_cursor = product_page(request.GET)
+    except BadRequest as exc:
+        return error_response(str(exc))
+
+    next_url = None
+    if next_cursor:
+        params = request.GET.copy()
+        params["cursor"] = next_cursor
+        next_url = request.build_absolute_uri(f"{request.path}?{params.urlencode()}")
+    return JsonResponse({"results": [serialize_product(product) for product in products], "next": next_url})
+
+
+@require_GET
+async def product_detail(request, pk):
+    detail = await detail_cache.aget(pk)
+    if detail is None:
+        return error_response("Product not found.", status=404)
+    return JsonResponse(detail)
+
+
+@require_GET
+async def product_search(request):
+    """Full-text search over the catalog, best match first; ?q= is required."""
+    query = request.GET.get("q", "").strip()
+    if not query:
+        return error_response("Missing search query.")
+    try:
+        limit = get_page_size(request.GET, DEFAULT_SEARCH_LIMIT, MAX_SEARCH_LIMIT)
+    except BadRequest as exc:
+        return error_response(str(exc))
+
+    ranked = await run_in_database_thread(search_ids, query, limit)
+    details = await detail_cache.aget_many([product_id for product_id, _ in ranked])
+    # An index entry can briefly outlive its product, so skip ids without a detail
+    return JsonResponse({"results": [details[product_id] for product_id, _ in ranked if product_id in details]})
+
+
+@require_GET
+async def product_scan(request, code):
+    """Return the product carrying a scanned barcode."""
+    key = normalize_barcode(code)
+    if key is None:
+        return error_response("Invalid barcode.")
+
+    # A warm map answers on the event loop; a cold map or a miss goes to the database thread
+    product_id = barcodes.peek(key) if barcodes.is_warm() else None
+    if product_id is None:
+        product_id = await run_in_database_thread(barcodes.lookup, key)
+    detail = await detail_cache.aget(product_id) if product_id is not None else None
+    if detail is None:
+        return error_response("No product carries this barcode.", status=404)
+    return JsonResponse({"barcode": code, "product": detail})
+
+
+@require_GET
+async def basket_scan(request):
+    """Resolve the barcodes of a basket at once: ?codes=<code>,<code>,...
+
+    Every code gets a result in the order scanned, with a null product for unknown codes.
+    """
+    codes = [code.strip() for code in request.GET.get("codes", "").split(",") if code.strip()]
+    if not codes:
+        return error_response("Missing barcodes.")
+    if len(codes) > MAX_BASKET_SIZE:
+        return error_response(f"At most {MAX_BASKET_SIZE} barcodes per basket.")
+
+    # Malformed codes can't resolve anyway, so they don't need the database either
+    keys = {normalize_barcode(code) for code in codes} - {None}
+    if barcodes.is_warm() and all(barcodes.peek(key) is not None for key in keys):
+        product_ids = barcodes.lookup_many(codes)
+    else:
+        product_ids = await run_in_database_thread(barcodes.lookup_many, codes)
+    details = await detail_cache.aget_many(product_ids.values())
+    return JsonResponse({
+        "results": [{"barcode": code, "product": details.get(product_ids.get(code))} for code in codes]
+    })
+
+
+@require_GET
+async def product_changes(request):
+    """Changes feed of the POS terminals: ?cursor= is the `cursor` returned by the previous call.
+
+    Keep calling with the returned cursor while `has_more` is true.
+    """
+    try:
+        cursor = int(request.GET.get("cursor", 0))
+        if cursor < 0:
+            raise ValueError
+    except ValueError:
+        return error_response("Invalid cursor.")
+    try:
+        limit = get_page_size(request.GET, sync.DEFAULT_PAGE_SIZE, sync.MAX_PAGE_SIZE)
+    except BadRequest as exc:
+        return error_response(str(exc))
+
+    changes, next_cursor, has_more = await run_in_database_thread(sync.changes_page, cursor, limit)
+    return JsonResponse({"changes": changes, "cursor": next_cursor, "has_more": has_more})
@@ -4,3 +4,19 @@ from django.apps import AppConfig
 class ProductsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'products'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+
+        from pharmacy_inventory.db import apply_sqlite_pragmas
+        from pharmacy_inventory.middleware import install_query_recorder
+        from pharmacy_inventory.routers import install_write_detector
+
+        # Registers the receivers that keep the search index and caches in sync
+        from . import signals  # noqa: F401
+        # Registers the system checks
+        from . import checks  # noqa: F401
+
+        connection_created.connect(apply_sqlite_pragmas, dispatch_uid="pharmacy_inventory_sqlite_pragmas")
+        connection_created.connect(install_query_recorder, dispatch_uid="pharmacy_inventory_query_recorder")
+        connection_created.connect(install_write_detector, dispatch_uid="pharmacy_inventory_write_detector")
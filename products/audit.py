@@ -0,0 +1,292 @@
+"""Audit trail of the catalog and supplier records: the field-level diff of every save and delete.
+
+Receivers in products.signals and suppliers.signals compare an instance with the values
+it was loaded with (kept on the instance by a post_init receiver) and, once the write
+commits, hand an unsaved AuditEntry to the process-wide audit_log. The log queues entries
+in memory and a background thread writes them with bulk_create, AUDIT_BATCH_SIZE at a
+time or AUDIT_FLUSH_INTERVAL seconds after the first one arrived, whichever comes first,
+so a save pays for a queue put instead of an INSERT of its own. Bulk writers that skip
+the signals (the catalog importer, products.bulk, the supplier upsert) record their
+changes through the same functions.
+
+The queue holds at most AUDIT_QUEUE_SIZE entries. When the writer falls behind, a caller
+waits up to AUDIT_ENQUEUE_TIMEOUT seconds for room and then writes its entry itself:
+writes slow down, but memory stays bounded and no entry is dropped. At interpreter exit
+the log stops the thread and writes whatever is still queued; an entry that can't be
+written even then is logged at ERROR with its content, so none disappear silently.
+
+With AUDIT_LOG_ASYNC off, entries are written in the committing thread, which is what
+tests running each test in a transaction need.
+"""
+import atexit
+import logging
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import date, datetime
+from functools import cache, partial
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections, connections, router, transaction
+from django.utils import timezone
+
+from .models import AuditEntry, AuditAction
+
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_FLUSH_INTERVAL = 1.0
+DEFAULT_QUEUE_SIZE = 10000
+DEFAULT_ENQUEUE_TIMEOUT = 0.5
+
+# Seconds the exit handler waits for the writer thread before writing the rest itself
+SHUTDOWN_TIMEOUT = 10
+
+# Attempts at writing a batch before its entries are logged instead
+WRITE_ATTEMPTS = 5
+
+logger = logging.getLogger(__name__)
+
+# The request being served, whose user is the actor of the changes it makes; or the
+# name given to acting_as()
+_request = ContextVar("audit_request", default=None)
+_actor = ContextVar("audit_actor", default="")
+
+# Sent through the queue to stop the writer thread
+_STOP = object()
+
+
+@cache
+def audited_fields(model):
+    """Return the fields whose changes are recorded: editable ones, so not the primary key, timestamps or derived keys."""
+    return [field for field in model._meta.concrete_fields if field.editable and not field.primary_key]
+
+
+def snapshot(instance):
+    """Return the audited values of an instance, leaving out deferred fields."""
+    values = instance.__dict__
+    return {field.attname: values[field.attname] for field in audited_fields(type(instance)) if field.attname in values}
+
+
+def _jsonable(value):
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    # Decimals, UUIDs and the like keep their exact text
+    return str(value)
+
+
+def _field_names(model):
+    return {field.attname: field.name for field in audited_fields(model)}
+
+
+def current_actor():
+    """Return who is making changes in this context: a job name, a username or ''."""
+    actor = _actor.get()
+    if actor:
+        return actor
+    request = _request.get()
+    user = getattr(request, "user", None)
+    # Only read when a change is recorded, so requests that write nothing don't load the session
+    if user is not None and user.is_authenticated:
+        return user.get_username()
+    return ""
+
+
+@contextmanager
+def acting_as(name):
+    """Record the changes made inside the block as done by `name`, such as "import_catalog"."""
+    token = _actor.set(name)
+    try:
+        yield
+    finally:
+        _actor.reset(token)
+
+
+def _record(model, object_id, action, changes):
+    entry = AuditEntry(
+        model=model._meta.label_lower, object_id=object_id, action=action, changes=changes,
+        actor=current_actor(), date_changed=timezone.now(),
+    )
+    # Only committed changes are recorded; a rolled back save leaves no entry
+    transaction.on_commit(partial(audit_log.add, entry), using=router.db_for_write(model))
+
+
+def record_saved(instance, created):
+    """Record the fields a save changed, compared with the values the instance was loaded with."""
+    names = _field_names(type(instance))
+    after = snapshot(instance)
+    if created:
+        changes = {names[attname]: [None, _jsonable(value)] for attname, value in after.items()}
+    else:
+        before = getattr(instance, "_audit_state", {})
+        changes = {
+            names[attname]: [_jsonable(before[attname]), _jsonable(value)]
+            for attname, value in after.items()
+            if attname in before and before[attname] != value
+        }
+    # The next save of the same instance is compared with what this one wrote
+    instance._audit_state = after
+    if changes:
+        _record(type(instance), instance.pk, AuditAction.CREATE if created else AuditAction.UPDATE, changes)
+
+
+def record_deleted(instance, object_id=None):
+    """Record the values a deleted instance had."""
+    names = _field_names(type(instance))
+    changes = {names[attname]: [_jsonable(value), None] for attname, value in snapshot(instance).items()}
+    _record(type(instance), instance.pk if object_id is None else object_id, AuditAction.DELETE, changes)
+
+
+def record_updates(model, old_values, new_values):
+    """Record a set-based update: `old_values` maps each object id to its {field: old value} dict."""
+    for object_id, old in old_values.items():
+        changes = {field: [_jsonable(value), _jsonable(new_values[field])] for field, value in old.items() if value != new_values[field]}
+        if changes:
+            _record(model, object_id, AuditAction.UPDATE, changes)
+
+
+class AuditLog:
+    """Bounded in-memory queue of audit entries, written in batches by a background thread."""
+
+    def __init__(self, batch_size=None, flush_interval=None, queue_size=None, enqueue_timeout=None):
+        self.batch_size = batch_size or getattr(settings, "AUDIT_BATCH_SIZE", DEFAULT_BATCH_SIZE)
+        self.flush_interval = flush_interval or getattr(settings, "AUDIT_FLUSH_INTERVAL", DEFAULT_FLUSH_INTERVAL)
+        self.enqueue_timeout = enqueue_timeout if enqueue_timeout is not None else getattr(settings, "AUDIT_ENQUEUE_TIMEOUT", DEFAULT_ENQUEUE_TIMEOUT)
+        self._queue = queue.Queue(maxsize=queue_size or getattr(settings, "AUDIT_QUEUE_SIZE", DEFAULT_QUEUE_SIZE))
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def add(self, entry):
+        """Queue an entry for the writer thread; write it right away when asynchronous writes are off or the queue stays full."""
+        if not getattr(settings, "AUDIT_LOG_ASYNC", True):
+            self.write([entry])
+            return
+        self._start()
+        try:
+            self._queue.put(entry, timeout=self.enqueue_timeout)
+        except queue.Full:
+            logger.warning("Audit queue full; writing the entry in the calling thread.")
+            self.write([entry])
+
+    def write(self, entries):
+        AuditEntry.objects.bulk_create(entries, batch_size=self.batch_size)
+
+    def pending(self):
+        """Return the number of entries queued or being written."""
+        return self._queue.unfinished_tasks
+
+    def flush(self):
+        """Block until every entry queued so far is written."""
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.join()
+
+    def _start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                # Daemon, so a stuck database can't keep the process alive; shutdown() drains it
+                self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            entry = self._queue.get()
+            batch, taken = [], 1
+            deadline = time.monotonic() + self.flush_interval
+            while True:
+                if entry is _STOP:
+                    stopping = True
+                    break
+                batch.append(entry)
+                if len(batch) >= self.batch_size:
+                    break
+                try:
+                    entry = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    break
+                taken += 1
+            if batch:
+                self._write_batch(batch)
+            for _ in range(taken):
+                self._queue.task_done()
+        connections.close_all()
+
+    def _write_batch(self, batch):
+        for attempt in range(WRITE_ATTEMPTS):
+            # The thread lives outside the request cycle, so retire expired or broken connections here
+            close_old_connections()
+            try:
+                self.write(batch)
+                return
+            except DatabaseError:
+                logger.exception("Writing %d audit entries failed (attempt %d of %d).", len(batch), attempt + 1, WRITE_ATTEMPTS)
+                time.sleep(min(2 ** attempt * 0.1, 5))
+        self._log_lost(batch)
+
+    def _log_lost(self, entries):
+        for entry in entries:
+            logger.error(
+                "Audit entry not written: %s %s %s by %r at %s: %s",
+                entry.action, entry.model, entry.object_id, entry.actor, entry.date_changed.isoformat(), entry.changes,
+            )
+
+    def shutdown(self, timeout=SHUTDOWN_TIMEOUT):
+        """Stop the writer thread after it wrote the queue, then write anything it left behind."""
+        thread = self._thread
+        if thread is not None and thread.is_alive():
+            try:
+                self._queue.put(_STOP, timeout=timeout)
+                thread.join(timeout)
+            except queue.Full:
+                pass
+        left = []
+        while True:
+            try:
+                entry = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            self._queue.task_done()
+            if entry is not _STOP:
+                left.append(entry)
+        if left:
+            try:
+                self.write(left)
+            except DatabaseError:
+                logger.exception("Writing %d audit entries at shutdown failed.", len(left))
+                self._log_lost(left)
+
+
+audit_log = AuditLog()
+atexit.register(audit_log.shutdown)
+
+
+class AuditActorMiddleware:
+    """Makes the logged-in user the actor of the audit entries recorded while serving a request."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = _request.set(request)
+        try:
+            return self.get_response(request)
+        finally:
+            _request.reset(token)
+
+    async def __acall__(self, request):
+        token = _request.set(request)
+        try:
+            return await self.get_response(request)
+        finally:
+            _request.reset(token)
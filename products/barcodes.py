@@ -0,0 +1,128 @@
+"""Barcode scan lookup for the POS terminals.
+
+Each process keeps a warm map of every barcode to its product id, loaded in one query
+the first time a scan needs it. A scan is then a dict lookup; a code missing from the map
+(added by another process since the load, say) falls back to one query on the unique
+code index and is remembered.
+
+Committed writes update the map of this process through the receivers in
+products.signals and bump a version counter kept in the Django cache. Every process
+compares that counter with the version it loaded (at most every `check_interval`
+seconds) and reloads when it has moved on, so a barcode moved to another product or
+deleted elsewhere stops resolving to the old product. The counter only reaches the
+other processes when the cache is shared by them (see the products.E001 check).
+"""
+import threading
+import time
+
+from django.core.cache import cache
+
+from .models import Barcode
+from .validators import normalize_gtin
+
+VERSION_KEY = "products:barcodes:version"
+
+# Seconds between two checks of the shared version counter
+DEFAULT_CHECK_INTERVAL = 1.0
+
+
+def normalize(code):
+    """Return the stored form of a scanned code, or None when it can't be a GTIN."""
+    try:
+        return normalize_gtin(code)
+    except ValueError:
+        return None
+
+
+class BarcodeMap:
+    """In-memory map of normalized barcode to product id."""
+
+    def __init__(self, check_interval=DEFAULT_CHECK_INTERVAL):
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._codes = None
+        self._version = None
+        self._checked_at = 0.0
+
+    def _load(self):
+        # Read the version before the rows, so a write landing in between triggers another reload
+        version = cache.get(VERSION_KEY, 0)
+        self._codes = dict(Barcode.objects.values_list("code", "product_id").iterator(chunk_size=10000))
+        self._version = version
+        self._checked_at = time.monotonic()
+
+    def _map(self):
+        now = time.monotonic()
+        if self._codes is not None and now - self._checked_at < self.check_interval:
+            # The hot path: no lock, no cache call
+            return self._codes
+        with self._lock:
+            if self._codes is None:
+                self._load()
+            elif now - self._checked_at >= self.check_interval:
+                if cache.get(VERSION_KEY, 0) != self._version:
+                    self._load()
+                else:
+                    self._checked_at = now
+            return self._codes
+
+    def is_warm(self):
+        """Return True when a lookup can be answered without loading the map first."""
+        return self._codes is not None and time.monotonic() - self._checked_at < self.check_interval
+
+    def peek(self, code):
+        """Return the product id of a normalized code if the map holds it, without touching the database."""
+        return self._codes.get(code) if self._codes is not None else None
+
+    def lookup(self, code):
+        """Return the product id of a scanned code, or None when no product carries it."""
+        code = normalize(code)
+        if code is None:
+            return None
+        product_id = self._map().get(code)
+        if product_id is None:
+            product_id = Barcode.objects.filter(code=code).values_list("product_id", flat=True).first()
+            if product_id is not None:
+                self.set(code, product_id)
+        return product_id
+
+    def lookup_many(self, codes):
+        """Return a {scanned code: product_id} dict; codes no product carries are left out.
+
+        Codes missing from the map are looked up together in one query.
+        """
+        normalized = {code: normalize(code) for code in codes}
+        codes_map = self._map()
+        found = {code: codes_map[key] for code, key in normalized.items() if key in codes_map}
+        missing = {key: code for code, key in normalized.items() if key is not None and key not in codes_map}
+        if missing:
+            for key, product_id in Barcode.objects.filter(code__in=list(missing)).values_list("code", "product_id"):
+                codes_map[key] = product_id
+                found[missing[key]] = product_id
+        return found
+
+    def set(self, code, product_id):
+        """Point a code at a product in this process' map; does nothing until the map is loaded."""
+        if self._codes is not None:
+            self._codes[code] = product_id
+
+    def discard(self, code):
+        if self._codes is not None:
+            self._codes.pop(code, None)
+
+    def clear(self):
+        """Drop this process' map; the next scan reloads it."""
+        with self._lock:
+            self._codes = None
+
+    def invalidate(self):
+        """Tell the other processes to reload their map."""
+        if not cache.add(VERSION_KEY, 1, timeout=None):
+            try:
+                cache.incr(VERSION_KEY)
+            except ValueError:
+                # The key expired or was evicted between add() and incr()
+                cache.set(VERSION_KEY, 1, timeout=None)
+
+
+barcodes = BarcodeMap()
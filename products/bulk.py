@@ -0,0 +1,126 @@
+"""Set-based status and category changes for many products at once.
+
+Every change works through the selected products in primary key order, a batch at a
+time. Each batch costs the same few statements whatever its size: one to find the rows
+that would change and whether their detail rows allow it, one UPDATE, and one
+catalog_bulk_changed signal, whose receivers refresh the search index, the read table,
+the caches and the POS changes feed for the whole batch. The query finding the rows also
+reads the values they had, so every change is in the audit log too. Each batch is its own
+transaction, so a long run never holds the write lock for long.
+
+Products already in the target state are left alone. Products whose medicine or
+general good detail doesn't fit the change are skipped and counted:
+
+- publishing needs the detail row of the product's category, and none of the other one;
+- moving a product to a category needs it to have no detail row of the other category,
+  and a published product must be publishable in the new category.
+"""
+from collections import namedtuple
+
+from django.db import transaction
+from django.db.models import BooleanField, Exists, ExpressionWrapper, OuterRef, Q, QuerySet
+from django.utils import timezone
+
+from . import audit
+from .models import Product, Medicine, GeneralGood, ProductCategory, ProductStatus
+from .signals import catalog_bulk_changed
+
+# Products per batch, well below the bound parameter limit of every backend
+BATCH_SIZE = 500
+
+BulkResult = namedtuple("BulkResult", ["updated", "skipped"])
+
+
+def _has_medicine():
+    return Exists(Medicine.objects.filter(product_id=OuterRef("pk")))
+
+
+def _has_general_good():
+    return Exists(GeneralGood.objects.filter(product_id=OuterRef("pk")))
+
+
+def _publishable_as(category):
+    if category == ProductCategory.MEDICINE:
+        return Q(_has_medicine(), ~Q(_has_general_good()))
+    return Q(_has_general_good(), ~Q(_has_medicine()))
+
+
+def _publishable():
+    return (
+        Q(_publishable_as(ProductCategory.MEDICINE), category=ProductCategory.MEDICINE)
+        | Q(_publishable_as(ProductCategory.GENERAL_GOODS), category=ProductCategory.GENERAL_GOODS)
+    )
+
+
+def _fits_category(category):
+    # A published product has to stay publishable, i.e. have the new category's detail row
+    if category == ProductCategory.MEDICINE:
+        fits = ~Q(_has_general_good())
+    else:
+        fits = ~Q(_has_medicine())
+    return fits & (~Q(status=ProductStatus.PUBLISHED) | _publishable_as(category))
+
+
+def _products(products):
+    if isinstance(products, QuerySet):
+        return products
+    return Product.objects.filter(pk__in=list(products))
+
+
+def update_products(products, values, allowed=None, batch_size=BATCH_SIZE):
+    """Set `values` on the given products (a queryset or ids), batch by batch; returns a BulkResult.
+
+    `allowed`, a Q object, picks the products that may change; the others are skipped.
+    """
+    products = _products(products)
+    updated = skipped = 0
+    last = 0
+    while True:
+        # Keyset pagination: the filter may match fewer rows once earlier batches are updated
+        ids = list(products.filter(pk__gt=last).order_by("pk").values_list("pk", flat=True)[:batch_size])
+        if not ids:
+            break
+        last = ids[-1]
+
+        with transaction.atomic():
+            rows = Product.objects.filter(pk__in=ids).exclude(**values)
+            fields = list(values)
+            if allowed is None:
+                old = {pk: dict(zip(fields, row)) for pk, *row in rows.values_list("pk", *fields)}
+            else:
+                checked = list(rows.values_list("pk", ExpressionWrapper(allowed, output_field=BooleanField()), *fields))
+                old = {pk: dict(zip(fields, row)) for pk, ok, *row in checked if ok}
+                skipped += len(checked) - len(old)
+            changed = list(old)
+            if changed:
+                # update() skips auto_now, and the POS feed and caches key off date_updated
+                Product.objects.filter(pk__in=changed).update(**values, date_updated=timezone.now())
+                catalog_bulk_changed.send(sender=Product, product_ids=changed)
+                audit.record_updates(Product, old, values)
+        updated += len(changed)
+    return BulkResult(updated, skipped)
+
+
+def publish(products, batch_size=BATCH_SIZE):
+    """Publish the given products whose detail rows match their category."""
+    return update_products(products, {"status": ProductStatus.PUBLISHED}, _publishable(), batch_size)
+
+
+def unpublish(products, batch_size=BATCH_SIZE):
+    """Send the given products back to draft."""
+    return update_products(products, {"status": ProductStatus.DRAFT}, batch_size=batch_size)
+
+
+def retire(products, batch_size=BATCH_SIZE):
+    """Take the given products out of the catalog for good, keeping their rows and history."""
+    return update_products(products, {"status": ProductStatus.RETIRED}, batch_size=batch_size)
+
+
+def recategorize(products, category, batch_size=BATCH_SIZE):
+    """Move the given products to `category`, skipping those with a detail row of another category.
+
+    Published products are only moved when they have the detail row of `category`.
+    """
+    if category not in ProductCategory.values:
+        raise ValueError(f"Unknown product category '{category}'; expected one of {', '.join(ProductCategory.values)}.")
+    return update_products(products, {"category": category}, _fits_category(category), batch_size)
@@ -0,0 +1,198 @@
+"""Versioned cache of product details (the product with its medicine or general good).
+
+Every product has a version in the cache (a random token) and its cached detail is stored
+under a key that includes that version. A write to the product or its detail only has to bump
+the version: readers then miss on the new key and load fresh data, and the stale entry
+simply expires. A catalog-wide generation number is part of every key too, so a change
+that touches many products at once (such as renaming a medicine form) is one bump.
+
+Only plain get/set/add/incr calls and their *_many forms are used, so any Django cache
+backend works. The versions only invalidate across processes when the backend is shared
+by them, though (file based or Redis): with locmem every process keeps its own versions,
+so a write in one process leaves the others serving the old detail until it expires. The
+products.E001 check refuses locmem when SERVING_PROCESSES says more than one process
+serves traffic. aget_many() and aget() are the async versions used by the async views:
+with the in-memory backend a hit never leaves the event loop.
+"""
+import threading
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+
+from pharmacy_inventory.db import run_in_database_thread
+from pharmacy_inventory.routers import read_from_primary
+
+KEY_PREFIX = "products:detail"
+GENERATION_KEY = f"{KEY_PREFIX}:generation"
+
+# Cached details expire after a day at the latest, stale versions included
+DEFAULT_TIMEOUT = 60 * 60 * 24
+
+
+def _cache():
+    return caches[getattr(settings, "PRODUCT_DETAIL_CACHE", "default")]
+
+
+def _timeout():
+    return getattr(settings, "PRODUCT_DETAIL_CACHE_TIMEOUT", DEFAULT_TIMEOUT)
+
+
+def _version_key(product_id):
+    return f"{KEY_PREFIX}:version:{product_id}"
+
+
+def _data_key(generation, product_id, version):
+    return f"{KEY_PREFIX}:{generation}:{product_id}:{version}"
+
+
+class CacheStats:
+    """Hit and miss counters of this process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def record(self, hits=0, misses=0):
+        with self._lock:
+            self.hits += hits
+            self.misses += misses
+
+    def reset(self):
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+stats = CacheStats()
+
+
+def _incr(key):
+    cache = _cache()
+    if cache.add(key, 1, timeout=None):
+        return
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Evicted between add() and incr()
+        cache.set(key, 1, timeout=None)
+
+
+def bump_version(product_id):
+    """Make the cached detail of a product stale."""
+    bump_versions([product_id])
+
+
+def bump_versions(product_ids):
+    """Make the cached details of the given products stale, in a single cache call.
+
+    Versions only have to differ from every earlier one, so the products all get the same
+    fresh random token rather than a counter incremented one key at a time.
+    """
+    version = uuid.uuid4().hex
+    _cache().set_many({_version_key(product_id): version for product_id in product_ids}, timeout=None)
+
+
+def bump_generation():
+    """Make every cached product detail stale at once."""
+    _incr(GENERATION_KEY)
+
+
+def _load(product_ids):
+    # Imported here since products.api serves its details through this module
+    from .api import catalog_queryset, serialize_product
+
+    # From the primary: a stale replica copy would stay cached until the product's next write
+    with read_from_primary():
+        return {product.pk: serialize_product(product) for product in catalog_queryset().filter(pk__in=product_ids)}
+
+
+def _version_keys(product_ids):
+    return {product_id: _version_key(product_id) for product_id in product_ids}
+
+
+def _data_keys(version_keys, stored):
+    """Map every product id to the key of its current detail, given the stored version numbers."""
+    generation = stored.get(GENERATION_KEY, 0)
+    return {
+        product_id: _data_key(generation, product_id, stored.get(version_key, 0))
+        for product_id, version_key in version_keys.items()
+    }
+
+
+def _found(product_ids, data_keys, cached):
+    """Split the cache read into (details found, ids missing) and count them."""
+    details = {product_id: cached[key] for product_id, key in data_keys.items() if key in cached}
+    missing = [product_id for product_id in product_ids if product_id not in details]
+    stats.record(hits=len(details), misses=len(missing))
+    return details, missing
+
+
+def get_many(product_ids):
+    """Return a {product_id: detail} dict for the given ids; unknown products are left out.
+
+    Costs two cache reads, plus one query and one cache write for whatever was missing.
+    """
+    product_ids = list(dict.fromkeys(product_ids))
+    if not product_ids:
+        return {}
+    cache = _cache()
+
+    version_keys = _version_keys(product_ids)
+    data_keys = _data_keys(version_keys, cache.get_many([GENERATION_KEY, *version_keys.values()]))
+    details, missing = _found(product_ids, data_keys, cache.get_many(data_keys.values()))
+
+    if missing:
+        loaded = _load(missing)
+        cache.set_many({data_keys[product_id]: detail for product_id, detail in loaded.items()}, timeout=_timeout())
+        details.update(loaded)
+    return details
+
+
+def get(product_id):
+    """Return the detail of one product, or None when it doesn't exist."""
+    return get_many([product_id]).get(product_id)
+
+
+async def _aget_many(cache, keys):
+    if isinstance(cache, LocMemCache):
+        # Memory only: reading it directly is cheaper than handing it to a thread
+        return cache.get_many(keys)
+    return await cache.aget_many(keys)
+
+
+async def _aset_many(cache, data):
+    if isinstance(cache, LocMemCache):
+        cache.set_many(data, timeout=_timeout())
+    else:
+        await cache.aset_many(data, timeout=_timeout())
+
+
+async def aget_many(product_ids):
+    """Async version of get_many(); misses are loaded on a database thread (run_in_database_thread)."""
+    product_ids = list(dict.fromkeys(product_ids))
+    if not product_ids:
+        return {}
+    cache = _cache()
+
+    version_keys = _version_keys(product_ids)
+    data_keys = _data_keys(version_keys, await _aget_many(cache, [GENERATION_KEY, *version_keys.values()]))
+    details, missing = _found(product_ids, data_keys, await _aget_many(cache, list(data_keys.values())))
+
+    if missing:
+        # Serializing reads the lookup cache, which may query too, so the whole load runs in the thread
+        loaded = await run_in_database_thread(_load, missing)
+        await _aset_many(cache, {data_keys[product_id]: detail for product_id, detail in loaded.items()})
+        details.update(loaded)
+    return details
+
+
+async def aget(product_id):
+    """Async version of get()."""
+    return (await aget_many([product_id])).get(product_id)
@@ -0,0 +1,88 @@
+"""The flattened catalog read table (CatalogEntry): one row per product with its detail.
+
+Rows are written with INSERT ... SELECT over the same joins the list screens used to
+run, so refreshing a batch of products costs two statements whatever the batch size and
+no model instances are built. The receivers in products.signals call these functions
+inside the writing transaction, so the read table commits or rolls back with the catalog.
+"""
+from django.db import connections, router
+
+from .models import CatalogEntry
+
+ENTRY_TABLE = CatalogEntry._meta.db_table
+
+ENTRY_COLUMNS = (
+    "product_id", "brand", "name", "category", "status", "date_created",
+    "generic_name", "form", "dosage", "prescription_type", "unit",
+)
+
+# One row per product in ENTRY_COLUMNS order; missing details become empty strings
+ENTRY_SQL = """
+    SELECT p.id AS product_id, p.brand, p.name, p.category, p.status, p.date_created,
+           COALESCE(m.generic_name, '') AS generic_name, COALESCE(f.name, '') AS form,
+           COALESCE(m.dosage, '') AS dosage, COALESCE(m.prescription_type, '') AS prescription_type,
+           COALESCE(g.unit, '') AS unit
+    FROM products_product p
+    LEFT JOIN products_medicine m ON m.product_id = p.id
+    LEFT JOIN products_medicineform f ON f.id = m.form_id
+    LEFT JOIN products_generalgood g ON g.product_id = p.id
+"""
+
+# Products per statement, well below the bound parameter limit of every backend
+BATCH_SIZE = 500
+
+
+def _connection():
+    return connections[router.db_for_write(CatalogEntry)]
+
+
+def _batches(product_ids):
+    product_ids = list(dict.fromkeys(product_ids))
+    for start in range(0, len(product_ids), BATCH_SIZE):
+        yield product_ids[start:start + BATCH_SIZE]
+
+
+def refresh_entries(product_ids):
+    """Rewrite the entries of the given products from the catalog tables; products that are gone lose theirs."""
+    with _connection().cursor() as cursor:
+        for batch in _batches(product_ids):
+            placeholders = ", ".join(["%s"] * len(batch))
+            cursor.execute(f"DELETE FROM {ENTRY_TABLE} WHERE product_id IN ({placeholders})", batch)
+            cursor.execute(
+                f"INSERT INTO {ENTRY_TABLE} ({', '.join(ENTRY_COLUMNS)}) {ENTRY_SQL} WHERE p.id IN ({placeholders})",
+                batch,
+            )
+
+
+def remove_entries(product_ids):
+    """Drop the entries of the given products."""
+    with _connection().cursor() as cursor:
+        for batch in _batches(product_ids):
+            placeholders = ", ".join(["%s"] * len(batch))
+            cursor.execute(f"DELETE FROM {ENTRY_TABLE} WHERE product_id IN ({placeholders})", batch)
+
+
+def rename_form(form_id, name):
+    """Copy a medicine form's new name onto the entries of its medicines."""
+    return CatalogEntry.objects.filter(product__medicine__form_id=form_id).exclude(form=name).update(form=name)
+
+
+def rebuild():
+    """Repopulate the whole read table from the catalog tables and return the number of entries."""
+    with _connection().cursor() as cursor:
+        cursor.execute(f"DELETE FROM {ENTRY_TABLE}")
+        cursor.execute(f"INSERT INTO {ENTRY_TABLE} ({', '.join(ENTRY_COLUMNS)}) {ENTRY_SQL}")
+        cursor.execute(f"SELECT COUNT(*) FROM {ENTRY_TABLE}")
+        return cursor.fetchone()[0]
+
+
+def find_drift():
+    """Return the ids of products whose entry is missing, stale or left over, compared with the catalog tables."""
+    columns = ", ".join(ENTRY_COLUMNS)
+    with _connection().cursor() as cursor:
+        # Rows only in the read table (stale or left over), then rows only in the source (stale or missing)
+        cursor.execute(
+            f"SELECT product_id FROM (SELECT {columns} FROM {ENTRY_TABLE} EXCEPT {ENTRY_SQL}) stale "
+            f"UNION SELECT product_id FROM ({ENTRY_SQL} EXCEPT SELECT {columns} FROM {ENTRY_TABLE}) missing"
+        )
+        return sorted({row[0] for row in cursor.fetchall()})
@@ -0,0 +1,26 @@
+"""System checks of the deployment settings the catalog caches depend on."""
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.checks import Error, Tags, register
+
+
+@register(Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    """Refuse a per-process cache when several processes serve traffic.
+
+    The product detail versions and the lookup and barcode version counters live in the
+    cache; in a cache private to each process, a write in one process is never seen by the
+    others.
+    """
+    if getattr(settings, "SERVING_PROCESSES", 1) <= 1:
+        return []
+    errors = []
+    for alias in sorted({"default", getattr(settings, "PRODUCT_DETAIL_CACHE", "default")}):
+        if isinstance(caches[alias], LocMemCache):
+            errors.append(Error(
+                f"The '{alias}' cache is in-memory, but {settings.SERVING_PROCESSES} processes serve traffic.",
+                hint="Set PHARMACY_CACHE_BACKEND to 'file' or 'redis' so cache invalidations reach every process.",
+                id="products.E001",
+            ))
+    return errors
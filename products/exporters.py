@@ -0,0 +1,86 @@
+"""Streaming export of the whole product catalog as CSV or JSON Lines.
+
+Rows are read with .values() and a chunked iterator() and written out as soon as they
+are read, so memory use stays flat and the first row goes out right away no matter how
+big the catalog is.
+"""
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import Product
+
+DEFAULT_CHUNK_SIZE = 2000
+
+# Output column -> lookup on Product. The reverse one-to-one lookups become LEFT JOINs,
+# so a product comes out as a single row together with its medicine or general good detail.
+EXPORT_COLUMNS = {
+    "id": "id",
+    "brand": "brand",
+    "name": "name",
+    "category": "category",
+    "status": "status",
+    "date_created": "date_created",
+    "generic_name": "medicine__generic_name",
+    "dosage": "medicine__dosage",
+    "form": "medicine__form__name",
+    "usage": "medicine__usage",
+    "side_effects": "medicine__side_effects",
+    "prescription_type": "medicine__prescription_type",
+    "type": "generalgood__type",
+    "unit": "generalgood__unit",
+    "notes": "generalgood__notes",
+}
+
+CONTENT_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "jsonl": "application/x-ndjson; charset=utf-8",
+}
+
+
+def catalog_rows(chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield one tuple of EXPORT_COLUMNS values per product, in id order."""
+    queryset = Product.objects.order_by("id").values_list(*EXPORT_COLUMNS.values())
+    yield from queryset.iterator(chunk_size=chunk_size)
+
+
+class _LineBuffer:
+    """File-like object whose write() hands back the line instead of storing it."""
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(rows):
+    """Yield the CSV header and one CSV line per row."""
+    writer = csv.writer(_LineBuffer())
+    yield writer.writerow(EXPORT_COLUMNS.keys())
+    for row in rows:
+        yield writer.writerow(["" if value is None else value for value in row])
+
+
+def jsonl_lines(rows):
+    """Yield one JSON object per row, each on its own line."""
+    encoder = DjangoJSONEncoder()
+    columns = list(EXPORT_COLUMNS)
+    for row in rows:
+        yield encoder.encode(dict(zip(columns, row))) + "\n"
+
+
+WRITERS = {"csv": csv_lines, "jsonl": jsonl_lines}
+
+
+def export_lines(format="csv", chunk_size=DEFAULT_CHUNK_SIZE):
+    """Return an iterator over the lines of the catalog export in the given format ('csv' or 'jsonl')."""
+    try:
+        writer = WRITERS[format]
+    except KeyError:
+        raise ValueError(f"Unsupported export format '{format}'; expected one of {', '.join(WRITERS)}.")
+    return writer(catalog_rows(chunk_size))
+
+
+def export_catalog(stream, format="csv", chunk_size=DEFAULT_CHUNK_SIZE):
+    """Write the catalog export to an open text stream."""
+    for line in export_lines(format, chunk_size):
+        stream.write(line)
@@ -0,0 +1,176 @@
+"""Typo tolerant lookup of product and generic names using an in-memory trigram index.
+
+The index is built lazily the first time a process needs it and is then kept up to date
+by the signal receivers in products.signals, one row at a time.
+"""
+import heapq
+import math
+import re
+import threading
+
+from pharmacy_inventory.routers import read_from_primary
+
+from .models import Product, Medicine
+
+WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+# Matches sharing less than this fraction of trigrams with the query are dropped
+DEFAULT_MIN_SIMILARITY = 0.3
+
+
+def trigrams(text):
+    """Return the set of trigrams of a text, padding each word like pg_trgm does."""
+    grams = set()
+    for word in WORD_RE.findall(text.lower()):
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class TrigramIndex:
+    """Inverted index from trigrams to the keys of the texts that contain them."""
+
+    def __init__(self):
+        self._postings = {}
+        self._documents = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._documents)
+
+    def add(self, key, text):
+        """Index a text under the key, replacing whatever the key held before."""
+        grams = frozenset(trigrams(text))
+        with self._lock:
+            self._discard(key)
+            self._documents[key] = (text, grams)
+            for gram in grams:
+                self._postings.setdefault(gram, set()).add(key)
+
+    def remove(self, key):
+        """Drop the text indexed under the key, if any."""
+        with self._lock:
+            self._discard(key)
+
+    def _discard(self, key):
+        document = self._documents.pop(key, None)
+        if document is None:
+            return
+        for gram in document[1]:
+            postings = self._postings.get(gram)
+            if postings is not None:
+                postings.discard(key)
+                if not postings:
+                    del self._postings[gram]
+
+    def search(self, query, limit=10, min_similarity=DEFAULT_MIN_SIMILARITY):
+        """Return up to `limit` (key, text, similarity) tuples, most similar first.
+
+        Similarity is the Jaccard index of the two trigram sets, as in pg_trgm. A text with a
+        similarity of at least `min_similarity` has to share at least that fraction of the
+        query's trigrams, so it must appear in one of the rarest postings lists. Only those
+        candidates are scored, which keeps lookups fast when the query has common trigrams.
+        """
+        query_grams = trigrams(query)
+        if not query_grams:
+            return []
+        required = max(1, math.ceil(min_similarity * len(query_grams)))
+
+        with self._lock:
+            ordered = sorted(query_grams, key=lambda gram: len(self._postings.get(gram, ())))
+            candidates = set()
+            for gram in ordered[:len(ordered) - required + 1]:
+                candidates.update(self._postings.get(gram, ()))
+
+            scored = []
+            for key in candidates:
+                text, grams = self._documents[key]
+                common = len(query_grams & grams)
+                similarity = common / (len(query_grams) + len(grams) - common)
+                if similarity >= min_similarity:
+                    scored.append((similarity, key, text))
+
+        best = heapq.nlargest(limit, scored, key=lambda item: item[0])
+        return [(key, text, similarity) for similarity, key, text in best]
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_index():
+    """Return the process-wide index of product and generic names, building it on first use.
+
+    Keys are ("name", product_id) and ("generic_name", product_id) tuples.
+    """
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                index = TrigramIndex()
+                # From the primary: the index is only patched by later writes, never reloaded
+                with read_from_primary():
+                    for product_id, name in Product.objects.values_list("id", "name").iterator(chunk_size=5000):
+                        index.add(("name", product_id), name)
+                    for product_id, generic_name in Medicine.objects.values_list("product_id", "generic_name").iterator(chunk_size=5000):
+                        index.add(("generic_name", product_id), generic_name)
+                _index = index
+    return _index
+
+
+def is_loaded():
+    """Return True when this process has already built the index."""
+    return _index is not None
+
+
+def reset_index():
+    """Forget the index so the next lookup rebuilds it from the database."""
+    global _index
+    with _index_lock:
+        _index = None
+
+
+def update_entry(field, product_id, text):
+    """Refresh one indexed name; does nothing until the index has been built."""
+    if _index is not None:
+        _index.add((field, product_id), text)
+
+
+def remove_entry(field, product_id):
+    """Remove one indexed name; does nothing until the index has been built."""
+    if _index is not None:
+        _index.remove((field, product_id))
+
+
+def refresh_products(product_ids):
+    """Reload the indexed names of the given products from the database."""
+    if _index is None:
+        return
+    for product_id in product_ids:
+        _index.remove(("name", product_id))
+        _index.remove(("generic_name", product_id))
+    with read_from_primary():
+        for product_id, name in Product.objects.filter(pk__in=product_ids).values_list("id", "name"):
+            _index.add(("name", product_id), name)
+        for product_id, generic_name in Medicine.objects.filter(product_id__in=product_ids).values_list("product_id", "generic_name"):
+            _index.add(("generic_name", product_id), generic_name)
+
+
+def fuzzy_search(query, limit=10, min_similarity=DEFAULT_MIN_SIMILARITY):
+    """Return up to `limit` (product_id, matched_text, similarity) tuples for a possibly misspelt name.
+
+    A product appears once, with whichever of its name or generic name matched best.
+    """
+    # Over-fetch a little since a product can match on both of its names
+    matches = get_index().search(query, limit * 2, min_similarity)
+
+    results = []
+    seen = set()
+    for (_, product_id), text, similarity in matches:
+        if product_id in seen:
+            continue
+        seen.add(product_id)
+        results.append((product_id, text, similarity))
+        if len(results) == limit:
+            break
+    return results
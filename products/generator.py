@@ -0,0 +1,257 @@
+"""Synthetic catalog data for development databases and the benchmarks.
+
+generate_catalog() bulk-creates a catalog that looks like a pharmacy's: medicine forms,
+dosage units, medicines and general goods with realistic names, a barcode per product,
+suppliers and their price lists. The same seed always gives the same catalog, so
+benchmark runs on different commits measure the same data.
+
+Rows are written with bulk_create in batches, one transaction per batch, and the derived
+structures are told about each batch through catalog_bulk_changed, like an import.
+"""
+import random
+from collections import namedtuple
+from decimal import Decimal
+
+from django.db import transaction
+
+from pharmacy_inventory.routers import read_from_primary
+
+from .lookups import LOOKUP_CACHES
+from .models import Product, Medicine, GeneralGood, MedicineForm, DosageUnit, Barcode, ProductCategory, ProductStatus, MedicineType, SyncKind
+from .signals import catalog_bulk_changed
+from .sync import record_changes
+from .validators import gtin_check_digit
+
+DEFAULT_BATCH_SIZE = 5000
+
+FORMS = [
+    ("Tablet", "Solid dose to swallow"),
+    ("Capsule", "Powder or liquid in a gelatin shell"),
+    ("Syrup", "Oral liquid"),
+    ("Suspension", "Oral liquid to shake before use"),
+    ("Cream", "Semi-solid for the skin"),
+    ("Ointment", "Greasy semi-solid for the skin"),
+    ("Drops", "Liquid for the eyes, ears or nose"),
+    ("Inhaler", "Metered dose for the lungs"),
+    ("Injection", "Solution for injection"),
+    ("Sachet", "Powder to dissolve"),
+]
+
+UNITS = [
+    ("mg", "Milligram"),
+    ("mcg", "Microgram"),
+    ("g", "Gram"),
+    ("ml", "Millilitre"),
+    ("IU", "International unit"),
+    ("%", "Percent by weight"),
+]
+
+GENERIC_NAMES = [
+    "paracetamol", "ibuprofen", "amoxicillin", "cetirizine", "loratadine", "metformin",
+    "amlodipine", "losartan", "atorvastatin", "simvastatin", "omeprazole", "mefenamic acid",
+    "salbutamol", "ascorbic acid", "cefalexin", "azithromycin", "co-amoxiclav", "dextromethorphan",
+    "carbocisteine", "ambroxol", "loperamide", "metoclopramide", "clotrimazole", "hydrocortisone",
+    "betamethasone", "mupirocin", "ferrous sulfate", "folic acid", "multivitamins", "zinc sulfate",
+    "naproxen", "diclofenac", "celecoxib", "prednisone", "montelukast", "lansoprazole",
+    "ranitidine", "famotidine", "clopidogrel", "aspirin", "metoprolol", "carvedilol",
+    "gliclazide", "glimepiride", "sitagliptin", "levothyroxine", "doxycycline", "ciprofloxacin",
+]
+
+MEDICINE_BRANDS = [
+    "Biogesic", "Medicol", "Alaxan", "Neozep", "Solmux", "Ceelin", "Enervon", "Diatabs",
+    "Kremil-S", "Decolgen", "Bioflu", "Tempra", "Dolfenal", "Allerta", "Ritemed", "Unilab",
+    "Pharex", "Generika", "Amoxil", "Zyrtec", "Claritin", "Lipitor", "Norvasc", "Cozaar",
+]
+
+GOODS = [
+    ("Bar Soap", "Personal care", "bar"),
+    ("Shampoo", "Personal care", "bottle"),
+    ("Toothpaste", "Oral care", "tube"),
+    ("Toothbrush", "Oral care", "piece"),
+    ("Mouthwash", "Oral care", "bottle"),
+    ("Alcohol", "First aid", "bottle"),
+    ("Cotton Balls", "First aid", "pack"),
+    ("Adhesive Bandage", "First aid", "box"),
+    ("Face Mask", "Protective", "box"),
+    ("Diapers", "Baby care", "pack"),
+    ("Baby Wipes", "Baby care", "pack"),
+    ("Milk Formula", "Nutrition", "can"),
+    ("Energy Drink", "Beverages", "bottle"),
+    ("Bottled Water", "Beverages", "bottle"),
+    ("Lotion", "Skin care", "bottle"),
+    ("Sunscreen", "Skin care", "tube"),
+    ("Thermometer", "Devices", "piece"),
+    ("Blood Pressure Monitor", "Devices", "piece"),
+]
+
+GOODS_BRANDS = [
+    "Safeguard", "Palmolive", "Colgate", "Close-Up", "Listerine", "Green Cross", "Johnson's",
+    "EQ", "Huggies", "Enfagrow", "Gatorade", "Wilkins", "Nivea", "Omron", "Watsons", "Rose Pharmacy",
+]
+
+STRENGTHS = ["5", "10", "20", "25", "50", "100", "250", "500", "850", "1000"]
+
+SIZES = ["30 ml", "60 ml", "100 ml", "200 ml", "500 ml", "1 L", "10s", "20s", "50s", "100s"]
+
+SUPPLIER_NAMES = [
+    "Zuellig Pharma", "Metro Drug", "DKSH", "United Laboratories", "Pharmalink", "Mercury Wholesale",
+    "Medichem", "PhilCare Distributors", "Apex Medical Supply", "Northstar Pharma",
+]
+
+CatalogCounts = namedtuple("CatalogCounts", ["products", "medicines", "general_goods", "barcodes", "suppliers", "prices"])
+
+
+def _barcode(product_id):
+    """Return a stored-form EAN-13 derived from the product id, so generated codes never collide."""
+    # Prefix 2 is the GS1 range for in-store numbering, so no real product carries these codes
+    digits = f"2{product_id:011d}"
+    return (digits + gtin_check_digit(digits)).zfill(14)
+
+
+def _lookup_rows(model, rows):
+    """Return the rows of a small lookup table, creating the missing ones by name."""
+    existing = {obj.name: obj for obj in model.objects.filter(name__in=[name for name, _ in rows])}
+    created = model.objects.bulk_create(
+        [model(name=name, description=description) for name, description in rows if name not in existing]
+    )
+    if created:
+        # bulk_create skips the receivers that drop the cached lookup tables
+        transaction.on_commit(LOOKUP_CACHES[model].invalidate)
+    return list(model.objects.filter(name__in=[name for name, _ in rows]).order_by("id"))
+
+
+def _suppliers(count):
+    from suppliers.models import Suppliers
+
+    suppliers = [
+        Suppliers(
+            name=SUPPLIER_NAMES[i % len(SUPPLIER_NAMES)] + (f" {i // len(SUPPLIER_NAMES) + 1}" if i >= len(SUPPLIER_NAMES) else ""),
+            address=f"{i + 1} Industrial Road, Pasig City",
+            telephone_number=f"02-8{i:07d}",
+            mobile_number=f"0917{i:07d}",
+            email_address=f"orders{i + 1}@supplier.example.com",
+            contact_person=f"Contact {i + 1}",
+            remarks="-",
+        )
+        for i in range(count)
+    ]
+    for supplier in suppliers:
+        supplier.update_keys()
+    suppliers = Suppliers.objects.bulk_create(suppliers)
+    # bulk_create skips the receivers that feed the POS changes feed
+    record_changes(SyncKind.SUPPLIER, [supplier.pk for supplier in suppliers])
+    return suppliers
+
+
+class CatalogGenerator:
+    """Builds synthetic catalog rows from a seeded random generator and writes them in batches."""
+
+    def __init__(self, seed=0, medicine_share=0.6, prices_per_product=2, batch_size=DEFAULT_BATCH_SIZE):
+        self.rng = random.Random(seed)
+        self.medicine_share = medicine_share
+        self.prices_per_product = prices_per_product
+        self.batch_size = batch_size
+
+    def build_product(self, forms, units):
+        """Return an unsaved (product, detail) pair."""
+        rng = self.rng
+        status = ProductStatus.PUBLISHED if rng.random() < 0.9 else ProductStatus.DRAFT
+        if rng.random() < self.medicine_share:
+            generic_name = rng.choice(GENERIC_NAMES)
+            form = rng.choice(forms)
+            unit = rng.choice(units)
+            strength = f"{rng.choice(STRENGTHS)}{unit.name}"
+            product = Product(
+                brand=rng.choice(MEDICINE_BRANDS),
+                name=f"{generic_name.title()} {strength} {form.name}",
+                category=ProductCategory.MEDICINE,
+                status=status,
+            )
+            detail = Medicine(
+                generic_name=generic_name,
+                dosage=strength,
+                form=form,
+                usage=f"Take as directed. {form.description}.",
+                side_effects="Nausea, dizziness or rash in rare cases.",
+                prescription_type=MedicineType.OTC if rng.random() < 0.5 else MedicineType.PRESCRIPTION,
+            )
+        else:
+            name, type, unit = rng.choice(GOODS)
+            product = Product(
+                brand=rng.choice(GOODS_BRANDS),
+                name=f"{name} {rng.choice(SIZES)}",
+                category=ProductCategory.GENERAL_GOODS,
+                status=status,
+            )
+            detail = GeneralGood(type=type, unit=unit, notes="-")
+        return product, detail
+
+    def write_batch(self, batch, suppliers, counts):
+        """Insert one batch of (product, detail) pairs with their barcodes and price lines."""
+        from suppliers.models import SupplierPrice
+
+        rng = self.rng
+        with transaction.atomic():
+            products = Product.objects.bulk_create([product for product, _ in batch])
+            medicines, general_goods = [], []
+            for product, detail in batch:
+                detail.product = product
+                (medicines if isinstance(detail, Medicine) else general_goods).append(detail)
+            Medicine.objects.bulk_create(medicines)
+            GeneralGood.objects.bulk_create(general_goods)
+            Barcode.objects.bulk_create([Barcode(product=product, code=_barcode(product.pk)) for product in products])
+
+            prices = []
+            for product in products:
+                for supplier in rng.sample(suppliers, min(self.prices_per_product, len(suppliers))):
+                    prices.append(SupplierPrice(
+                        supplier=supplier,
+                        product=product,
+                        supplier_sku=f"{supplier.pk}-{product.pk}",
+                        unit_price=Decimal(rng.randint(500, 250000)) / 100,
+                    ))
+            SupplierPrice.objects.bulk_create(prices)
+            catalog_bulk_changed.send(sender=Product, product_ids=[product.pk for product in products])
+
+        return counts._replace(
+            products=counts.products + len(products),
+            medicines=counts.medicines + len(medicines),
+            general_goods=counts.general_goods + len(general_goods),
+            barcodes=counts.barcodes + len(products),
+            prices=counts.prices + len(prices),
+        )
+
+    def run(self, products, suppliers=10, progress=None):
+        """Create `products` products and `suppliers` suppliers; returns a CatalogCounts.
+
+        `progress`, if given, is called with the running CatalogCounts after every batch.
+        """
+        forms = _lookup_rows(MedicineForm, FORMS)
+        units = _lookup_rows(DosageUnit, UNITS)
+        supplier_rows = _suppliers(suppliers)
+        counts = CatalogCounts(0, 0, 0, 0, len(supplier_rows), 0)
+
+        batch = []
+        for _ in range(products):
+            batch.append(self.build_product(forms, units))
+            if len(batch) >= self.batch_size:
+                counts = self.write_batch(batch, supplier_rows, counts)
+                batch = []
+                if progress:
+                    progress(counts)
+        if batch:
+            counts = self.write_batch(batch, supplier_rows, counts)
+            if progress:
+                progress(counts)
+        return counts
+
+
+def generate_catalog(products, suppliers=10, seed=0, medicine_share=0.6, prices_per_product=2,
+                     batch_size=DEFAULT_BATCH_SIZE, progress=None):
+    """Bulk-create a synthetic catalog of `products` products and return a CatalogCounts."""
+    generator = CatalogGenerator(
+        seed=seed, medicine_share=medicine_share, prices_per_product=prices_per_product, batch_size=batch_size,
+    )
+    # The lookup rows and suppliers it reuses have to be read from where they are written
+    with read_from_primary():
+        return generator.run(products, suppliers=suppliers, progress=progress)
@@ -0,0 +1,239 @@
+"""Streaming bulk import of the product catalog from CSV or JSON Lines files.
+
+Each input row describes one product and its medicine or general good detail:
+
+    brand, name, category, status,
+    generic_name, dosage, dosage_unit, form, usage, side_effects, prescription_type   (medicines)
+    type, unit, notes                                                                 (general goods)
+
+Rows are validated one by one, collected into batches and written with bulk_create, one
+transaction per batch. A row that fails validation is reported and skipped; it never
+aborts the rest of its batch.
+
+BaseImporter holds that loop for every importer, the supplier ones included: a subclass
+builds an instance from a row and writes a batch of them.
+"""
+import csv
+import json
+from collections import namedtuple
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from pharmacy_inventory.routers import read_from_primary
+
+from . import audit
+from .lookups import medicine_forms, dosage_units
+from .models import Product, Medicine, GeneralGood, ProductCategory, ProductStatus, MedicineType
+from .signals import catalog_bulk_changed
+
+DEFAULT_BATCH_SIZE = 1000
+
+RowError = namedtuple("RowError", ["line", "messages"])
+
+
+class ImportResult:
+    """Summary of an import run."""
+
+    def __init__(self):
+        self.created = 0
+        self.errors = []
+
+    @property
+    def failed(self):
+        return len(self.errors)
+
+
+def read_csv(stream):
+    """Yield (line_number, row) pairs from a CSV file with a header row."""
+    reader = csv.DictReader(stream)
+    for row in reader:
+        yield reader.line_num, row
+
+
+def read_jsonl(stream):
+    """Yield (line_number, row) pairs from a JSON Lines file; a bad line yields its error message instead of a row."""
+    for line_number, line in enumerate(stream, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError as exc:
+            yield line_number, f"Invalid JSON: {exc.msg}"
+            continue
+        if not isinstance(row, dict):
+            yield line_number, "Each line must be a JSON object."
+            continue
+        yield line_number, row
+
+
+READERS = {"csv": read_csv, "jsonl": read_jsonl}
+
+# File extensions read as another format
+FORMAT_ALIASES = {"json": "jsonl", "ndjson": "jsonl"}
+
+
+def get_reader(input_format):
+    """Return the row reader of a format ('csv' or 'jsonl'); raises ValueError for others."""
+    try:
+        return READERS[input_format]
+    except KeyError:
+        raise ValueError(f"Unsupported import format '{input_format}'; expected one of {', '.join(READERS)}.")
+
+
+def guess_format(path):
+    """Return the format of a file from its extension, or None when it isn't one of READERS."""
+    input_format = path.suffix.lstrip(".").lower()
+    input_format = FORMAT_ALIASES.get(input_format, input_format)
+    return input_format if input_format in READERS else None
+
+
+def text_field(row, key, default=""):
+    """Return a stripped text value of a row, or the default when it is missing or blank."""
+    value = row.get(key)
+    if value is None or value == "":
+        return default
+    return str(value).strip()
+
+
+class BaseImporter:
+    """Validates input rows one by one and writes them in batches.
+
+    Subclasses implement build() and write_batch(), and may name a result_class with
+    more counters than ImportResult.
+    """
+    result_class = ImportResult
+
+    def __init__(self, batch_size=DEFAULT_BATCH_SIZE):
+        self.batch_size = batch_size
+
+    def build(self, row):
+        """Return the unsaved, validated instance for a row; raises ValidationError."""
+        raise NotImplementedError
+
+    def write_batch(self, batch, result):
+        """Write one batch of (line_number, instance) pairs and count them in the result."""
+        raise NotImplementedError
+
+    def run(self, rows):
+        """Import (line_number, row) pairs and return a result_class instance."""
+        result = self.result_class()
+        batch = []
+        for line_number, row in rows:
+            # The readers yield a message instead of a row for lines they can't parse
+            if isinstance(row, str):
+                result.errors.append(RowError(line_number, [row]))
+                continue
+            try:
+                batch.append((line_number, self.build(row)))
+            except ValidationError as exc:
+                messages = [f"{field}: {message}" for field, field_messages in exc.message_dict.items() for message in field_messages]
+                result.errors.append(RowError(line_number, messages))
+                continue
+
+            if len(batch) >= self.batch_size:
+                self.write_batch(batch, result)
+                batch = []
+
+        if batch:
+            self.write_batch(batch, result)
+        return result
+
+
+class CatalogImporter(BaseImporter):
+    """Turns input rows into unsaved catalog instances and writes them in batches."""
+
+    def __init__(self, batch_size=DEFAULT_BATCH_SIZE):
+        super().__init__(batch_size)
+        # The lookup tables are tiny, so take them from the process cache instead of querying for every row
+        self.forms = medicine_forms.by_name()
+        self.units = dosage_units.by_name()
+
+    def build(self, row):
+        """Return a (product, detail) pair of unsaved, validated instances for a row.
+
+        Raises ValidationError listing every problem found in the row.
+        """
+        product = Product(
+            brand=text_field(row, "brand"),
+            name=text_field(row, "name"),
+            category=text_field(row, "category", ProductCategory.MEDICINE).upper(),
+            status=text_field(row, "status", ProductStatus.DRAFT).upper(),
+        )
+        errors = {}
+        try:
+            product.full_clean()
+        except ValidationError as exc:
+            errors.update(exc.message_dict)
+
+        if product.category == ProductCategory.MEDICINE:
+            detail = self.build_medicine(product, row, errors)
+        else:
+            detail = GeneralGood(product=product, type=text_field(row, "type"), unit=text_field(row, "unit", "-"), notes=text_field(row, "notes"))
+            self.clean_detail(detail, errors)
+
+        if errors:
+            raise ValidationError(errors)
+        return product, detail
+
+    def build_medicine(self, product, row, errors):
+        form_name = text_field(row, "form")
+        form = self.forms.get(form_name.lower())
+        if form is None:
+            errors.setdefault("form", []).append(f"Unknown medicine form '{form_name}'.")
+
+        dosage = text_field(row, "dosage")
+        unit = text_field(row, "dosage_unit")
+        if unit:
+            if unit.lower() not in self.units:
+                errors.setdefault("dosage_unit", []).append(f"Unknown dosage unit '{unit}'.")
+            dosage = f"{dosage} {unit}"
+
+        medicine = Medicine(
+            product=product,
+            generic_name=text_field(row, "generic_name"),
+            dosage=dosage,
+            form=form,
+            usage=text_field(row, "usage"),
+            side_effects=text_field(row, "side_effects"),
+            prescription_type=text_field(row, "prescription_type", MedicineType.PRESCRIPTION).upper(),
+        )
+        self.clean_detail(medicine, errors)
+        return medicine
+
+    def clean_detail(self, detail, errors):
+        # The product isn't saved yet and the form came from the preloaded map, so skip
+        # the checks that would query the database for every row
+        try:
+            detail.full_clean(exclude=["product", "form"], validate_unique=False)
+        except ValidationError as exc:
+            for field, messages in exc.message_dict.items():
+                errors.setdefault(field, []).extend(messages)
+
+    def write_batch(self, batch, result):
+        """Insert one batch of (line_number, (product, detail)) pairs in a single transaction."""
+        batch = [pair for _, pair in batch]
+        with transaction.atomic():
+            products = Product.objects.bulk_create([product for product, _ in batch])
+            medicines, general_goods = [], []
+            for product, detail in batch:
+                # Re-assign so the detail picks up the primary key set by bulk_create
+                detail.product = product
+                (medicines if isinstance(detail, Medicine) else general_goods).append(detail)
+            Medicine.objects.bulk_create(medicines)
+            GeneralGood.objects.bulk_create(general_goods)
+            catalog_bulk_changed.send(sender=Product, product_ids=[product.pk for product in products])
+            # bulk_create skips the audit receivers too
+            for product, detail in batch:
+                audit.record_saved(product, created=True)
+                audit.record_saved(detail, created=True)
+        result.created += len(products)
+
+
+def import_catalog(stream, format="csv", batch_size=DEFAULT_BATCH_SIZE):
+    """Import catalog rows from an open text stream in the given format ('csv' or 'jsonl')."""
+    reader = get_reader(format)
+    # Rows are matched against what is already stored, which a lagging replica may not have yet
+    with read_from_primary():
+        return CatalogImporter(batch_size=batch_size).run(reader(stream))
@@ -0,0 +1,116 @@
+"""Process-local read-through cache of the small lookup tables (medicine forms and dosage units).
+
+Each process keeps the whole table in memory, mapped by id and by name. Writes in this
+process drop the local copy straight away through the receivers in products.signals, and
+bump a version counter kept in the Django cache; other processes compare that counter
+with the version they loaded (at most every `check_interval` seconds) and reload when it
+has moved on. That only reaches the other processes when the cache is shared by them
+(see the products.E001 check).
+
+A lookup by id that misses the copy reads that one row from the database and keeps it, so
+rows created by another process since the last check, or with bulk_create (which sends
+no signal), are found too. Lookups by name don't: they check user input, and an unknown
+name is the common case there.
+"""
+import threading
+import time
+
+from django.core.cache import cache
+
+from pharmacy_inventory.routers import read_from_primary
+
+from .models import MedicineForm, DosageUnit
+
+VERSION_KEY_PREFIX = "products:lookups:version:"
+
+# Seconds between two checks of the shared version counter
+DEFAULT_CHECK_INTERVAL = 1.0
+
+
+class LookupCache:
+    """In-memory copy of a lookup table, keyed by id and by case-insensitive name."""
+
+    def __init__(self, model, check_interval=DEFAULT_CHECK_INTERVAL):
+        self.model = model
+        self.check_interval = check_interval
+        self.version_key = f"{VERSION_KEY_PREFIX}{model._meta.label_lower}"
+        self._lock = threading.Lock()
+        self._by_id = None
+        self._by_name = None
+        self._version = None
+        self._checked_at = 0.0
+
+    def _shared_version(self):
+        return cache.get(self.version_key, 0)
+
+    def _load(self):
+        # Read the version before the rows, so a write landing in between triggers another reload
+        version = self._shared_version()
+        # From the primary, as a stale replica copy would be kept until the next write
+        with read_from_primary():
+            objects = list(self.model._default_manager.order_by("pk"))
+        self._by_id = {obj.pk: obj for obj in objects}
+        self._by_name = {obj.name.lower(): obj for obj in objects}
+        self._version = version
+        self._checked_at = time.monotonic()
+
+    def _maps(self):
+        with self._lock:
+            if self._by_id is None:
+                self._load()
+            elif time.monotonic() - self._checked_at >= self.check_interval:
+                if self._shared_version() != self._version:
+                    self._load()
+                else:
+                    self._checked_at = time.monotonic()
+            return self._by_id, self._by_name
+
+    def get(self, pk):
+        """Return the object with the given id, or None when the table has no such row."""
+        obj = self._maps()[0].get(pk)
+        if obj is None and pk is not None:
+            obj = self._fetch(pk)
+        return obj
+
+    def _fetch(self, pk):
+        with read_from_primary():
+            obj = self.model._default_manager.filter(pk=pk).first()
+        if obj is not None:
+            with self._lock:
+                if self._by_id is not None:
+                    self._by_id[obj.pk] = obj
+                    self._by_name[obj.name.lower()] = obj
+        return obj
+
+    def get_by_name(self, name):
+        """Return the object with the given name (ignoring case), or None."""
+        return self._maps()[1].get(name.lower())
+
+    def all(self):
+        """Return every object of the table, in id order."""
+        return list(self._maps()[0].values())
+
+    def by_name(self):
+        """Return a copy of the lower-cased name -> object map."""
+        return dict(self._maps()[1])
+
+    def clear(self):
+        """Drop this process' copy; the next lookup reloads the table."""
+        with self._lock:
+            self._by_id = self._by_name = None
+
+    def invalidate(self):
+        """Drop this process' copy and tell the other processes to drop theirs."""
+        self.clear()
+        if not cache.add(self.version_key, 1, timeout=None):
+            try:
+                cache.incr(self.version_key)
+            except ValueError:
+                # The key expired or was evicted between add() and incr()
+                cache.set(self.version_key, 1, timeout=None)
+
+
+medicine_forms = LookupCache(MedicineForm)
+dosage_units = LookupCache(DosageUnit)
+
+LOOKUP_CACHES = {MedicineForm: medicine_forms, DosageUnit: dosage_units}
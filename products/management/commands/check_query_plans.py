@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from ...queryplans import catalog_queries, find_table_scans
+
+
+class Command(BaseCommand):
+    help = "Run EXPLAIN on the hot catalog queries and fail if any of them falls back to a full table scan."
+
+    def handle(self, *args, **options):
+        queries = catalog_queries()
+        scans = find_table_scans(queries)
+
+        for label, table, plan in scans:
+            self.stderr.write(f"{label}: full scan of {table}\n{plan}")
+
+        if scans:
+            raise CommandError(f"{len(scans)} catalog queries fall back to a table scan.")
+
+        self.stdout.write(self.style.SUCCESS(f"All {len(queries)} catalog queries use an index."))
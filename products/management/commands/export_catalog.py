@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from ...exporters import DEFAULT_CHUNK_SIZE, WRITERS, export_catalog
+
+
+class Command(BaseCommand):
+    help = "Stream the full product catalog with medicine and general good details as CSV or JSON Lines."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--output", "-o", help="File to write to; defaults to standard output.")
+        parser.add_argument("--format", choices=sorted(WRITERS), default="csv")
+        parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Rows fetched from the database at a time.")
+
+    def handle(self, *args, **options):
+        if options["chunk_size"] < 1:
+            raise CommandError("--chunk-size must be at least 1.")
+
+        if options["output"]:
+            with open(options["output"], "w", newline="", encoding="utf-8") as stream:
+                export_catalog(stream, options["format"], options["chunk_size"])
+            self.stderr.write(self.style.SUCCESS(f"Catalog exported to {options['output']}."))
+        else:
+            export_catalog(self.stdout, options["format"], options["chunk_size"])
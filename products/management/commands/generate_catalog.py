@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from ...generator import DEFAULT_BATCH_SIZE, generate_catalog
+
+
+class Command(BaseCommand):
+    help = "Bulk-create a synthetic catalog of medicines and general goods with forms, units, barcodes and supplier prices."
+
+    def add_arguments(self, parser):
+        parser.add_argument("products", type=int, help="Number of products to create.")
+        parser.add_argument("--suppliers", type=int, default=10, help="Number of suppliers to create.")
+        parser.add_argument("--medicine-share", type=float, default=0.6, help="Fraction of products that are medicines.")
+        parser.add_argument("--prices-per-product", type=int, default=2, help="Supplier price lines per product.")
+        parser.add_argument("--seed", type=int, default=0, help="Random seed; the same seed gives the same catalog.")
+        parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Products written per transaction.")
+
+    def handle(self, *args, **options):
+        if options["products"] < 0:
+            raise CommandError("The number of products can't be negative.")
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be at least 1.")
+        if not 0 <= options["medicine_share"] <= 1:
+            raise CommandError("--medicine-share must be between 0 and 1.")
+        if options["prices_per_product"] and options["suppliers"] < 1:
+            raise CommandError("Supplier prices need at least one supplier; pass --suppliers or --prices-per-product 0.")
+
+        def progress(counts):
+            if options["verbosity"] > 1:
+                self.stderr.write(f"{counts.products} / {options['products']} products")
+
+        counts = generate_catalog(
+            options["products"],
+            suppliers=options["suppliers"],
+            seed=options["seed"],
+            medicine_share=options["medicine_share"],
+            prices_per_product=options["prices_per_product"],
+            batch_size=options["batch_size"],
+            progress=progress,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {counts.products} products ({counts.medicines} medicines, {counts.general_goods} general goods), "
+            f"{counts.barcodes} barcodes, {counts.suppliers} suppliers and {counts.prices} supplier prices."
+        ))
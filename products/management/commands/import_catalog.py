@@ -0,0 +1,14 @@
+from ...audit import acting_as
+from ...importers import import_catalog
+from ..importing import ImportCommand
+
+
+class Command(ImportCommand):
+    help = "Bulk import products with their medicine or general good details from a CSV or JSON Lines file."
+
+    def handle(self, *args, **options):
+        with self.open_input(options) as (stream, input_format), acting_as("import_catalog"):
+            result = import_catalog(stream, format=input_format, batch_size=options["batch_size"])
+
+        self.report_errors(result, options["max_errors"])
+        self.stdout.write(self.style.SUCCESS(f"Imported {result.created} products, {result.failed} rows rejected."))
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from ... import catalog
+
+
+class Command(BaseCommand):
+    help = "Rebuild the flattened catalog read table from the product, medicine and general good tables."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--check", action="store_true", help="Only report products whose entry is out of date; exit with an error if any.")
+
+    def handle(self, *args, **options):
+        if options["check"]:
+            drift = catalog.find_drift()
+            if drift:
+                shown = ", ".join(str(product_id) for product_id in drift[:20])
+                raise CommandError(f"{len(drift)} catalog entries out of date (products {shown}{', ...' if len(drift) > 20 else ''}).")
+            self.stdout.write(self.style.SUCCESS("The catalog entries match the catalog."))
+            return
+
+        with transaction.atomic():
+            count = catalog.rebuild()
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {count} catalog entries."))
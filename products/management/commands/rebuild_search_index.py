@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from ... import search
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text search index of the product catalog from scratch."
+
+    def handle(self, *args, **options):
+        if not search.is_available():
+            self.stdout.write(self.style.WARNING("The catalog database has no FTS5 support; nothing to rebuild."))
+            return
+
+        with transaction.atomic():
+            indexed = search.rebuild_index()
+
+        self.stdout.write(self.style.SUCCESS(f"Indexed {indexed} products."))
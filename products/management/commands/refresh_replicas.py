@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from pharmacy_inventory.db import refresh_replica
+
+
+class Command(BaseCommand):
+    help = "Copy the primary SQLite database into the files of the read replicas."
+
+    def add_arguments(self, parser):
+        parser.add_argument("aliases", nargs="*", help="Replica aliases to refresh; defaults to every one in DATABASE_REPLICAS.")
+
+    def handle(self, *args, **options):
+        replicas = getattr(settings, "DATABASE_REPLICAS", [])
+        aliases = options["aliases"] or replicas
+        if not aliases:
+            raise CommandError("No read replicas are configured; set PHARMACY_SQLITE_REPLICAS.")
+        unknown = [alias for alias in aliases if alias not in replicas]
+        if unknown:
+            raise CommandError(f"Not a read replica: {', '.join(unknown)}.")
+
+        for alias in aliases:
+            try:
+                pages = refresh_replica(alias)
+            except ValueError as error:
+                raise CommandError(str(error))
+            self.stdout.write(self.style.SUCCESS(f"Refreshed {alias} ({pages} pages)."))
@@ -0,0 +1,42 @@
+"""Shared arguments, file handling and error report of the import_* management commands."""
+from contextlib import contextmanager
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ..importers import DEFAULT_BATCH_SIZE, READERS, guess_format
+
+
+class ImportCommand(BaseCommand):
+    """Base of the commands importing a CSV or JSON Lines file through one of the importers."""
+    # What a batch of the import holds, for the help of --batch-size
+    batch_items = "Rows"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV (with a header row) or JSON Lines file to import.")
+        parser.add_argument("--format", choices=sorted(READERS), help="Input format; guessed from the file extension when left out.")
+        parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help=f"{self.batch_items} written per transaction.")
+        parser.add_argument("--max-errors", type=int, default=50, help="Maximum number of row errors to print.")
+
+    @contextmanager
+    def open_input(self, options):
+        """Check the file and batch size options, then yield the open file and its format."""
+        path = Path(options["path"])
+        if not path.exists():
+            raise CommandError(f"File '{path}' does not exist.")
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be at least 1.")
+
+        input_format = options["format"] or guess_format(path)
+        if input_format is None:
+            raise CommandError(f"Can't guess the format of '{path}'; pass --format.")
+
+        with path.open(newline="", encoding="utf-8") as stream:
+            yield stream, input_format
+
+    def report_errors(self, result, max_errors):
+        """Print the row errors of an import result, up to `max_errors` of them."""
+        for error in result.errors[:max_errors]:
+            self.stderr.write(f"line {error.line}: {'; '.join(error.messages)}")
+        if result.failed > max_errors:
+            self.stderr.write(f"... and {result.failed - max_errors} more row errors")
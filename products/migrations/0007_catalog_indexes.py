@@ -0,0 +1,55 @@
+# Generated by Django 5.2.3 on 2026-10-18 06:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0006_remove_product_description_generalgood_notes_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='product',
+            name='category',
+            field=models.CharField(choices=[('GG', 'General Goods'), ('MEDICINE', 'Medicine')], default='MEDICINE', max_length=10),
+        ),
+        migrations.AlterField(
+            model_name='product',
+            name='status',
+            field=models.CharField(default='DRAFT', max_length=15),
+        ),
+        migrations.AddIndex(
+            model_name='medicine',
+            index=models.Index(fields=['generic_name'], name='medicine_generic_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='medicine',
+            index=models.Index(fields=['prescription_type', 'generic_name'], name='medicine_rx_generic_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['name'], name='product_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['brand', 'name'], name='product_brand_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['date_created'], name='product_date_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['category', 'status', 'date_created'], name='product_cat_status_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['status', 'date_created'], name='product_status_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(('category', 'MEDICINE'), ('status', 'PUBLISHED')), fields=['name'], name='product_published_med_idx'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    # FTS5 is an SQLite feature; other databases use the LIKE fallback in products.search
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    schema_editor.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS products_product_fts USING fts5("
+        "brand, name, generic_name, usage, notes, "
+        "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+    )
+    schema_editor.execute(
+        "INSERT INTO products_product_fts (rowid, brand, name, generic_name, usage, notes) "
+        "SELECT p.id, p.brand, p.name, COALESCE(m.generic_name, ''), COALESCE(m.usage, ''), COALESCE(g.notes, '') "
+        "FROM products_product p "
+        "LEFT JOIN products_medicine m ON m.product_id = p.id "
+        "LEFT JOIN products_generalgood g ON g.product_id = p.id"
+    )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    schema_editor.execute("DROP TABLE IF EXISTS products_product_fts")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0007_catalog_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
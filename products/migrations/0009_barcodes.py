@@ -0,0 +1,24 @@
+# Generated by Django 5.2.3 on 2026-10-18 06:33
+
+import django.db.models.deletion
+import products.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0008_product_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Barcode',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('code', models.CharField(max_length=14, unique=True, validators=[products.validators.validate_gtin])),
+                ('date_created', models.DateTimeField(auto_now_add=True)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='barcodes', to='products.product')),
+            ],
+        ),
+    ]
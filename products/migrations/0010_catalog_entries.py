@@ -0,0 +1,49 @@
+# Generated by Django 5.2.3 on 2026-10-18 06:46
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def populate_catalog_entries(apps, schema_editor):
+    schema_editor.execute(
+        "INSERT INTO products_catalogentry "
+        "(product_id, brand, name, category, status, date_created, generic_name, form, dosage, prescription_type, unit) "
+        "SELECT p.id, p.brand, p.name, p.category, p.status, p.date_created, "
+        "COALESCE(m.generic_name, ''), COALESCE(f.name, ''), COALESCE(m.dosage, ''), "
+        "COALESCE(m.prescription_type, ''), COALESCE(g.unit, '') "
+        "FROM products_product p "
+        "LEFT JOIN products_medicine m ON m.product_id = p.id "
+        "LEFT JOIN products_medicineform f ON f.id = m.form_id "
+        "LEFT JOIN products_generalgood g ON g.product_id = p.id"
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0009_barcodes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CatalogEntry',
+            fields=[
+                ('product', models.OneToOneField(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='catalog_entry', serialize=False, to='products.product')),
+                ('brand', models.CharField(max_length=150)),
+                ('name', models.CharField(max_length=150)),
+                ('category', models.CharField(choices=[('GG', 'General Goods'), ('MEDICINE', 'Medicine')], max_length=10)),
+                ('status', models.CharField(max_length=15)),
+                ('date_created', models.DateTimeField()),
+                ('generic_name', models.CharField(blank=True, max_length=250)),
+                ('form', models.CharField(blank=True, max_length=30)),
+                ('dosage', models.CharField(blank=True, max_length=150)),
+                ('prescription_type', models.CharField(blank=True, choices=[('OTC', 'Over-the-counter'), ('PRESCRIPTION', 'Prescription Drugs')], max_length=15)),
+                ('unit', models.CharField(blank=True, max_length=20)),
+            ],
+            options={
+                'verbose_name_plural': 'catalog entries',
+                'indexes': [models.Index(fields=['category', 'status', 'date_created'], name='catentry_cat_status_date_idx'), models.Index(fields=['status', 'date_created'], name='catentry_status_date_idx'), models.Index(fields=['name'], name='catentry_name_idx'), models.Index(fields=['generic_name'], name='catentry_generic_name_idx'), models.Index(fields=['prescription_type', 'generic_name'], name='catentry_rx_generic_idx'), models.Index(fields=['form', 'generic_name'], name='catentry_form_generic_idx')],
+            },
+        ),
+        migrations.RunPython(populate_catalog_entries, migrations.RunPython.noop),
+    ]
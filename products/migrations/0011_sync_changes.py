@@ -0,0 +1,67 @@
+# Generated by Django 5.2.3 on 2026-10-18 06:48
+
+from django.db import migrations, models
+
+
+def backfill(apps, schema_editor):
+    # Rows that existed before the field was added were last changed no later than they were created
+    for table in ("products_product", "products_medicine", "products_generalgood"):
+        schema_editor.execute(f"UPDATE {table} SET date_updated = date_created")
+    # Every existing product is a change a terminal syncing from scratch has to see
+    schema_editor.execute(
+        "INSERT INTO products_syncchange (kind, object_id, deleted, date_changed) "
+        "SELECT 'PRODUCT', id, %s, date_created FROM products_product ORDER BY id",
+        [False],
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0010_catalog_entries'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SyncChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('PRODUCT', 'Product'), ('SUPPLIER', 'Supplier')], max_length=10)),
+                ('object_id', models.BigIntegerField()),
+                ('deleted', models.BooleanField(default=False)),
+                ('date_changed', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='generalgood',
+            name='date_updated',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='medicine',
+            name='date_updated',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='date_updated',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddIndex(
+            model_name='generalgood',
+            index=models.Index(fields=['date_updated'], name='generalgood_date_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='medicine',
+            index=models.Index(fields=['date_updated'], name='medicine_date_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['date_updated'], name='product_date_updated_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='syncchange',
+            constraint=models.UniqueConstraint(fields=('kind', 'object_id'), name='syncchange_kind_object_uniq'),
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
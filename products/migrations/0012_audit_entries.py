@@ -0,0 +1,29 @@
+# Generated by Django 5.2.3 on 2026-10-18 07:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0011_sync_changes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuditEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(max_length=100)),
+                ('object_id', models.BigIntegerField()),
+                ('action', models.CharField(choices=[('CREATE', 'Create'), ('UPDATE', 'Update'), ('DELETE', 'Delete')], max_length=10)),
+                ('changes', models.JSONField(default=dict)),
+                ('actor', models.CharField(blank=True, max_length=150)),
+                ('date_changed', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name_plural': 'audit entries',
+                'indexes': [models.Index(fields=['model', 'object_id', 'date_changed'], name='auditentry_object_date_idx'), models.Index(fields=['date_changed'], name='auditentry_date_idx')],
+            },
+        ),
+    ]
@@ -1,5 +1,7 @@
 from django.db import models
 
+from .validators import normalize_gtin, validate_gtin
+
 class ProductCategory(models.TextChoices):
     """Constant choices for product category."""
     GENERAL_GOODS = "GG", "General Goods"
@@ -10,6 +12,12 @@ class MedicineType(models.TextChoices):
     OTC = "OTC", "Over-the-counter"
     PRESCRIPTION = "PRESCRIPTION", "Prescription Drugs"
 
+class ProductStatus(models.TextChoices):
+    """Constant values for the product publishing workflow."""
+    DRAFT = "DRAFT", "Draft"
+    PUBLISHED = "PUBLISHED", "Published"
+    RETIRED = "RETIRED", "Retired"
+
 class Product(models.Model):
     """General details about the product of the inventory."""
     brand = models.CharField(max_length=150)
@@ -19,6 +27,24 @@ class Product(models.Model):
     # description = models.TextField()
     status = models.CharField(max_length=15, default="DRAFT") # will be used to create draft products before publishing
     date_created = models.DateTimeField(auto_now_add=True)
+    date_updated = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["name"], name="product_name_idx"),
+            models.Index(fields=["date_updated"], name="product_date_updated_idx"),
+            models.Index(fields=["brand", "name"], name="product_brand_name_idx"),
+            models.Index(fields=["date_created"], name="product_date_created_idx"),
+            # Listing screens filter on category and/or status and show the newest first
+            models.Index(fields=["category", "status", "date_created"], name="product_cat_status_date_idx"),
+            models.Index(fields=["status", "date_created"], name="product_status_date_idx"),
+            # The storefront only ever lists published medicines, so keep that index small
+            models.Index(
+                fields=["name"],
+                name="product_published_med_idx",
+                condition=models.Q(category=ProductCategory.MEDICINE, status=ProductStatus.PUBLISHED),
+            ),
+        ]
     
     def __str__(self):
         """Return a string representation of the model."""
@@ -54,6 +80,14 @@ class Medicine(models.Model):
     side_effects = models.TextField()
     prescription_type = models.CharField(max_length=15, choices=MedicineType.choices, default=MedicineType.PRESCRIPTION)
     date_created = models.DateTimeField(auto_now_add=True)
+    date_updated = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["generic_name"], name="medicine_generic_name_idx"),
+            models.Index(fields=["date_updated"], name="medicine_date_updated_idx"),
+            models.Index(fields=["prescription_type", "generic_name"], name="medicine_rx_generic_idx"),
+        ]
 
     def __str__(self):
         """Return a string representation of the model."""
@@ -67,7 +101,137 @@ class GeneralGood(models.Model):
     unit = models.CharField(max_length=20, default="-")
     notes = models.TextField()
     date_created = models.DateTimeField(auto_now_add=True)
+    date_updated = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["date_updated"], name="generalgood_date_updated_idx"),
+        ]
+
+    def __str__(self):
+        """Return a string representation of the model."""
+        return self.product.name
+
+class Barcode(models.Model):
+    """A GTIN (EAN/UPC barcode) printed on a product; a product can carry several."""
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="barcodes")
+    # Stored as 14 digits, so the UPC-A and EAN-13 forms of the same code are one barcode
+    code = models.CharField(max_length=14, unique=True, validators=[validate_gtin])
+    date_created = models.DateTimeField(auto_now_add=True)
+
+    def clean(self):
+        """Normalize the code before the uniqueness check, so its other forms count as duplicates."""
+        self.normalize_code()
+
+    def save(self, *args, **kwargs):
+        """Store the code in its 14-digit form."""
+        self.normalize_code()
+        super().save(*args, **kwargs)
+
+    def normalize_code(self):
+        # Invalid codes are left as they are for validate_gtin to reject
+        try:
+            self.code = normalize_gtin(self.code)
+        except ValueError:
+            pass
+
+    def __str__(self):
+        """Return a string representation of the model."""
+        return self.code
+
+class CatalogEntry(models.Model):
+    """Flattened read-only copy of a product with its medicine or general good detail.
+
+    List screens read this one table instead of joining the product, its detail and the
+    medicine form. Rows are maintained by products.catalog through the receivers in
+    products.signals; don't write to it directly.
+    """
+    # No foreign key constraint: the receivers drop the row after its product is deleted,
+    # and a cascade would fight the detail receivers that refresh it during the same delete
+    product = models.OneToOneField(Product, primary_key=True, on_delete=models.DO_NOTHING, db_constraint=False, related_name="catalog_entry")
+    brand = models.CharField(max_length=150)
+    name = models.CharField(max_length=150)
+    category = models.CharField(max_length=10, choices=ProductCategory.choices)
+    status = models.CharField(max_length=15)
+    date_created = models.DateTimeField()
+    # Left empty when the product has no medicine detail
+    generic_name = models.CharField(max_length=250, blank=True)
+    form = models.CharField(max_length=30, blank=True)
+    dosage = models.CharField(max_length=150, blank=True)
+    prescription_type = models.CharField(max_length=15, choices=MedicineType.choices, blank=True)
+    # Left empty when the product has no general good detail
+    unit = models.CharField(max_length=20, blank=True)
+
+    class Meta:
+        verbose_name_plural = "catalog entries"
+        indexes = [
+            models.Index(fields=["category", "status", "date_created"], name="catentry_cat_status_date_idx"),
+            models.Index(fields=["status", "date_created"], name="catentry_status_date_idx"),
+            models.Index(fields=["name"], name="catentry_name_idx"),
+            models.Index(fields=["generic_name"], name="catentry_generic_name_idx"),
+            models.Index(fields=["prescription_type", "generic_name"], name="catentry_rx_generic_idx"),
+            models.Index(fields=["form", "generic_name"], name="catentry_form_generic_idx"),
+        ]
+
+    def __str__(self):
+        """Return a string representation of the model."""
+        return self.name
+
+class SyncKind(models.TextChoices):
+    """Constant choices for the kinds of objects the POS terminals sync."""
+    PRODUCT = "PRODUCT", "Product"
+    SUPPLIER = "SUPPLIER", "Supplier"
+
+class SyncChange(models.Model):
+    """Latest change of a synced object; the id is the cursor of the changes feed.
+
+    Every change replaces the object's row with a new one, so the table holds one row
+    per object ever synced and a terminal catching up reads each object once. Deleted
+    objects keep a row with `deleted` set (their tombstone).
+    """
+    kind = models.CharField(max_length=10, choices=SyncKind.choices)
+    object_id = models.BigIntegerField()
+    deleted = models.BooleanField(default=False)
+    date_changed = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["kind", "object_id"], name="syncchange_kind_object_uniq"),
+        ]
+
+    def __str__(self):
+        """Return a string representation of the model."""
+        return f"{self.kind} {self.object_id}{' (deleted)' if self.deleted else ''}"
+
+class AuditAction(models.TextChoices):
+    """Constant choices for the kind of change an audit entry records."""
+    CREATE = "CREATE", "Create"
+    UPDATE = "UPDATE", "Update"
+    DELETE = "DELETE", "Delete"
+
+class AuditEntry(models.Model):
+    """One change to a catalog or supplier record, with the fields it changed. Append-only.
+
+    Written in batches by products.audit; `changes` maps every changed field to its
+    [old, new] pair, with None on the missing side of creates and deletes.
+    """
+    # App label and model name, such as "products.medicine"
+    model = models.CharField(max_length=100)
+    object_id = models.BigIntegerField()
+    action = models.CharField(max_length=10, choices=AuditAction.choices)
+    changes = models.JSONField(default=dict)
+    # Username of whoever made the change, or the name of the job that did
+    actor = models.CharField(max_length=150, blank=True)
+    # When the change was made, not when the entry was written
+    date_changed = models.DateTimeField()
+
+    class Meta:
+        verbose_name_plural = "audit entries"
+        indexes = [
+            models.Index(fields=["model", "object_id", "date_changed"], name="auditentry_object_date_idx"),
+            models.Index(fields=["date_changed"], name="auditentry_date_idx"),
+        ]
 
     def __str__(self):
         """Return a string representation of the model."""
-        return self.product.name
\ No newline at end of file
+        return f"{self.get_action_display()} {self.model} {self.object_id}"
@@ -0,0 +1,69 @@
+"""EXPLAIN based checks that the hot catalog queries are served by an index."""
+import re
+from datetime import datetime, timezone
+
+from django.db import connections
+
+from . import api
+from .models import Product, Medicine, CatalogEntry, ProductCategory, ProductStatus, MedicineType
+
+
+def catalog_queries():
+    """Return the (label, queryset) pairs of the catalog queries that must never scan a table."""
+    since = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    return [
+        ("product by category and status", Product.objects.filter(category=ProductCategory.MEDICINE, status=ProductStatus.PUBLISHED).order_by("-date_created")),
+        ("product by status", Product.objects.filter(status=ProductStatus.DRAFT).order_by("-date_created")),
+        ("product by name", Product.objects.filter(name="Biogesic")),
+        ("product by brand and name", Product.objects.filter(brand="Unilab", name="Biogesic")),
+        ("product created since", Product.objects.filter(date_created__gte=since)),
+        ("published medicines by name", Product.objects.filter(category=ProductCategory.MEDICINE, status=ProductStatus.PUBLISHED, name="Biogesic")),
+        ("medicine by generic name", Medicine.objects.filter(generic_name="paracetamol")),
+        ("medicine by prescription type", Medicine.objects.filter(prescription_type=MedicineType.OTC)),
+        ("api page after cursor", api.product_page_queryset({"category": ProductCategory.MEDICINE, "status": ProductStatus.PUBLISHED}, "date_created", True, (since, 1000))),
+        ("api page by name after cursor", api.product_page_queryset({}, "name", False, ("Biogesic", 1000))),
+        ("catalog entries by category and status", CatalogEntry.objects.filter(category=ProductCategory.MEDICINE, status=ProductStatus.PUBLISHED).order_by("-date_created")),
+        ("catalog entries by prescription type", CatalogEntry.objects.filter(prescription_type=MedicineType.OTC, generic_name="paracetamol")),
+        ("catalog entries by form", CatalogEntry.objects.filter(form="Tablet").order_by("generic_name")),
+    ]
+
+
+# A plain 'SCAN <table>' reads every row; 'SCAN <table> USING INDEX' only walks an index in order
+# The \b keeps the lookahead from backtracking into the table name
+SQLITE_TABLE_SCAN = re.compile(r"\bSCAN (\w+)\b(?! USING (?:COVERING )?INDEX)")
+POSTGRES_TABLE_SCAN = re.compile(r"\bSeq Scan on (\w+)")
+# Subqueries, e.g. the one Django wraps a window filter in, are scanned as they're produced
+SQLITE_SUBQUERY = re.compile(r"\b(?:CO-ROUTINE|MATERIALIZE) (\w+)")
+
+
+def explain(queryset):
+    """Return the query plan of a queryset as text, one line per plan step.
+
+    Built from the compiled SQL, as QuerySet.explain() can't explain a query filtering on
+    a window function: Django wraps those in a subquery and the EXPLAIN ends up inside it.
+    """
+    connection = connections[queryset.db]
+    sql, params = queryset.query.get_compiler(queryset.db).as_sql()
+    prefix = "EXPLAIN" if connection.vendor == "postgresql" else "EXPLAIN QUERY PLAN"
+    with connection.cursor() as cursor:
+        cursor.execute(f"{prefix} {sql}", params)
+        # The step is the last column: SQLite's detail, PostgreSQL's only one
+        return "\n".join(str(row[-1]) for row in cursor.fetchall())
+
+
+def find_table_scans(queries=None):
+    """Return a list of (label, table, plan) for every query whose plan falls back to a full table scan."""
+    if queries is None:
+        queries = catalog_queries()
+
+    scans = []
+    for label, queryset in queries:
+        plan = explain(queryset)
+        if connections[queryset.db].vendor == "postgresql":
+            tables = POSTGRES_TABLE_SCAN.findall(plan)
+        else:
+            subqueries = set(SQLITE_SUBQUERY.findall(plan))
+            tables = [table for table in SQLITE_TABLE_SCAN.findall(plan) if table not in subqueries]
+        for table in tables:
+            scans.append((label, table, plan))
+    return scans
@@ -0,0 +1,122 @@
+"""Full-text search over the product catalog, backed by an SQLite FTS5 table.
+
+The FTS table keeps one row per product (rowid = product id) holding the text of the
+product together with its medicine or general good detail. It lives in the same
+database as the catalog, so writes to it commit or roll back with the catalog rows.
+"""
+import re
+
+from django.db import connections, router
+
+from .models import Product
+
+FTS_TABLE = "products_product_fts"
+
+# Column order of the FTS table (created in migration 0008); weights are used by bm25() when ranking
+FTS_COLUMNS = ("brand", "name", "generic_name", "usage", "notes")
+FTS_WEIGHTS = (8.0, 10.0, 10.0, 1.0, 1.0)
+
+# Pulls the searchable text of products together with their detail rows in one query
+DOCUMENT_SQL = """
+    SELECT p.id, p.brand, p.name, COALESCE(m.generic_name, ''), COALESCE(m.usage, ''), COALESCE(g.notes, '')
+    FROM products_product p
+    LEFT JOIN products_medicine m ON m.product_id = p.id
+    LEFT JOIN products_generalgood g ON g.product_id = p.id
+"""
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def _connection():
+    return connections[router.db_for_write(Product)]
+
+
+def is_available(connection=None):
+    """Return True when the catalog database supports the FTS5 index."""
+    connection = connection or _connection()
+    return connection.vendor == "sqlite"
+
+
+def build_match_expression(query):
+    """Turn free text typed by a user into a safe FTS5 MATCH expression.
+
+    Every word becomes a quoted prefix term, so "amox 500" matches "amoxicillin 500mg"
+    and characters with a meaning in the FTS5 query syntax can't break the query.
+    """
+    tokens = TOKEN_RE.findall(query.lower())
+    return " ".join(f'"{token}"*' for token in tokens)
+
+
+def index_products(product_ids):
+    """Insert or refresh the search rows of the given products."""
+    product_ids = list(product_ids)
+    connection = _connection()
+    if not product_ids or not is_available(connection):
+        return
+
+    placeholders = ", ".join(["%s"] * len(product_ids))
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid IN ({placeholders})", product_ids)
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE} (rowid, {', '.join(FTS_COLUMNS)}) {DOCUMENT_SQL} WHERE p.id IN ({placeholders})",
+            product_ids,
+        )
+
+
+def remove_products(product_ids):
+    """Drop the search rows of the given products."""
+    product_ids = list(product_ids)
+    connection = _connection()
+    if not product_ids or not is_available(connection):
+        return
+
+    placeholders = ", ".join(["%s"] * len(product_ids))
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid IN ({placeholders})", product_ids)
+
+
+def rebuild_index():
+    """Repopulate the whole search index from the catalog tables and return the number of rows indexed."""
+    connection = _connection()
+    if not is_available(connection):
+        return 0
+
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE}")
+        cursor.execute(f"INSERT INTO {FTS_TABLE} (rowid, {', '.join(FTS_COLUMNS)}) {DOCUMENT_SQL}")
+        # Merge the segments written by the bulk insert so queries touch as few b-trees as possible
+        cursor.execute(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('optimize')")
+        cursor.execute(f"SELECT COUNT(*) FROM {FTS_TABLE}")
+        return cursor.fetchone()[0]
+
+
+def search_ids(query, limit=20):
+    """Return a list of (product_id, score) for the best matches of the query, best match first.
+
+    Lower scores are better, as returned by FTS5's bm25().
+    """
+    expression = build_match_expression(query)
+    if not expression:
+        return []
+
+    connection = _connection()
+    if not is_available(connection):
+        # Other databases fall back to the slow but equivalent LIKE search
+        products = Product.objects.filter(name__icontains=query).order_by("name").values_list("id", flat=True)[:limit]
+        return [(product_id, 0.0) for product_id in products]
+
+    weights = ", ".join(str(weight) for weight in FTS_WEIGHTS)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT rowid, bm25({FTS_TABLE}, {weights}) AS score FROM {FTS_TABLE} "
+            f"WHERE {FTS_TABLE} MATCH %s ORDER BY score LIMIT %s",
+            [expression, limit],
+        )
+        return cursor.fetchall()
+
+
+def search_products(query, limit=20):
+    """Return the Product instances that best match the query, best match first."""
+    ranked = search_ids(query, limit)
+    products = Product.objects.in_bulk([product_id for product_id, _ in ranked])
+    return [products[product_id] for product_id, _ in ranked if product_id in products]
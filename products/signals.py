@@ -0,0 +1,234 @@
+"""Signal receivers that keep the derived catalog structures in sync with the catalog tables."""
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_init, post_save, post_delete
+from django.dispatch import Signal, receiver
+
+from . import audit, cache, catalog, fuzzy, search, sync
+from .barcodes import barcodes
+from .lookups import LOOKUP_CACHES
+from .models import Product, Medicine, GeneralGood, MedicineForm, DosageUnit, Barcode, SyncKind
+
+# Sent with `product_ids` after products or their detail rows were written in bulk
+# (bulk_create/update), which bypasses the per-instance save and delete signals.
+catalog_bulk_changed = Signal()
+
+
+@receiver(post_save, sender=Product, dispatch_uid="products_search_product_saved")
+def index_saved_product(sender, instance, raw=False, **kwargs):
+    """Refresh the search row of a product when it is saved."""
+    if raw:
+        return
+    search.index_products([instance.pk])
+
+
+@receiver(post_delete, sender=Product, dispatch_uid="products_search_product_deleted")
+def remove_deleted_product(sender, instance, **kwargs):
+    """Drop the search row of a deleted product."""
+    search.remove_products([instance.pk])
+
+
+@receiver(post_save, sender=Medicine, dispatch_uid="products_search_medicine_saved")
+@receiver(post_save, sender=GeneralGood, dispatch_uid="products_search_generalgood_saved")
+@receiver(post_delete, sender=Medicine, dispatch_uid="products_search_medicine_deleted")
+@receiver(post_delete, sender=GeneralGood, dispatch_uid="products_search_generalgood_deleted")
+def index_detail_product(sender, instance, raw=False, **kwargs):
+    """Refresh the search row of the product a medicine or general good belongs to."""
+    if raw:
+        return
+    search.index_products([instance.product_id])
+
+
+@receiver(post_save, sender=Product, dispatch_uid="products_fuzzy_product_saved")
+def refresh_fuzzy_product_name(sender, instance, **kwargs):
+    """Refresh the fuzzy index entry of a product name once the save is committed."""
+    if fuzzy.is_loaded():
+        transaction.on_commit(partial(fuzzy.update_entry, "name", instance.pk, instance.name))
+
+
+@receiver(post_delete, sender=Product, dispatch_uid="products_fuzzy_product_deleted")
+def remove_fuzzy_product_name(sender, instance, **kwargs):
+    if fuzzy.is_loaded():
+        transaction.on_commit(partial(fuzzy.remove_entry, "name", instance.pk))
+
+
+@receiver(post_save, sender=Medicine, dispatch_uid="products_fuzzy_medicine_saved")
+def refresh_fuzzy_generic_name(sender, instance, **kwargs):
+    """Refresh the fuzzy index entry of a generic name once the save is committed."""
+    if fuzzy.is_loaded():
+        transaction.on_commit(partial(fuzzy.update_entry, "generic_name", instance.product_id, instance.generic_name))
+
+
+@receiver(post_delete, sender=Medicine, dispatch_uid="products_fuzzy_medicine_deleted")
+def remove_fuzzy_generic_name(sender, instance, **kwargs):
+    if fuzzy.is_loaded():
+        transaction.on_commit(partial(fuzzy.remove_entry, "generic_name", instance.product_id))
+
+
+@receiver(catalog_bulk_changed, dispatch_uid="products_search_bulk_changed")
+def index_bulk_changed_products(sender, product_ids, **kwargs):
+    search.index_products(product_ids)
+
+
+@receiver(catalog_bulk_changed, dispatch_uid="products_fuzzy_bulk_changed")
+def refresh_fuzzy_bulk_changed(sender, product_ids, **kwargs):
+    if fuzzy.is_loaded():
+        transaction.on_commit(partial(fuzzy.refresh_products, list(product_ids)))
+
+
+@receiver(post_save, sender=MedicineForm, dispatch_uid="products_lookups_medicineform_saved")
+@receiver(post_save, sender=DosageUnit, dispatch_uid="products_lookups_dosageunit_saved")
+@receiver(post_delete, sender=MedicineForm, dispatch_uid="products_lookups_medicineform_deleted")
+@receiver(post_delete, sender=DosageUnit, dispatch_uid="products_lookups_dosageunit_deleted")
+def invalidate_lookup_cache(sender, **kwargs):
+    """Drop the cached lookup table in this process now, and in every process once the write is committed."""
+    lookup_cache = LOOKUP_CACHES[sender]
+    lookup_cache.clear()
+    # Clearing again on commit also drops anything reloaded while the transaction was still open
+    transaction.on_commit(lookup_cache.invalidate)
+    # Cached product details embed the medicine form name
+    transaction.on_commit(cache.bump_generation)
+
+
+def _bump_detail_versions(product_ids):
+    # Bump now so this process stops serving the old detail, and again on commit so
+    # nothing cached from the pre-commit state in the meantime survives
+    cache.bump_versions(product_ids)
+    transaction.on_commit(partial(cache.bump_versions, product_ids))
+
+
+@receiver(post_save, sender=Product, dispatch_uid="products_cache_product_saved")
+@receiver(post_delete, sender=Product, dispatch_uid="products_cache_product_deleted")
+def bump_product_detail_version(sender, instance, **kwargs):
+    _bump_detail_versions([instance.pk])
+
+
+@receiver(post_save, sender=Medicine, dispatch_uid="products_cache_medicine_saved")
+@receiver(post_save, sender=GeneralGood, dispatch_uid="products_cache_generalgood_saved")
+@receiver(post_delete, sender=Medicine, dispatch_uid="products_cache_medicine_deleted")
+@receiver(post_delete, sender=GeneralGood, dispatch_uid="products_cache_generalgood_deleted")
+def bump_detail_product_version(sender, instance, **kwargs):
+    _bump_detail_versions([instance.product_id])
+
+
+@receiver(catalog_bulk_changed, dispatch_uid="products_cache_bulk_changed")
+def bump_bulk_changed_versions(sender, product_ids, **kwargs):
+    _bump_detail_versions(list(product_ids))
+
+
+@receiver(post_save, sender=Barcode, dispatch_uid="products_barcodes_saved")
+def map_saved_barcode(sender, instance, **kwargs):
+    """Point the scan map at the product once the barcode is committed.
+
+    Until then a scan of the new code misses the map and reads the database, so a rolled
+    back save never lingers in the map.
+    """
+    transaction.on_commit(partial(barcodes.set, instance.code, instance.product_id))
+    transaction.on_commit(barcodes.invalidate)
+
+
+@receiver(post_delete, sender=Barcode, dispatch_uid="products_barcodes_deleted")
+def unmap_deleted_barcode(sender, instance, **kwargs):
+    barcodes.discard(instance.code)
+    # Discard again on commit in case a scan read the code back from the database meanwhile
+    transaction.on_commit(partial(barcodes.discard, instance.code))
+    transaction.on_commit(barcodes.invalidate)
+
+
+@receiver(post_save, sender=Product, dispatch_uid="products_catalog_product_saved")
+def refresh_saved_product_entry(sender, instance, raw=False, **kwargs):
+    """Rewrite the catalog entry of a product when it is saved."""
+    if raw:
+        return
+    catalog.refresh_entries([instance.pk])
+
+
+@receiver(post_delete, sender=Product, dispatch_uid="products_catalog_product_deleted")
+def remove_deleted_product_entry(sender, instance, **kwargs):
+    # Sent after the detail rows' receivers, which refresh the entry while the product still exists
+    catalog.remove_entries([instance.pk])
+
+
+@receiver(post_save, sender=Medicine, dispatch_uid="products_catalog_medicine_saved")
+@receiver(post_save, sender=GeneralGood, dispatch_uid="products_catalog_generalgood_saved")
+@receiver(post_delete, sender=Medicine, dispatch_uid="products_catalog_medicine_deleted")
+@receiver(post_delete, sender=GeneralGood, dispatch_uid="products_catalog_generalgood_deleted")
+def refresh_detail_product_entry(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    catalog.refresh_entries([instance.product_id])
+
+
+@receiver(post_save, sender=MedicineForm, dispatch_uid="products_catalog_medicineform_saved")
+def rename_medicine_form_entries(sender, instance, raw=False, **kwargs):
+    # Deleting a form deletes its medicines, whose own receivers refresh their entries
+    if raw:
+        return
+    catalog.rename_form(instance.pk, instance.name)
+
+
+@receiver(catalog_bulk_changed, dispatch_uid="products_catalog_bulk_changed")
+def refresh_bulk_changed_entries(sender, product_ids, **kwargs):
+    catalog.refresh_entries(product_ids)
+
+
+@receiver(post_save, sender=Product, dispatch_uid="products_sync_product_saved")
+def record_saved_product_change(sender, instance, raw=False, **kwargs):
+    """Put a saved product at the head of the POS changes feed."""
+    if raw:
+        return
+    sync.record_changes(SyncKind.PRODUCT, [instance.pk])
+
+
+@receiver(post_delete, sender=Product, dispatch_uid="products_sync_product_deleted")
+def record_deleted_product_change(sender, instance, **kwargs):
+    sync.record_changes(SyncKind.PRODUCT, [instance.pk], deleted=True)
+
+
+@receiver(post_save, sender=Medicine, dispatch_uid="products_sync_medicine_saved")
+@receiver(post_save, sender=GeneralGood, dispatch_uid="products_sync_generalgood_saved")
+@receiver(post_delete, sender=Medicine, dispatch_uid="products_sync_medicine_deleted")
+@receiver(post_delete, sender=GeneralGood, dispatch_uid="products_sync_generalgood_deleted")
+def record_detail_product_change(sender, instance, raw=False, **kwargs):
+    # When the product itself is being deleted, its tombstone is recorded after this
+    if raw:
+        return
+    sync.record_changes(SyncKind.PRODUCT, [instance.product_id])
+
+
+@receiver(post_save, sender=MedicineForm, dispatch_uid="products_sync_medicineform_saved")
+def record_medicine_form_changes(sender, instance, created=False, raw=False, **kwargs):
+    # Product details carry the form name; a new form has no medicines yet
+    if raw or created:
+        return
+    sync.record_changes(SyncKind.PRODUCT, Medicine.objects.filter(form=instance).values_list("product_id", flat=True))
+
+
+@receiver(catalog_bulk_changed, dispatch_uid="products_sync_bulk_changed")
+def record_bulk_changes(sender, product_ids, **kwargs):
+    sync.record_changes(SyncKind.PRODUCT, product_ids)
+
+
+@receiver(post_init, sender=Product, dispatch_uid="products_audit_product_loaded")
+@receiver(post_init, sender=Medicine, dispatch_uid="products_audit_medicine_loaded")
+@receiver(post_init, sender=GeneralGood, dispatch_uid="products_audit_generalgood_loaded")
+def remember_audited_values(sender, instance, **kwargs):
+    """Keep the values an instance was loaded with, to diff its next save against."""
+    instance._audit_state = audit.snapshot(instance)
+
+
+@receiver(post_save, sender=Product, dispatch_uid="products_audit_product_saved")
+@receiver(post_save, sender=Medicine, dispatch_uid="products_audit_medicine_saved")
+@receiver(post_save, sender=GeneralGood, dispatch_uid="products_audit_generalgood_saved")
+def audit_saved_catalog_row(sender, instance, created=False, raw=False, **kwargs):
+    if raw:
+        return
+    audit.record_saved(instance, created)
+
+
+@receiver(post_delete, sender=Product, dispatch_uid="products_audit_product_deleted")
+@receiver(post_delete, sender=Medicine, dispatch_uid="products_audit_medicine_deleted")
+@receiver(post_delete, sender=GeneralGood, dispatch_uid="products_audit_generalgood_deleted")
+def audit_deleted_catalog_row(sender, instance, origin=None, **kwargs):
+    audit.record_deleted(instance)
@@ -0,0 +1,98 @@
+"""Changes feed for the offline POS terminals.
+
+Every write to a synced object (a product with its medicine or general good detail, or
+a supplier) replaces that object's row in SyncChange with a new one, inside the writing
+transaction. SyncChange ids only grow, so the id of the last change a terminal has seen
+is its cursor: the next sync reads the rows after it in id order, a bounded page at a
+time. As each object has a single row, an object changed fifty times while the
+terminal was offline comes back once, with its current data. Deletes leave a row with
+`deleted` set, so terminals learn about them too.
+
+A terminal with no cursor starts at 0 and receives the whole catalog.
+
+SQLite runs one write transaction at a time, so ids become visible in the order they
+were handed out and a reader can't see id 11 before id 10. A database with concurrent
+writers would need the feed to hold back the most recent ids until the transactions
+holding them are done.
+"""
+from pharmacy_inventory.routers import read_from_primary
+
+from .models import SyncChange, SyncKind
+
+DEFAULT_PAGE_SIZE = 500
+MAX_PAGE_SIZE = 1000
+
+# Objects per statement when recording changes
+BATCH_SIZE = 500
+
+SUPPLIER_FIELDS = (
+    "id", "name", "address", "telephone_number", "mobile_number", "email_address",
+    "contact_person", "remarks", "date_created", "date_updated",
+)
+
+
+def record_changes(kind, object_ids, deleted=False):
+    """Make the given objects the newest changes of the feed: two statements per batch."""
+    object_ids = list(dict.fromkeys(object_ids))
+    for start in range(0, len(object_ids), BATCH_SIZE):
+        batch = object_ids[start:start + BATCH_SIZE]
+        SyncChange.objects.filter(kind=kind, object_id__in=batch).delete()
+        SyncChange.objects.bulk_create(SyncChange(kind=kind, object_id=object_id, deleted=deleted) for object_id in batch)
+
+
+def _products(product_ids):
+    # Imported here as products.api serves this feed
+    from .api import catalog_queryset, serialize_product
+
+    # Not from the detail cache: a cached copy older than the change, e.g. a process's
+    # own cache not yet told about a write made elsewhere, would be sent as current and
+    # the terminal's cursor would move past the change
+    with read_from_primary():
+        return {product.pk: serialize_product(product) for product in catalog_queryset().filter(pk__in=product_ids)}
+
+
+def _suppliers(supplier_ids):
+    # Imported here as the suppliers app depends on this one
+    from suppliers.models import Suppliers
+
+    # From the primary like the changes themselves: a lagging replica would hand out old
+    # data for a change the terminal's cursor then moves past
+    with read_from_primary():
+        return {supplier["id"]: supplier for supplier in Suppliers.objects.filter(pk__in=supplier_ids).values(*SUPPLIER_FIELDS)}
+
+
+def changes_page(cursor=0, limit=DEFAULT_PAGE_SIZE):
+    """Return (changes, next_cursor, has_more) for the changes after `cursor`, oldest first.
+
+    Each change is a dict with the object's kind, id, deleted flag and current data, read
+    from the primary. Costs one query for the page, plus one for the products and one for
+    the suppliers.
+    """
+    rows = list(
+        SyncChange.objects.filter(pk__gt=cursor).order_by("pk").values_list("pk", "kind", "object_id", "deleted")[:limit + 1]
+    )
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    live = {SyncKind.PRODUCT: [], SyncKind.SUPPLIER: []}
+    for _, kind, object_id, deleted in rows:
+        if not deleted:
+            live[kind].append(object_id)
+    data = {
+        SyncKind.PRODUCT: _products(live[SyncKind.PRODUCT]) if live[SyncKind.PRODUCT] else {},
+        SyncKind.SUPPLIER: _suppliers(live[SyncKind.SUPPLIER]) if live[SyncKind.SUPPLIER] else {},
+    }
+
+    changes = []
+    for pk, kind, object_id, deleted in rows:
+        # An object deleted since this page was read has a tombstone further on; report it gone already
+        current = None if deleted else data[kind].get(object_id)
+        changes.append({
+            "cursor": pk,
+            "kind": kind.lower(),
+            "id": object_id,
+            "deleted": current is None,
+            "data": current,
+        })
+    next_cursor = rows[-1][0] if rows else cursor
+    return changes, next_cursor, has_more
@@ -0,0 +1,85 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..admin import EstimatedCountPaginator
+from ..models import Product, Medicine, GeneralGood, MedicineForm, ProductCategory
+
+
+class CatalogAdminQueryCountTestCase(TestCase):
+    """The catalog admin pages should run the same number of queries whatever the number of rows."""
+
+    def setUp(self):
+        user = get_user_model().objects.create_superuser("admin", "admin@example.com", "password")
+        self.client.force_login(user)
+        self.form = MedicineForm.objects.create(name="Tablet", description="Solid dose")
+
+    # Boilerplate; helper methods to fill the catalog with rows
+    def create_general_goods(self, count):
+        for i in range(count):
+            product = Product.objects.create(brand="Brand", name=f"Good {i}", category=ProductCategory.GENERAL_GOODS)
+            GeneralGood.objects.create(product=product, type="TOILETRIES", notes="-")
+
+    def create_medicines(self, count):
+        for i in range(count):
+            product = Product.objects.create(brand="Brand", name=f"Medicine {i}")
+            Medicine.objects.create(product=product, generic_name=f"generic {i}", dosage="500mg", form=self.form, usage="-", side_effects="-")
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries)
+
+    def test_general_good_changelist_constant_queries(self):
+        """Test that GeneralGood.__str__ does not trigger a query per row on the changelist."""
+        url = reverse("admin:products_generalgood_changelist")
+        self.create_general_goods(2)
+        few = self.count_queries(url)
+        self.create_general_goods(20)
+
+        self.assertEqual(self.count_queries(url), few)
+
+    def test_medicine_changelist_constant_queries(self):
+        """Test that the product and form columns of the medicine changelist are joined in."""
+        url = reverse("admin:products_medicine_changelist")
+        self.create_medicines(2)
+        few = self.count_queries(url)
+        self.create_medicines(20)
+
+        self.assertEqual(self.count_queries(url), few)
+
+    def test_medicine_add_form_does_not_list_products(self):
+        """Test that the medicine change form uses autocomplete widgets instead of a full <select>."""
+        self.create_medicines(3)
+        response = self.client.get(reverse("admin:products_medicine_add"))
+
+        self.assertContains(response, "admin-autocomplete")
+        self.assertNotContains(response, "Medicine 2")
+
+
+class EstimatedCountPaginatorTestCase(TestCase):
+    """Test cases for the estimated changelist count."""
+
+    def setUp(self):
+        for i in range(5):
+            Product.objects.create(brand="Brand", name=f"Product {i}")
+
+    def test_small_table_counts_exactly(self):
+        paginator = EstimatedCountPaginator(Product.objects.order_by("id"), 2)
+        self.assertEqual(paginator.count, 5)
+
+    def test_large_table_uses_estimate(self):
+        paginator = EstimatedCountPaginator(Product.objects.order_by("id"), 2)
+        paginator.exact_count_threshold = 0
+
+        with self.assertNumQueries(1):
+            self.assertGreaterEqual(paginator.count, 5)
+
+    def test_filtered_queryset_counts_exactly(self):
+        paginator = EstimatedCountPaginator(Product.objects.filter(name="Product 1").order_by("id"), 2)
+        paginator.exact_count_threshold = 0
+
+        self.assertEqual(paginator.count, 1)
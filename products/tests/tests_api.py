@@ -0,0 +1,92 @@
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from ..models import Product, Medicine, GeneralGood, MedicineForm, ProductCategory, MedicineType
+
+
+# The detail view queries from the database thread pool, which can't see the test transaction
+@override_settings(ASYNC_DATABASE_THREADS=0)
+class ProductApiTestCase(TestCase):
+    """Test cases for the read-only catalog API and its cursor pagination."""
+
+    url = reverse("products:api-product-list")
+
+    @classmethod
+    def setUpTestData(cls):
+        form = MedicineForm.objects.create(name="Tablet", description="Solid dose")
+        now = timezone.now()
+        for i in range(7):
+            product = Product.objects.create(brand="Brand", name=f"Medicine {i}", status="PUBLISHED")
+            Medicine.objects.create(
+                product=product, generic_name=f"generic {i}", dosage="5mg", form=form, usage="-", side_effects="-",
+                prescription_type=MedicineType.OTC if i % 2 else MedicineType.PRESCRIPTION,
+            )
+        for i in range(3):
+            product = Product.objects.create(brand="Brand", name=f"Good {i}", category=ProductCategory.GENERAL_GOODS)
+            GeneralGood.objects.create(product=product, type="TOILETRIES", notes="-")
+        # Give two products the same timestamp so the id has to break the tie
+        Product.objects.filter(name__in=["Medicine 3", "Medicine 4"]).update(date_created=now - timedelta(days=1))
+
+    def fetch_all(self, params):
+        names, url, pages = [], self.url, 0
+        while url:
+            response = self.client.get(url, params if pages == 0 else None)
+            self.assertEqual(response.status_code, 200)
+            data = response.json()
+            names.extend(item["name"] for item in data["results"])
+            url, pages = data["next"], pages + 1
+        return names, pages
+
+    def test_pages_cover_every_product_once(self):
+        names, pages = self.fetch_all({"limit": 3})
+        expected = list(Product.objects.order_by("-date_created", "-id").values_list("name", flat=True))
+
+        self.assertEqual(names, expected)
+        self.assertEqual(pages, 4)
+
+    def test_order_by_name(self):
+        names, _ = self.fetch_all({"limit": 4, "ordering": "name"})
+
+        self.assertEqual(names, sorted(names))
+        self.assertEqual(len(names), 10)
+
+    def test_filters(self):
+        names, _ = self.fetch_all({"limit": 2, "category": "MEDICINE", "prescription_type": "OTC"})
+        self.assertCountEqual(names, ["Medicine 1", "Medicine 3", "Medicine 5"])
+
+        names, _ = self.fetch_all({"status": "DRAFT"})
+        self.assertCountEqual(names, ["Good 0", "Good 1", "Good 2"])
+
+    def test_page_query_count_is_fixed(self):
+        """Test that the details of a page are joined in, whatever the page size or depth."""
+        first = self.client.get(self.url, {"limit": 2}).json()
+        with self.assertNumQueries(1):
+            self.client.get(first["next"])
+        with self.assertNumQueries(1):
+            self.client.get(self.url, {"limit": 10})
+
+    def test_serializes_details(self):
+        product = Product.objects.get(name="Medicine 0")
+        data = self.client.get(reverse("products:api-product-detail", args=[product.pk])).json()
+
+        self.assertEqual(data["medicine"]["form"], "Tablet")
+        self.assertIsNone(data["general_good"])
+
+    def test_form_missing_from_the_lookup_cache(self):
+        """Test that a form created without a signal is read through, not dereferenced as None."""
+        self.client.get(self.url)
+        [capsule] = MedicineForm.objects.bulk_create([MedicineForm(name="Capsule", description="Hard shell")])
+        Medicine.objects.filter(generic_name="generic 0").update(form=capsule)
+
+        names = {item["name"]: item for item in self.client.get(self.url, {"limit": 10}).json()["results"]}
+
+        self.assertEqual(names["Medicine 0"]["medicine"]["form"], "Capsule")
+
+    def test_invalid_parameters(self):
+        self.assertEqual(self.client.get(self.url, {"cursor": "not-a-cursor"}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {"ordering": "brand"}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {"category": "CLOTHING"}).status_code, 400)
+        self.assertEqual(self.client.get(reverse("products:api-product-detail", args=[0])).status_code, 404)
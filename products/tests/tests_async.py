@@ -0,0 +1,157 @@
+import asyncio
+import threading
+import time
+
+from asgiref.testing import ApplicationCommunicator
+from django.core.exceptions import ImproperlyConfigured
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from pharmacy_inventory.asgi import APIHandler, application
+from pharmacy_inventory.db import run_in_database_thread
+
+from .. import cache as detail_cache
+from ..models import Product, Medicine, MedicineForm
+
+
+# Boilerplate; helper function sending a request through the ASGI application the server runs
+async def asgi_request(path, method="GET", body=b"", headers=(), host="testserver"):
+    """Return the status, headers and body of the response."""
+    communicator = ApplicationCommunicator(application, {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": method, "scheme": "http",
+        "path": path, "raw_path": path.encode(), "query_string": b"", "root_path": "",
+        "headers": [(b"host", host.encode()), *headers], "server": ("testserver", 80), "client": ("127.0.0.1", 50000),
+    })
+    await communicator.send_input({"type": "http.request", "body": body})
+    start = await communicator.receive_output(5)
+    content = b""
+    while True:
+        message = await communicator.receive_output(5)
+        content += message.get("body", b"")
+        if not message.get("more_body"):
+            break
+    return start["status"], {name.decode().lower(): value.decode() for name, value in start["headers"]}, content
+
+
+# Run the queries on the test's own connection, which holds the uncommitted test data
+@override_settings(ASYNC_DATABASE_THREADS=0)
+class AsyncProductApiTestCase(TestCase):
+    """Test cases for the async product detail and search views."""
+
+    def setUp(self):
+        self.form = MedicineForm.objects.create(name="Tablet", description="Solid dose")
+        self.biogesic = self.create_medicine("Biogesic", "paracetamol")
+        self.neozep = self.create_medicine("Neozep", "paracetamol phenylephrine")
+        self.amoxil = self.create_medicine("Amoxil", "amoxicillin")
+        detail_cache.stats.reset()
+
+    # Boilerplate; helper method to create a medicine product
+    def create_medicine(self, name, generic_name):
+        product = Product.objects.create(brand="Brand", name=name)
+        Medicine.objects.create(product=product, generic_name=generic_name, dosage="500mg", form=self.form, usage="-", side_effects="-")
+        return product
+
+    def test_detail_hit_runs_no_query(self):
+        # The sync test client runs the async view too, inside a context that can count queries
+        url = reverse("products:api-product-detail", args=[self.biogesic.pk])
+        first = self.client.get(url)
+
+        with self.assertNumQueries(0):
+            second = self.client.get(url)
+
+        self.assertEqual(first.json(), second.json())
+        self.assertEqual(second.json()["medicine"]["form"], "Tablet")
+        self.assertEqual((detail_cache.stats.hits, detail_cache.stats.misses), (1, 1))
+
+    async def test_detail_not_found(self):
+        response = await self.async_client.get(reverse("products:api-product-detail", args=[0]))
+        self.assertEqual(response.status_code, 404)
+
+    async def test_search(self):
+        response = await self.async_client.get(reverse("products:api-product-search"), {"q": "paracetamol", "limit": 5})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertCountEqual([item["name"] for item in response.json()["results"]], ["Biogesic", "Neozep"])
+
+    async def test_search_needs_a_query(self):
+        url = reverse("products:api-product-search")
+        self.assertEqual((await self.async_client.get(url)).status_code, 400)
+        self.assertEqual((await self.async_client.get(url, {"q": "x", "limit": "many"})).status_code, 400)
+
+
+class DatabaseThreadPoolTestCase(SimpleTestCase):
+    """Test cases for the thread pool that runs the database work of async views."""
+
+    @override_settings(ASYNC_DATABASE_THREADS=2)
+    async def test_work_beyond_the_pool_size_waits(self):
+        running, peak, names = 0, 0, set()
+        lock = threading.Lock()
+
+        def work():
+            nonlocal running, peak
+            with lock:
+                running += 1
+                peak = max(peak, running)
+                names.add(threading.current_thread().name)
+            time.sleep(0.01)
+            with lock:
+                running -= 1
+
+        await asyncio.gather(*(run_in_database_thread(work) for _ in range(10)))
+
+        self.assertEqual(peak, 2)
+        self.assertEqual(len(names), 2)
+        self.assertTrue(all(name.startswith("database") for name in names))
+
+    @override_settings(ASYNC_DATABASE_THREADS=0)
+    async def test_disabled_pool_still_runs_the_work(self):
+        self.assertEqual(await run_in_database_thread(sum, [1, 2, 3]), 6)
+
+
+@override_settings(ASYNC_DATABASE_THREADS=2)
+class DatabaseThreadPoolQueryTestCase(TransactionTestCase):
+    """Test cases for the detail view querying from the database thread pool."""
+
+    async def test_detail_from_pool_thread(self):
+        product = await Product.objects.acreate(brand="Brand", name="Committed")
+
+        response = await self.async_client.get(reverse("products:api-product-detail", args=[product.pk]))
+
+        self.assertEqual(response.json()["name"], "Committed")
+
+
+class AsgiApplicationTestCase(TransactionTestCase):
+    """Test cases for routing requests between the API handler and the full middleware stack."""
+
+    async def test_api_views_keep_the_async_middleware(self):
+        product = await Product.objects.acreate(brand="Brand", name="Committed")
+
+        status, headers, _ = await asgi_request(reverse("products:api-product-detail", args=[product.pk]))
+
+        self.assertEqual(status, 200)
+        # SecurityMiddleware ran; the synchronous clickjacking middleware didn't
+        self.assertEqual(headers["x-content-type-options"], "nosniff")
+        self.assertNotIn("x-frame-options", headers)
+
+    @override_settings(ALLOWED_HOSTS=["pharmacy.example"])
+    async def test_api_views_check_the_host(self):
+        product = await Product.objects.acreate(brand="Brand", name="Committed")
+
+        with self.assertLogs("django.security.DisallowedHost", "ERROR"):
+            status, _, _ = await asgi_request(reverse("products:api-product-detail", args=[product.pk]))
+        self.assertEqual(status, 400)
+
+        status, _, _ = await asgi_request(reverse("products:api-product-detail", args=[product.pk]), host="pharmacy.example")
+        self.assertEqual(status, 200)
+
+    async def test_other_views_run_the_full_stack(self):
+        status, headers, _ = await asgi_request("/admin/login/")
+
+        self.assertEqual(status, 200)
+        self.assertEqual(headers["x-frame-options"], "DENY")
+        self.assertIn("csrftoken", headers["set-cookie"])
+
+    @override_settings(MIDDLEWARE=["django.contrib.admindocs.middleware.XViewMiddleware"])
+    def test_middleware_the_api_handler_cannot_run(self):
+        with self.assertRaises(ImproperlyConfigured):
+            APIHandler().load_middleware(is_async=True)
@@ -0,0 +1,159 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from suppliers.importers import upsert_suppliers
+from suppliers.models import Suppliers
+
+from .. import bulk
+from ..audit import AuditActorMiddleware, AuditLog, acting_as
+from ..models import Product, Medicine, MedicineForm, AuditEntry, AuditAction, ProductStatus
+
+
+@override_settings(AUDIT_LOG_ASYNC=False)
+class AuditTrailTestCase(TestCase):
+    """Test cases for the field diffs recorded when catalog and supplier rows change."""
+
+    def setUp(self):
+        self.form = MedicineForm.objects.create(name="Tablet", description="Solid dose")
+
+    def entries(self, instance):
+        return list(AuditEntry.objects.filter(model=instance._meta.label_lower, object_id=instance.pk).order_by("pk"))
+
+    def test_create_update_and_delete(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            product = Product.objects.create(brand="Unilab", name="Biogesic")
+        with self.captureOnCommitCallbacks(execute=True):
+            product.name = "Biogesic 500"
+            product.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            product_id = product.pk
+            product.delete()
+        product.pk = product_id
+
+        created, updated, deleted = self.entries(product)
+        self.assertEqual(created.action, AuditAction.CREATE)
+        self.assertEqual(created.changes["name"], [None, "Biogesic"])
+        self.assertEqual(updated.action, AuditAction.UPDATE)
+        # Only the changed field; date_updated isn't editable so it isn't audited
+        self.assertEqual(updated.changes, {"name": ["Biogesic", "Biogesic 500"]})
+        self.assertEqual(deleted.action, AuditAction.DELETE)
+        self.assertEqual(deleted.changes["name"], ["Biogesic 500", None])
+
+    def test_loaded_instances_diff_against_the_stored_values(self):
+        product = Product.objects.create(brand="Unilab", name="Biogesic")
+        Medicine.objects.create(product=product, generic_name="paracetamol", dosage="500mg", form=self.form, usage="-", side_effects="-")
+
+        medicine = Medicine.objects.get(product=product)
+        with self.captureOnCommitCallbacks(execute=True):
+            medicine.dosage = "250mg"
+            medicine.save()
+            # Saving again without changes records nothing
+            medicine.save()
+
+        entries = self.entries(medicine)
+        self.assertEqual(len(entries), 1)
+        self.assertEqual(entries[0].changes, {"dosage": ["500mg", "250mg"]})
+
+    def test_rolled_back_changes_are_not_recorded(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertRaises(ValueError), transaction.atomic():
+                Product.objects.create(brand="Unilab", name="Biogesic")
+                raise ValueError
+
+        self.assertFalse(AuditEntry.objects.exists())
+
+    def test_actor(self):
+        user = get_user_model().objects.create_user("pharmacist")
+
+        def view(request):
+            Product.objects.create(brand="Unilab", name="Biogesic")
+            return HttpResponse("ok")
+
+        request = RequestFactory().post("/")
+        request.user = user
+        with self.captureOnCommitCallbacks(execute=True):
+            AuditActorMiddleware(view)(request)
+            with acting_as("import_catalog"):
+                Product.objects.create(brand="Unilab", name="Neozep")
+
+        self.assertEqual(list(AuditEntry.objects.order_by("pk").values_list("actor", flat=True)), ["pharmacist", "import_catalog"])
+
+    def test_bulk_changes(self):
+        products = Product.objects.bulk_create(Product(brand="Unilab", name=f"Medicine {i}") for i in range(3))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            bulk.retire([product.pk for product in products[:2]], batch_size=1)
+
+        entries = AuditEntry.objects.filter(model="products.product").order_by("object_id")
+        self.assertEqual([entry.object_id for entry in entries], [product.pk for product in products[:2]])
+        self.assertEqual(entries[0].changes, {"status": ["DRAFT", ProductStatus.RETIRED]})
+
+    def test_supplier_upsert(self):
+        row = {"name": "Zuellig Pharma", "address": "Manila", "telephone_number": "-", "mobile_number": "09171234567",
+               "email_address": "orders@zuellig.com", "contact_person": "Ana", "remarks": "-"}
+        with self.captureOnCommitCallbacks(execute=True):
+            upsert_suppliers([row])
+        with self.captureOnCommitCallbacks(execute=True):
+            upsert_suppliers([{**row, "address": "Pasig"}])
+
+        supplier = Suppliers.objects.get()
+        created, updated = self.entries(supplier)
+        self.assertEqual(created.action, AuditAction.CREATE)
+        self.assertEqual(updated.changes, {"address": ["Manila", "Pasig"]})
+
+
+@override_settings(AUDIT_LOG_ASYNC=True)
+class AuditLogTestCase(TransactionTestCase):
+    """Test cases for writing queued audit entries in batches from the background thread."""
+
+    # Boilerplate; helper method building an entry, and a log that records its writes
+    def entry(self, object_id):
+        return AuditEntry(model="products.product", object_id=object_id, action=AuditAction.UPDATE, date_changed=timezone.now())
+
+    class RecordingLog(AuditLog):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.batches = []
+
+        def write(self, entries):
+            self.batches.append(len(entries))
+            super().write(entries)
+
+    def test_entries_are_written_in_batches(self):
+        log = self.RecordingLog(batch_size=3, flush_interval=0.05)
+
+        for object_id in range(7):
+            log.add(self.entry(object_id))
+        log.flush()
+
+        self.assertEqual(AuditEntry.objects.count(), 7)
+        self.assertEqual(log.pending(), 0)
+        self.assertLessEqual(max(log.batches), 3)
+        log.shutdown()
+
+    def test_shutdown_writes_the_queue(self):
+        log = self.RecordingLog(batch_size=100, flush_interval=60)
+
+        for object_id in range(5):
+            log.add(self.entry(object_id))
+        log.shutdown()
+
+        self.assertEqual(AuditEntry.objects.count(), 5)
+        self.assertFalse(log._thread.is_alive())
+
+    def test_a_full_queue_writes_in_the_caller(self):
+        class StalledLog(self.RecordingLog):
+            def _start(self):
+                pass
+
+        log = StalledLog(queue_size=1, enqueue_timeout=0)
+        with self.assertLogs("products.audit", "WARNING"):
+            log.add(self.entry(1))
+            log.add(self.entry(2))
+
+        self.assertEqual(list(AuditEntry.objects.values_list("object_id", flat=True)), [2])
+        log.shutdown()
+        self.assertEqual(AuditEntry.objects.count(), 2)
@@ -0,0 +1,138 @@
+from django.core.exceptions import ValidationError
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from ..barcodes import BarcodeMap, barcodes
+from ..models import Product, Barcode, ProductCategory
+from ..validators import gtin_check_digit, normalize_gtin
+
+
+def gtin(digits):
+    """Return the digits followed by their check digit."""
+    return digits + gtin_check_digit(digits)
+
+
+UPC = gtin("01234567890")
+EAN = gtin("480001600012")
+
+
+class GtinTestCase(TestCase):
+    """Test cases for reading scanned GTINs."""
+
+    def test_normalize(self):
+        self.assertEqual(normalize_gtin(UPC), "00" + UPC)
+        # The EAN-13 form of a UPC-A is the same barcode
+        self.assertEqual(normalize_gtin("0" + UPC), normalize_gtin(UPC))
+
+    def test_invalid_codes(self):
+        for code in ["", "abc", "12345", UPC[:-1] + str((int(UPC[-1]) + 1) % 10)]:
+            with self.assertRaises(ValueError):
+                normalize_gtin(code)
+
+    def test_other_forms_of_a_stored_code_are_duplicates(self):
+        product = Product.objects.create(brand="Safeguard", name="Bar Soap", category=ProductCategory.GENERAL_GOODS)
+        self.assertEqual(Barcode.objects.create(product=product, code=UPC).code, "00" + UPC)
+
+        with self.assertRaises(ValidationError):
+            Barcode(product=product, code="0" + UPC).full_clean()
+
+
+class BarcodeMapTestCase(TestCase):
+    """Test cases for the in-process barcode map and the signals that keep it current."""
+
+    def setUp(self):
+        barcodes.clear()
+        self.soap = Product.objects.create(brand="Safeguard", name="Bar Soap", category=ProductCategory.GENERAL_GOODS)
+        self.paste = Product.objects.create(brand="Colgate", name="Toothpaste", category=ProductCategory.GENERAL_GOODS)
+        Barcode.objects.create(product=self.soap, code=UPC)
+        Barcode.objects.create(product=self.soap, code=gtin("1234567"))
+        Barcode.objects.create(product=self.paste, code=EAN)
+
+    def test_warm_lookup_runs_no_query(self):
+        self.assertEqual(barcodes.lookup(UPC), self.soap.pk)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(barcodes.lookup("0" + UPC), self.soap.pk)
+            self.assertEqual(barcodes.lookup(gtin("1234567")), self.soap.pk)
+            self.assertIsNone(barcodes.lookup("not a barcode"))
+
+    def test_miss_falls_back_to_one_query(self):
+        barcodes.lookup(UPC)
+        code = gtin("480000000001")
+        # bulk_create sends no signals, like a barcode added by another process
+        Barcode.objects.bulk_create([Barcode(product=self.paste, code=normalize_gtin(code))])
+
+        with self.assertNumQueries(1):
+            self.assertEqual(barcodes.lookup(code), self.paste.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(barcodes.lookup(code), self.paste.pk)
+
+    def test_basket_lookup(self):
+        barcodes.lookup(UPC)
+        unknown = gtin("999999999999")
+
+        with self.assertNumQueries(1):
+            found = barcodes.lookup_many([UPC, EAN, unknown, "junk"])
+
+        self.assertEqual(found, {UPC: self.soap.pk, EAN: self.paste.pk})
+
+    def test_signals_update_the_map_on_commit(self):
+        barcodes.lookup(UPC)
+        code = gtin("480000000001")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Barcode.objects.create(product=self.paste, code=code)
+        with self.assertNumQueries(0):
+            self.assertEqual(barcodes.lookup(code), self.paste.pk)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Barcode.objects.get(code=normalize_gtin(UPC)).delete()
+        with self.assertNumQueries(1):
+            self.assertIsNone(barcodes.lookup(UPC))
+
+    def test_other_processes_reload_after_a_write(self):
+        other = BarcodeMap(check_interval=0)
+        self.assertEqual(other.lookup(EAN), self.paste.pk)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Barcode.objects.filter(code=normalize_gtin(EAN)).get().delete()
+
+        # The shared version moved on, so the next lookup reloads instead of trusting the old map
+        with self.assertNumQueries(2):
+            self.assertIsNone(other.lookup(EAN))
+
+
+# Run the queries on the test's own connection, which holds the uncommitted test data
+@override_settings(ASYNC_DATABASE_THREADS=0)
+class ScanApiTestCase(TestCase):
+    """Test cases for the barcode scan endpoints."""
+
+    def setUp(self):
+        barcodes.clear()
+        self.soap = Product.objects.create(brand="Safeguard", name="Bar Soap", category=ProductCategory.GENERAL_GOODS)
+        Barcode.objects.create(product=self.soap, code=UPC)
+
+    def test_scan(self):
+        response = self.client.get(reverse("products:api-product-scan", args=[UPC]))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["product"]["name"], "Bar Soap")
+
+    def test_warm_scan_runs_no_query(self):
+        url = reverse("products:api-product-scan", args=[UPC])
+        self.client.get(url)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(url).status_code, 200)
+
+    def test_scan_errors(self):
+        self.assertEqual(self.client.get(reverse("products:api-product-scan", args=["junk"])).status_code, 400)
+        self.assertEqual(self.client.get(reverse("products:api-product-scan", args=[EAN])).status_code, 404)
+
+    def test_basket_scan(self):
+        response = self.client.get(reverse("products:api-basket-scan"), {"codes": f"{UPC},{EAN},{UPC}"})
+
+        results = response.json()["results"]
+        self.assertEqual([item["barcode"] for item in results], [UPC, EAN, UPC])
+        self.assertEqual([item["product"] and item["product"]["name"] for item in results], ["Bar Soap", None, "Bar Soap"])
+        self.assertEqual(self.client.get(reverse("products:api-basket-scan")).status_code, 400)
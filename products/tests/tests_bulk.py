@@ -0,0 +1,159 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from .. import bulk, catalog
+from .. import cache as detail_cache
+from ..models import Product, Medicine, GeneralGood, MedicineForm, CatalogEntry, SyncChange, ProductCategory, ProductStatus
+
+
+class BulkProductChangesTestCase(TestCase):
+    """Test cases for the set-based publish, unpublish, retire and recategorize service."""
+
+    def setUp(self):
+        cache.clear()
+        self.form = MedicineForm.objects.create(name="Tablet", description="Solid dose")
+
+    # Boilerplate; helper methods to fill the catalog with rows
+    def create_medicines(self, count):
+        products = Product.objects.bulk_create(Product(brand="Unilab", name=f"Medicine {i}") for i in range(count))
+        Medicine.objects.bulk_create(
+            Medicine(product=product, generic_name="paracetamol", dosage="500mg", form=self.form, usage="-", side_effects="-")
+            for product in products
+        )
+        return products
+
+    def create_general_goods(self, count):
+        products = Product.objects.bulk_create(
+            Product(brand="Safeguard", name=f"Soap {i}", category=ProductCategory.GENERAL_GOODS) for i in range(count)
+        )
+        GeneralGood.objects.bulk_create(GeneralGood(product=product, type="TOILETRIES", notes="-") for product in products)
+        return products
+
+    def statuses(self):
+        return dict(Product.objects.values_list("name", "status"))
+
+    def test_publish_in_batches(self):
+        self.create_medicines(7)
+        self.create_general_goods(5)
+
+        result = bulk.publish(Product.objects.all(), batch_size=5)
+
+        self.assertEqual(result, bulk.BulkResult(updated=12, skipped=0))
+        self.assertEqual(set(self.statuses().values()), {ProductStatus.PUBLISHED})
+
+    def test_publish_skips_products_without_a_matching_detail(self):
+        medicine = self.create_medicines(1)[0]
+        bare = Product.objects.create(brand="Unilab", name="No detail")
+        mislabelled = self.create_general_goods(1)[0]
+        Product.objects.filter(pk=mislabelled.pk).update(category=ProductCategory.MEDICINE)
+
+        result = bulk.publish([medicine.pk, bare.pk, mislabelled.pk])
+
+        self.assertEqual(result, bulk.BulkResult(updated=1, skipped=2))
+        self.assertEqual(self.statuses(), {"Medicine 0": "PUBLISHED", "No detail": "DRAFT", "Soap 0": "DRAFT"})
+
+    def test_unchanged_products_are_left_alone(self):
+        self.create_medicines(3)
+        bulk.publish(Product.objects.all())
+        before = dict(Product.objects.values_list("pk", "date_updated"))
+
+        result = bulk.publish(Product.objects.all())
+
+        self.assertEqual(result, bulk.BulkResult(updated=0, skipped=0))
+        self.assertEqual(dict(Product.objects.values_list("pk", "date_updated")), before)
+
+    def test_unpublish_and_retire(self):
+        self.create_medicines(2)
+        bulk.publish(Product.objects.all())
+
+        self.assertEqual(bulk.unpublish(Product.objects.filter(name="Medicine 0")).updated, 1)
+        self.assertEqual(bulk.retire(Product.objects.filter(status=ProductStatus.PUBLISHED)).updated, 1)
+
+        self.assertEqual(self.statuses(), {"Medicine 0": "DRAFT", "Medicine 1": "RETIRED"})
+
+    def test_recategorize_skips_products_with_the_other_detail(self):
+        medicine = self.create_medicines(1)[0]
+        bare = Product.objects.create(brand="Unilab", name="No detail")
+
+        result = bulk.recategorize([medicine.pk, bare.pk], ProductCategory.GENERAL_GOODS)
+
+        self.assertEqual(result, bulk.BulkResult(updated=1, skipped=1))
+        self.assertEqual(Product.objects.get(pk=bare.pk).category, ProductCategory.GENERAL_GOODS)
+        self.assertEqual(Product.objects.get(pk=medicine.pk).category, ProductCategory.MEDICINE)
+
+        with self.assertRaises(ValueError):
+            bulk.recategorize([bare.pk], "FOOD")
+
+    def test_recategorize_keeps_published_products_publishable(self):
+        bare = Product.objects.create(brand="Unilab", name="No detail", category=ProductCategory.GENERAL_GOODS, status=ProductStatus.PUBLISHED)
+        draft = Product.objects.create(brand="Unilab", name="Draft", category=ProductCategory.GENERAL_GOODS)
+
+        result = bulk.recategorize([bare.pk, draft.pk], ProductCategory.MEDICINE)
+
+        self.assertEqual(result, bulk.BulkResult(updated=1, skipped=1))
+        self.assertEqual(
+            dict(Product.objects.values_list("name", "category")),
+            {"No detail": ProductCategory.GENERAL_GOODS, "Draft": ProductCategory.MEDICINE},
+        )
+
+    def test_derived_data_follows(self):
+        product = self.create_medicines(1)[0]
+        detail_cache.get_many([product.pk])
+        cursor = SyncChange.objects.order_by("-pk").values_list("pk", flat=True).first() or 0
+
+        bulk.publish([product.pk])
+
+        self.assertEqual(detail_cache.get_many([product.pk])[product.pk]["status"], "PUBLISHED")
+        self.assertEqual(CatalogEntry.objects.get(product=product).status, "PUBLISHED")
+        self.assertTrue(SyncChange.objects.filter(pk__gt=cursor, object_id=product.pk).exists())
+        self.assertEqual(catalog.find_drift(), [])
+
+    def test_query_count_is_per_batch_not_per_row(self):
+        self.create_medicines(5)
+        with CaptureQueriesContext(connection) as small:
+            bulk.publish(Product.objects.all())
+        self.create_medicines(200)
+        with CaptureQueriesContext(connection) as large:
+            bulk.publish(Product.objects.all())
+
+        self.assertEqual(len(large), len(small))
+
+
+class BulkProductAdminActionTestCase(TestCase):
+    """Test cases for the bulk actions of the product admin."""
+
+    def setUp(self):
+        user = get_user_model().objects.create_superuser("admin", "admin@example.com", "password")
+        self.client.force_login(user)
+        form = MedicineForm.objects.create(name="Tablet", description="Solid dose")
+        self.medicine = Product.objects.create(brand="Unilab", name="Biogesic")
+        Medicine.objects.create(product=self.medicine, generic_name="paracetamol", dosage="500mg", form=form, usage="-", side_effects="-")
+        self.bare = Product.objects.create(brand="Unilab", name="No detail")
+
+    def run_action(self, action, *products):
+        return self.client.post("/admin/products/product/", {
+            "action": action, "_selected_action": [product.pk for product in products],
+        }, follow=True)
+
+    def test_publish_action_reports_skipped_products(self):
+        response = self.run_action("publish_products", self.medicine, self.bare)
+
+        self.assertContains(response, "1 product(s) published.")
+        self.assertContains(response, "1 product(s) skipped")
+        self.assertEqual(Product.objects.get(pk=self.medicine.pk).status, ProductStatus.PUBLISHED)
+
+    def test_select_across_updates_the_whole_filtered_set(self):
+        response = self.client.post("/admin/products/product/?status=DRAFT", {
+            "action": "retire_products", "select_across": "1", "_selected_action": [self.bare.pk],
+        }, follow=True)
+
+        self.assertContains(response, "2 product(s) retired.")
+        self.assertFalse(Product.objects.exclude(status=ProductStatus.RETIRED).exists())
+
+    def test_move_to_general_goods_action(self):
+        self.run_action("move_to_general_goods", self.bare)
+
+        self.assertEqual(Product.objects.get(pk=self.bare.pk).category, ProductCategory.GENERAL_GOODS)
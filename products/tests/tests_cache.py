@@ -0,0 +1,96 @@
+import tempfile
+
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from .. import cache as detail_cache
+from ..checks import check_shared_cache
+from ..models import Product, Medicine, GeneralGood, MedicineForm, ProductCategory
+
+
+class ProductDetailCacheTestCase(TestCase):
+    """Test cases for the versioned product detail cache."""
+
+    def setUp(self):
+        self.form = MedicineForm.objects.create(name="Tablet", description="Solid dose")
+        self.medicine = self.create_medicine("Biogesic")
+        product = Product.objects.create(brand="Safeguard", name="Bar Soap", category=ProductCategory.GENERAL_GOODS)
+        self.good = GeneralGood.objects.create(product=product, type="TOILETRIES", notes="-")
+        detail_cache.stats.reset()
+
+    # Boilerplate; helper method to create a medicine product
+    def create_medicine(self, name):
+        product = Product.objects.create(brand="Unilab", name=name)
+        return Medicine.objects.create(product=product, generic_name="paracetamol", dosage="500mg", form=self.form, usage="-", side_effects="-")
+
+    def test_second_read_is_a_hit(self):
+        product_id = self.medicine.product_id
+        self.assertEqual(detail_cache.get(product_id)["medicine"]["form"], "Tablet")
+
+        with self.assertNumQueries(0):
+            self.assertEqual(detail_cache.get(product_id)["name"], "Biogesic")
+        self.assertEqual((detail_cache.stats.hits, detail_cache.stats.misses), (1, 1))
+
+    def test_get_many_loads_misses_in_one_query(self):
+        others = [self.create_medicine(f"Medicine {i}").product_id for i in range(5)]
+        # Also warms the medicine form lookup cache
+        detail_cache.get(self.medicine.product_id)
+
+        with self.assertNumQueries(1):
+            details = detail_cache.get_many([self.medicine.product_id, self.good.product_id, *others, 0])
+
+        self.assertEqual(set(details), {self.medicine.product_id, self.good.product_id, *others})
+        self.assertEqual(detail_cache.stats.hits, 1)
+
+    def test_writes_bump_version(self):
+        product = self.medicine.product
+        detail_cache.get(product.pk)
+
+        product.name = "Biogesic Forte"
+        product.save()
+        self.assertEqual(detail_cache.get(product.pk)["name"], "Biogesic Forte")
+
+        self.medicine.dosage = "650mg"
+        self.medicine.save()
+        self.assertEqual(detail_cache.get(product.pk)["medicine"]["dosage"], "650mg")
+
+        product.delete()
+        self.assertIsNone(detail_cache.get(product.pk))
+
+    def test_form_rename_bumps_generation(self):
+        detail_cache.get(self.medicine.product_id)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.form.name = "Caplet"
+            self.form.save()
+
+        self.assertEqual(detail_cache.get(self.medicine.product_id)["medicine"]["form"], "Caplet")
+
+    def test_file_based_backend(self):
+        with tempfile.TemporaryDirectory() as directory:
+            backend = {"default": {"BACKEND": "django.core.cache.backends.filebased.FileBasedCache", "LOCATION": directory}}
+            with override_settings(CACHES=backend):
+                product_id = self.good.product_id
+                detail_cache.get(product_id)
+                with self.assertNumQueries(0):
+                    self.assertEqual(detail_cache.get(product_id)["general_good"]["type"], "TOILETRIES")
+
+                GeneralGood.objects.filter(pk=self.good.pk).update(type="SOAP")
+                detail_cache.bump_version(product_id)
+
+                self.assertEqual(detail_cache.get(product_id)["general_good"]["type"], "SOAP")
+
+
+class SharedCacheCheckTestCase(SimpleTestCase):
+    """Test cases for refusing a per-process cache when several processes serve traffic."""
+
+    @override_settings(SERVING_PROCESSES=2)
+    def test_locmem_with_several_processes(self):
+        self.assertEqual([error.id for error in check_shared_cache(None)], ["products.E001"])
+
+    def test_locmem_with_one_process(self):
+        self.assertEqual(check_shared_cache(None), [])
+
+    def test_shared_backend(self):
+        with tempfile.TemporaryDirectory() as directory:
+            backend = {"default": {"BACKEND": "django.core.cache.backends.filebased.FileBasedCache", "LOCATION": directory}}
+            with override_settings(CACHES=backend, SERVING_PROCESSES=2):
+                self.assertEqual(check_shared_cache(None), [])
@@ -0,0 +1,109 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from .. import catalog
+from ..importers import import_catalog
+from ..models import Product, Medicine, GeneralGood, MedicineForm, DosageUnit, CatalogEntry, ProductCategory, MedicineType
+
+
+class CatalogEntryTestCase(TestCase):
+    """Test cases for the flattened catalog read table and the signals that keep it in sync."""
+
+    def setUp(self):
+        self.form = MedicineForm.objects.create(name="Tablet", description="Solid dose")
+        self.product = Product.objects.create(brand="Unilab", name="Biogesic")
+        self.medicine = Medicine.objects.create(
+            product=self.product, generic_name="paracetamol", dosage="500mg", form=self.form,
+            usage="Fever", side_effects="-", prescription_type=MedicineType.OTC,
+        )
+        soap = Product.objects.create(brand="Safeguard", name="Bar Soap", category=ProductCategory.GENERAL_GOODS)
+        self.soap = GeneralGood.objects.create(product=soap, type="TOILETRIES", unit="bar", notes="-")
+
+    # Boilerplate; helper method to read an entry back as a dict
+    def entry(self, product):
+        return CatalogEntry.objects.filter(product=product).values(
+            "brand", "name", "category", "status", "generic_name", "form", "dosage", "prescription_type", "unit",
+        ).first()
+
+    def test_entries_are_created_with_their_details(self):
+        self.assertEqual(self.entry(self.product), {
+            "brand": "Unilab", "name": "Biogesic", "category": "MEDICINE", "status": "DRAFT",
+            "generic_name": "paracetamol", "form": "Tablet", "dosage": "500mg", "prescription_type": "OTC", "unit": "",
+        })
+        self.assertEqual(self.entry(self.soap.product)["unit"], "bar")
+        self.assertEqual(self.entry(self.soap.product)["generic_name"], "")
+
+    def test_product_and_detail_changes_are_copied(self):
+        self.product.status = "PUBLISHED"
+        self.product.save()
+        self.medicine.dosage = "250mg"
+        self.medicine.save()
+
+        entry = self.entry(self.product)
+        self.assertEqual((entry["status"], entry["dosage"]), ("PUBLISHED", "250mg"))
+
+    def test_renaming_a_form_updates_its_medicines(self):
+        self.form.name = "Caplet"
+        self.form.save()
+
+        self.assertEqual(self.entry(self.product)["form"], "Caplet")
+
+    def test_deleting_the_detail_clears_it_from_the_entry(self):
+        self.medicine.delete()
+
+        self.assertEqual(self.entry(self.product)["generic_name"], "")
+
+    def test_deleting_the_product_removes_the_entry(self):
+        self.product.delete()
+        self.soap.product.delete()
+
+        self.assertFalse(CatalogEntry.objects.exists())
+
+    def test_deleting_a_form_refreshes_its_medicines(self):
+        self.form.delete()
+
+        self.assertEqual(self.entry(self.product)["form"], "")
+        self.assertEqual(catalog.find_drift(), [])
+
+    def test_bulk_imports_are_copied(self):
+        DosageUnit.objects.create(name="mg", description="Milligram")
+        header = "brand,name,category,generic_name,dosage,dosage_unit,form,usage,side_effects,prescription_type,type,unit,notes\n"
+        import_catalog(StringIO(header + "GSK,Amoxil,MEDICINE,amoxicillin,500,mg,Tablet,Infection,-,PRESCRIPTION,,,\n"))
+
+        self.assertEqual(CatalogEntry.objects.get(name="Amoxil").generic_name, "amoxicillin")
+        self.assertEqual(catalog.find_drift(), [])
+
+    def test_list_query_is_a_single_table(self):
+        with self.assertNumQueries(1) as context:
+            list(CatalogEntry.objects.filter(category=ProductCategory.MEDICINE, form="Tablet").order_by("-date_created"))
+
+        self.assertNotIn("JOIN", context.captured_queries[0]["sql"])
+
+    def test_drift_is_found_and_rebuilt(self):
+        CatalogEntry.objects.filter(product=self.product).update(dosage="stale")
+        CatalogEntry.objects.filter(product=self.soap.product).delete()
+
+        self.assertEqual(catalog.find_drift(), sorted([self.product.pk, self.soap.product_id]))
+        with self.assertRaises(CommandError):
+            call_command("rebuild_catalog_entries", "--check")
+
+        out = StringIO()
+        call_command("rebuild_catalog_entries", stdout=out)
+
+        self.assertIn("Rebuilt 2 catalog entries.", out.getvalue())
+        self.assertEqual(catalog.find_drift(), [])
+        self.assertEqual(self.entry(self.product)["dosage"], "500mg")
+
+    def test_admin_changelist(self):
+        user = get_user_model().objects.create_superuser("admin", "admin@example.com", "password")
+        self.client.force_login(user)
+
+        response = self.client.get("/admin/products/catalogentry/", {"form": "Tablet"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Biogesic")
+        self.assertNotContains(response, "Bar Soap")
@@ -0,0 +1,73 @@
+import csv
+import json
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Permission
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from ..exporters import EXPORT_COLUMNS, export_lines
+from ..models import Product, Medicine, GeneralGood, MedicineForm, ProductCategory
+
+
+class CatalogExportTestCase(TestCase):
+    """Test cases for the streaming catalog export."""
+
+    def setUp(self):
+        form = MedicineForm.objects.create(name="Tablet", description="Solid dose")
+        product = Product.objects.create(brand="Unilab", name="Biogesic")
+        Medicine.objects.create(product=product, generic_name="paracetamol", dosage="500mg", form=form, usage="Fever", side_effects="-")
+        product = Product.objects.create(brand="Safeguard", name="Bar Soap", category=ProductCategory.GENERAL_GOODS)
+        GeneralGood.objects.create(product=product, type="TOILETRIES", notes="Antibacterial")
+
+    def test_csv_rows_join_details(self):
+        rows = list(csv.DictReader(export_lines("csv")))
+
+        self.assertEqual(list(rows[0]), list(EXPORT_COLUMNS))
+        self.assertEqual((rows[0]["name"], rows[0]["form"], rows[0]["type"]), ("Biogesic", "Tablet", ""))
+        self.assertEqual((rows[1]["name"], rows[1]["generic_name"], rows[1]["notes"]), ("Bar Soap", "", "Antibacterial"))
+
+    def test_jsonl_rows(self):
+        rows = [json.loads(line) for line in export_lines("jsonl")]
+
+        self.assertEqual(rows[0]["generic_name"], "paracetamol")
+        self.assertIsNone(rows[1]["generic_name"])
+
+    def test_export_is_a_single_query(self):
+        """Test that the details are joined in, instead of being fetched per product."""
+        for i in range(10):
+            Product.objects.create(brand="Brand", name=f"Product {i}")
+
+        with self.assertNumQueries(1):
+            lines = list(export_lines("csv", chunk_size=5))
+
+        self.assertEqual(len(lines), 13)
+
+    def test_unknown_format(self):
+        with self.assertRaises(ValueError):
+            export_lines("xml")
+
+    def test_command(self):
+        out = StringIO()
+        call_command("export_catalog", format="jsonl", stdout=out)
+
+        self.assertEqual([json.loads(line)["name"] for line in out.getvalue().splitlines()], ["Biogesic", "Bar Soap"])
+
+    def test_view_streams_export(self):
+        user = get_user_model().objects.create_user("erp", password="password")
+        user.user_permissions.add(Permission.objects.get(codename="view_product"))
+        self.client.force_login(user)
+
+        response = self.client.get(reverse("products:catalog-export"))
+
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Type"], "text/csv; charset=utf-8")
+        self.assertEqual(len(b"".join(response.streaming_content).decode().splitlines()), 3)
+
+    def test_view_requires_permission(self):
+        user = get_user_model().objects.create_user("clerk", password="password")
+        self.client.force_login(user)
+
+        self.assertEqual(self.client.get(reverse("products:catalog-export")).status_code, 403)
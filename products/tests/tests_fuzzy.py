@@ -0,0 +1,80 @@
+from django.test import TestCase
+
+from .. import fuzzy
+from ..fuzzy import TrigramIndex, trigrams
+from ..models import Product, Medicine, MedicineForm
+
+
+class TrigramIndexTestCase(TestCase):
+    """Test cases for the in-memory trigram index."""
+
+    def setUp(self):
+        self.index = TrigramIndex()
+        for key, name in enumerate(["amoxicillin", "paracetamol", "ibuprofen", "ampicillin"]):
+            self.index.add(key, name)
+
+    def test_trigrams_pad_words(self):
+        self.assertEqual(trigrams("Ab"), {"  a", " ab", "ab "})
+
+    def test_search_finds_misspelt_names(self):
+        self.assertEqual(self.index.search("amoxicilin")[0][1], "amoxicillin")
+        self.assertEqual(self.index.search("paracetmol")[0][1], "paracetamol")
+
+    def test_search_orders_by_similarity(self):
+        results = self.index.search("ampicilin", min_similarity=0.1)
+        similarities = [similarity for _, _, similarity in results]
+
+        self.assertEqual(results[0][1], "ampicillin")
+        self.assertEqual(similarities, sorted(similarities, reverse=True))
+
+    def test_search_drops_unrelated_names(self):
+        self.assertEqual(self.index.search("zzzz"), [])
+
+    def test_add_replaces_and_remove_drops(self):
+        self.index.add(1, "acetaminophen")
+        self.index.remove(0)
+
+        self.assertEqual(self.index.search("paracetamol"), [])
+        self.assertEqual(self.index.search("amoxicillin", min_similarity=0.9), [])
+        self.assertEqual(len(self.index), 3)
+
+
+class FuzzySearchTestCase(TestCase):
+    """Test cases for the lazily built product name index."""
+
+    def setUp(self):
+        fuzzy.reset_index()
+        self.addCleanup(fuzzy.reset_index)
+        self.form = MedicineForm.objects.create(name="Tablet", description="Solid dose")
+        self.product = Product.objects.create(brand="Unilab", name="Biogesic")
+        self.medicine = Medicine.objects.create(product=self.product, generic_name="paracetamol", dosage="500mg", form=self.form, usage="-", side_effects="-")
+
+    def test_index_is_built_lazily(self):
+        self.assertFalse(fuzzy.is_loaded())
+        fuzzy.fuzzy_search("biogesik")
+
+        self.assertTrue(fuzzy.is_loaded())
+
+    def test_matches_product_and_generic_names(self):
+        self.assertEqual(fuzzy.fuzzy_search("paracetmol")[0][:2], (self.product.pk, "paracetamol"))
+        self.assertEqual(fuzzy.fuzzy_search("biogesik")[0][:2], (self.product.pk, "Biogesic"))
+
+    def test_product_listed_once(self):
+        Product.objects.filter(pk=self.product.pk).update(name="Paracetamol")
+        fuzzy.reset_index()
+
+        self.assertEqual(len(fuzzy.fuzzy_search("paracetamol")), 1)
+
+    def test_medicine_changes_refresh_loaded_index(self):
+        fuzzy.get_index()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.medicine.generic_name = "acetaminophen"
+            self.medicine.save()
+
+        self.assertEqual(fuzzy.fuzzy_search("acetaminofen")[0][1], "acetaminophen")
+        self.assertEqual(fuzzy.fuzzy_search("paracetmol"), [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.delete()
+
+        self.assertEqual(fuzzy.fuzzy_search("acetaminofen"), [])
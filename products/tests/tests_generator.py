@@ -0,0 +1,74 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from suppliers.models import Suppliers, SupplierPrice
+
+from .. import search
+from ..generator import generate_catalog
+from ..models import Product, Medicine, GeneralGood, MedicineForm, DosageUnit, Barcode
+from ..validators import normalize_gtin
+
+
+class GenerateCatalogTestCase(TestCase):
+    """Test cases for the synthetic catalog generator."""
+
+    def test_generates_the_requested_catalog(self):
+        counts = generate_catalog(200, suppliers=3, seed=1, batch_size=64)
+
+        self.assertEqual(counts.products, 200)
+        self.assertEqual(Product.objects.count(), 200)
+        self.assertEqual(Medicine.objects.count() + GeneralGood.objects.count(), 200)
+        self.assertEqual((Medicine.objects.count(), GeneralGood.objects.count()), (counts.medicines, counts.general_goods))
+        self.assertGreater(counts.medicines, 0)
+        self.assertGreater(counts.general_goods, 0)
+        self.assertEqual(Suppliers.objects.count(), 3)
+        self.assertEqual(SupplierPrice.objects.count(), 400)
+        self.assertTrue(MedicineForm.objects.exists())
+        self.assertTrue(DosageUnit.objects.exists())
+
+    def test_barcodes_are_valid_gtins(self):
+        generate_catalog(50, seed=1)
+
+        codes = list(Barcode.objects.values_list("code", flat=True))
+        self.assertEqual(len(codes), 50)
+        self.assertEqual([normalize_gtin(code) for code in codes], codes)
+
+    def test_same_seed_gives_the_same_catalog(self):
+        generate_catalog(30, seed=5)
+        first = list(Product.objects.order_by("id").values_list("brand", "name", "category", "status"))
+        Product.objects.all().delete()
+
+        generate_catalog(30, seed=5)
+        second = list(Product.objects.order_by("id").values_list("brand", "name", "category", "status"))
+
+        self.assertEqual(first, second)
+
+    def test_lookup_tables_are_reused(self):
+        generate_catalog(10, seed=1)
+        forms = MedicineForm.objects.count()
+
+        generate_catalog(10, seed=2)
+
+        self.assertEqual(MedicineForm.objects.count(), forms)
+
+    def test_generated_products_are_searchable(self):
+        generate_catalog(100, seed=1, medicine_share=1)
+        medicine = Medicine.objects.select_related("product").first()
+
+        self.assertIn(medicine.product, search.search_products(medicine.generic_name, limit=100))
+
+    def test_command(self):
+        out = StringIO()
+        call_command("generate_catalog", "25", "--suppliers", "2", "--prices-per-product", "1", stdout=out)
+
+        self.assertIn("Created 25 products", out.getvalue())
+        self.assertEqual(SupplierPrice.objects.count(), 25)
+
+    def test_command_rejects_bad_options(self):
+        with self.assertRaises(CommandError):
+            call_command("generate_catalog", "10", "--medicine-share", "2")
+        with self.assertRaises(CommandError):
+            call_command("generate_catalog", "10", "--suppliers", "0")
@@ -0,0 +1,110 @@
+import json
+import tempfile
+from io import StringIO
+from pathlib import Path
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from .. import search
+from ..importers import guess_format, import_catalog
+from ..models import Product, Medicine, GeneralGood, MedicineForm, DosageUnit, ProductCategory, MedicineType
+
+CSV_HEADER = "brand,name,category,generic_name,dosage,dosage_unit,form,usage,side_effects,prescription_type,type,unit,notes\n"
+
+
+class CatalogImportTestCase(TestCase):
+    """Test cases for the streaming catalog importer."""
+
+    def setUp(self):
+        MedicineForm.objects.create(name="Tablet", description="Solid dose")
+        DosageUnit.objects.create(name="mg", description="Milligram")
+
+    def test_import_csv(self):
+        stream = StringIO(
+            CSV_HEADER
+            + "Unilab,Biogesic,MEDICINE,paracetamol,500,mg,tablet,Fever,Nausea,otc,,,\n"
+            + "Safeguard,Bar Soap,GG,,,,,,,,TOILETRIES,pc,Antibacterial\n"
+        )
+        result = import_catalog(stream)
+
+        self.assertEqual((result.created, result.failed), (2, 0))
+        medicine = Medicine.objects.select_related("product", "form").get()
+        self.assertEqual(medicine.product.name, "Biogesic")
+        self.assertEqual(medicine.form.name, "Tablet")
+        self.assertEqual(medicine.dosage, "500 mg")
+        self.assertEqual(medicine.prescription_type, MedicineType.OTC)
+        self.assertEqual(GeneralGood.objects.get().product.category, ProductCategory.GENERAL_GOODS)
+
+    def test_import_jsonl(self):
+        rows = [
+            {"brand": "GSK", "name": "Amoxil", "generic_name": "amoxicillin", "dosage": "250mg", "form": "Tablet", "usage": "-", "side_effects": "-"},
+            {"brand": "Colgate", "name": "Toothpaste", "category": "GG", "type": "ORAL CARE", "notes": "-"},
+        ]
+        result = import_catalog(StringIO("\n".join(json.dumps(row) for row in rows)), format="jsonl")
+
+        self.assertEqual(result.created, 2)
+        self.assertEqual(Medicine.objects.get().generic_name, "amoxicillin")
+
+    def test_invalid_rows_are_reported_and_skipped(self):
+        stream = StringIO(
+            CSV_HEADER
+            + "Unilab,Biogesic,MEDICINE,paracetamol,500,mg,capsule,Fever,Nausea,OTC,,,\n"
+            + ",Nameless,GG,,,,,,,,TOILETRIES,pc,-\n"
+            + "GSK,Amoxil,MEDICINE,amoxicillin,250,mg,Tablet,-,-,PRESCRIPTION,,,\n"
+        )
+        result = import_catalog(stream, batch_size=1)
+
+        self.assertEqual(result.created, 1)
+        self.assertEqual([error.line for error in result.errors], [2, 3])
+        self.assertIn("form: Unknown medicine form 'capsule'.", result.errors[0].messages)
+        self.assertTrue(result.errors[1].messages[0].startswith("brand:"))
+        self.assertEqual(list(Product.objects.values_list("name", flat=True)), ["Amoxil"])
+
+    def test_bad_json_line_is_reported(self):
+        result = import_catalog(StringIO('{"brand": \n[1, 2]\n'), format="jsonl")
+
+        self.assertEqual([error.line for error in result.errors], [1, 2])
+
+    def test_query_count_does_not_grow_with_rows(self):
+        """Test that lookups are preloaded and rows are written in bulk, so a batch costs the same whatever its size."""
+        def count_queries(start, count):
+            rows = "".join(f"Brand,Medicine {i},MEDICINE,generic {i},5,mg,Tablet,-,-,OTC,,,\n" for i in range(start, start + count))
+            with CaptureQueriesContext(connection) as ctx:
+                result = import_catalog(StringIO(CSV_HEADER + rows), batch_size=100)
+            self.assertEqual(result.created, count)
+            return len(ctx.captured_queries)
+
+        # The first import warms the lookup table cache
+        count_queries(0, 1)
+        self.assertEqual(count_queries(1, 3), count_queries(4, 60))
+
+    def test_imported_products_are_searchable(self):
+        import_catalog(StringIO(CSV_HEADER + "Unilab,Biogesic,MEDICINE,paracetamol,500,mg,Tablet,Fever,-,OTC,,,\n"))
+
+        self.assertEqual([product.name for product in search.search_products("paracetamol")], ["Biogesic"])
+
+    def test_command(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "catalog.csv"
+            path.write_text(CSV_HEADER + "Unilab,Biogesic,MEDICINE,paracetamol,500,mg,Tablet,Fever,-,OTC,,,\n")
+            out, err = StringIO(), StringIO()
+            call_command("import_catalog", str(path), stdout=out, stderr=err)
+
+        self.assertIn("Imported 1 products, 0 rows rejected.", out.getvalue())
+
+    def test_command_format(self):
+        self.assertEqual([guess_format(Path(name)) for name in ("a.CSV", "a.json", "a.ndjson", "a.xlsx")], ["csv", "jsonl", "jsonl", None])
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "catalog.txt"
+            path.write_text('{"brand": "Unilab", "name": "Biogesic", "category": "GG"}\n')
+            with self.assertRaises(CommandError):
+                call_command("import_catalog", str(path), stdout=StringIO())
+            err = StringIO()
+            call_command("import_catalog", str(path), format="jsonl", max_errors=0, stdout=StringIO(), stderr=err)
+
+        self.assertEqual(err.getvalue(), "... and 1 more row errors\n")
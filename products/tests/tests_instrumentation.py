@@ -0,0 +1,118 @@
+import json
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from pharmacy_inventory.middleware import QueryInstrumentationMiddleware, normalize_sql, record_queries
+
+from ..models import Product, GeneralGood, ProductCategory
+from .tests_async import asgi_request
+
+
+class NormalizeSqlTestCase(TestCase):
+    """Test cases for collapsing statements into query shapes."""
+
+    def test_literals_and_in_lists_are_collapsed(self):
+        self.assertEqual(
+            normalize_sql("SELECT * FROM t WHERE id IN (%s, %s, %s) AND name = 'x' LIMIT 21"),
+            "SELECT * FROM t WHERE id IN (...) AND name = ? LIMIT ?",
+        )
+        self.assertEqual(normalize_sql('SAVEPOINT "s1234_x5"'), normalize_sql('SAVEPOINT "s99_x1"'))
+
+
+class QueryInstrumentationTestCase(TestCase):
+    """Test cases for the per-request SQL instrumentation middleware."""
+
+    def setUp(self):
+        self.products = Product.objects.bulk_create(
+            Product(brand="Brand", name=f"Product {i}", category=ProductCategory.GENERAL_GOODS) for i in range(12)
+        )
+        self.request = RequestFactory().get("/admin/products/generalgood/")
+
+    # Boilerplate; helper method for a view that loads every product one query at a time
+    def n_plus_one_view(self, request):
+        for product in self.products:
+            Product.objects.get(pk=product.pk)
+        return HttpResponse("ok")
+
+    def test_record_queries(self):
+        with record_queries() as recorder:
+            list(Product.objects.all())
+            for product in self.products[:3]:
+                Product.objects.get(pk=product.pk)
+
+        self.assertEqual(recorder.count, 4)
+        self.assertGreater(recorder.duration, 0)
+        self.assertEqual([count for _, count in recorder.repeated(3)], [3])
+
+    def test_server_timing_header(self):
+        response = QueryInstrumentationMiddleware(lambda request: HttpResponse(str(Product.objects.count())))(self.request)
+
+        self.assertRegex(response["Server-Timing"], r'^db;dur=[\d.]+;desc="1 queries", total;dur=[\d.]+$')
+
+    def test_repeated_queries_are_logged_as_warning(self):
+        middleware = QueryInstrumentationMiddleware(self.n_plus_one_view)
+
+        with self.assertLogs("pharmacy_inventory.queries", "WARNING") as logs:
+            response = middleware(self.request)
+
+        payload = json.loads(logs.records[0].getMessage())
+        self.assertEqual((payload["path"], payload["queries"]), ("/admin/products/generalgood/", 12))
+        self.assertEqual(payload["repeated"][0]["count"], 12)
+        self.assertIn("WHERE", payload["repeated"][0]["sql"])
+        self.assertIn("1 repeated", response["Server-Timing"])
+
+    @override_settings(QUERY_INSTRUMENTATION_REPEAT_THRESHOLD=20)
+    def test_below_threshold_is_logged_as_info(self):
+        middleware = QueryInstrumentationMiddleware(self.n_plus_one_view)
+
+        with self.assertLogs("pharmacy_inventory.queries", "INFO") as logs:
+            middleware(self.request)
+
+        self.assertEqual(logs.records[0].levelname, "INFO")
+        self.assertEqual(json.loads(logs.records[0].getMessage())["repeated"], [])
+
+    @override_settings(QUERY_INSTRUMENTATION_SAMPLE_RATE=0)
+    def test_unsampled_requests_are_left_alone(self):
+        response = QueryInstrumentationMiddleware(self.n_plus_one_view)(self.request)
+
+        self.assertFalse(response.has_header("Server-Timing"))
+
+    async def test_async_requests_count_queries_run_in_threads(self):
+        async def view(request):
+            await sync_to_async(list)(Product.objects.all())
+            return HttpResponse("ok")
+
+        response = await QueryInstrumentationMiddleware(view)(self.request)
+
+        self.assertIn('desc="1 queries"', response["Server-Timing"])
+
+    def test_general_good_changelist_has_no_n_plus_one(self):
+        GeneralGood.objects.bulk_create(GeneralGood(product=product, type="Soap", notes="-") for product in self.products)
+        user = get_user_model().objects.create_superuser("admin", "admin@example.com", "password")
+        self.client.force_login(user)
+
+        with record_queries() as recorder:
+            response = self.client.get("/admin/products/generalgood/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(recorder.repeated(len(self.products)), [])
+
+
+class AsgiInstrumentationTestCase(TransactionTestCase):
+    """Test cases for the instrumentation of the POS JSON endpoints served by the ASGI application."""
+
+    async def test_api_requests_are_instrumented(self):
+        await Product.objects.abulk_create(Product(brand="Brand", name=f"Product {i}") for i in range(3))
+
+        with self.assertLogs("pharmacy_inventory.queries", "INFO") as logs:
+            status, headers, _ = await asgi_request(reverse("products:api-product-list"))
+
+        self.assertEqual(status, 200)
+        self.assertRegex(headers["server-timing"], r'^db;dur=[\d.]+;desc="\d+ queries", total;dur=[\d.]+$')
+        payload = json.loads(logs.records[0].getMessage())
+        self.assertEqual(payload["path"], "/products/api/products/")
+        self.assertGreater(payload["queries"], 0)
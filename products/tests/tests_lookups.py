@@ -0,0 +1,75 @@
+from django.core.cache import cache
+from django.test import TestCase
+
+from ..lookups import LookupCache, medicine_forms
+from ..models import MedicineForm, DosageUnit
+
+
+class LookupCacheTestCase(TestCase):
+    """Test cases for the process-local cache of the lookup tables."""
+
+    def setUp(self):
+        self.tablet = MedicineForm.objects.create(name="Tablet", description="Solid dose")
+        self.syrup = MedicineForm.objects.create(name="Syrup", description="Liquid dose")
+        self.lookup = LookupCache(MedicineForm, check_interval=0)
+        self.addCleanup(cache.delete, self.lookup.version_key)
+
+    def test_warm_lookups_run_no_queries(self):
+        self.lookup.get(self.tablet.pk)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.lookup.get(self.tablet.pk), self.tablet)
+            self.assertEqual(self.lookup.get_by_name("SYRUP"), self.syrup)
+            self.assertIsNone(self.lookup.get_by_name("Capsule"))
+            self.assertEqual(self.lookup.all(), [self.tablet, self.syrup])
+
+    def test_cold_lookup_loads_table_once(self):
+        with self.assertNumQueries(1):
+            self.lookup.get(self.tablet.pk)
+            self.lookup.get(self.syrup.pk)
+
+    def test_miss_by_id_reads_the_row(self):
+        """Test that a row created without a signal, or by another process, is still found."""
+        self.lookup.check_interval = 60
+        self.lookup.get(self.tablet.pk)
+        [capsule] = MedicineForm.objects.bulk_create([MedicineForm(name="Capsule", description="Hard shell")])
+
+        with self.assertNumQueries(1):
+            self.assertEqual(self.lookup.get(capsule.pk), capsule)
+            self.assertEqual(self.lookup.get(capsule.pk), capsule)
+        self.assertIsNone(self.lookup.get(0))
+
+    def test_shared_version_change_reloads(self):
+        """Test that a write made by another process is picked up through the version counter."""
+        self.lookup.get(self.tablet.pk)
+        MedicineForm.objects.filter(pk=self.tablet.pk).update(name="Caplet")
+        self.assertEqual(self.lookup.get(self.tablet.pk).name, "Tablet")
+
+        LookupCache(MedicineForm).invalidate()
+
+        self.assertEqual(self.lookup.get(self.tablet.pk).name, "Caplet")
+
+    def test_version_is_not_checked_within_interval(self):
+        self.lookup.check_interval = 60
+        self.lookup.get(self.tablet.pk)
+        LookupCache(MedicineForm).invalidate()
+
+        self.assertEqual(self.lookup.get_by_name("tablet"), self.tablet)
+
+
+class LookupCacheSignalTestCase(TestCase):
+    """Test cases for the signal driven invalidation of the module level caches."""
+
+    def test_save_and_delete_invalidate(self):
+        form = MedicineForm.objects.create(name="Tablet", description="Solid dose")
+        self.assertEqual(medicine_forms.get_by_name("tablet"), form)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            form.name = "Caplet"
+            form.save()
+        self.assertEqual(medicine_forms.get(form.pk).name, "Caplet")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            DosageUnit.objects.create(name="mg", description="Milligram")
+            form.delete()
+        self.assertIsNone(medicine_forms.get_by_name("caplet"))
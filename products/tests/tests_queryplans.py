@@ -0,0 +1,34 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from ..models import Product
+from ..queryplans import SQLITE_TABLE_SCAN, find_table_scans
+
+
+class CatalogQueryPlanTestCase(TestCase):
+    """The hot catalog filters should be answered from an index, never from a full table scan."""
+
+    def test_catalog_queries_use_indexes(self):
+        scans = find_table_scans()
+
+        self.assertEqual(scans, [], "\n\n".join(f"{label}:\n{plan}" for label, _, plan in scans))
+
+    def test_detects_table_scan(self):
+        """Test that a filter on an unindexed column is reported."""
+        scans = find_table_scans([("product name contains", Product.objects.filter(name__contains="gesic"))])
+
+        self.assertEqual(len(scans), 1)
+        self.assertEqual(scans[0][1], "products_product")
+
+    def test_index_ordered_scans_are_not_table_scans(self):
+        self.assertEqual(SQLITE_TABLE_SCAN.findall("SCAN products_product USING INDEX product_date_created_idx"), [])
+        self.assertEqual(SQLITE_TABLE_SCAN.findall("SCAN products_medicine USING COVERING INDEX medicine_rx_generic_idx"), [])
+        self.assertEqual(SQLITE_TABLE_SCAN.findall("SCAN products_product"), ["products_product"])
+
+    def test_command_succeeds(self):
+        out = StringIO()
+        call_command("check_query_plans", stdout=out)
+
+        self.assertIn("use an index", out.getvalue())
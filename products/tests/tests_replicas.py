@@ -0,0 +1,170 @@
+import shutil
+import tempfile
+from io import StringIO
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connections, router
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TransactionTestCase, override_settings
+
+from pharmacy_inventory import routers
+from pharmacy_inventory.routers import PIN_COOKIE, ReplicaPinMiddleware, ReplicaRouter, pin_on_write, read_from_primary
+from suppliers.models import Suppliers
+
+from .. import cache as detail_cache
+from ..models import Product, Barcode, MedicineForm
+
+
+# Boilerplate; helper function standing in for the database's own execute
+def execute(sql, params, many, context):
+    return None
+
+
+@override_settings(DATABASE_REPLICAS=["replica"])
+class ReplicaRouterTestCase(SimpleTestCase):
+    """Test cases for the choice of database made by the replica router."""
+
+    def setUp(self):
+        routers._pinned_until.set(0.0)
+        self.router = ReplicaRouter()
+
+    def test_catalog_reads_go_to_the_replicas(self):
+        for model in (Product, MedicineForm, Suppliers):
+            self.assertEqual(self.router.db_for_read(model), "replica")
+        self.assertIsNone(self.router.db_for_read(Barcode))
+        self.assertIsNone(self.router.db_for_read(get_user_model()))
+        self.assertEqual(self.router.db_for_write(Product), "default")
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_no_replicas_means_no_opinion(self):
+        self.assertIsNone(self.router.db_for_read(Product))
+
+    def test_writes_pin_reads_to_the_primary(self):
+        pin_on_write(execute, 'SELECT "products_product"."id" FROM "products_product"', None, False, {})
+        self.assertEqual(self.router.db_for_read(Product), "replica")
+
+        pin_on_write(execute, ' UPDATE "products_product" SET "name" = %s', ["x"], False, {})
+        self.assertEqual(self.router.db_for_read(Product), "default")
+
+    @override_settings(REPLICA_PIN_SECONDS=0)
+    def test_pin_expires(self):
+        pin_on_write(execute, "INSERT INTO products_product VALUES (%s)", [1], False, {})
+
+        self.assertEqual(self.router.db_for_read(Product), "replica")
+
+    def test_read_from_primary(self):
+        with read_from_primary():
+            self.assertEqual(self.router.db_for_read(Product), "default")
+        self.assertEqual(self.router.db_for_read(Product), "replica")
+
+    def test_replicas_are_not_migrated(self):
+        self.assertIs(self.router.allow_migrate("replica", "products"), False)
+        self.assertIsNone(self.router.allow_migrate("default", "products"))
+
+
+@override_settings(DATABASE_REPLICAS=["replica"])
+class ReplicaPinMiddlewareTestCase(SimpleTestCase):
+    """Test cases for carrying the primary pin over to a user's next requests."""
+
+    def setUp(self):
+        routers._pinned_until.set(0.0)
+        self.factory = RequestFactory()
+        self.databases_read = []
+
+    # Boilerplate; helper views that write, or record where a catalog read would go
+    def writing_view(self, request):
+        pin_on_write(execute, "UPDATE products_product SET name = %s", ["x"], False, {})
+        return HttpResponse("ok")
+
+    def reading_view(self, request):
+        self.databases_read.append(router.db_for_read(Product))
+        return HttpResponse("ok")
+
+    def test_a_write_sets_the_cookie_and_later_reads_use_the_primary(self):
+        response = ReplicaPinMiddleware(self.writing_view)(self.factory.post("/"))
+        self.assertIn(PIN_COOKIE, response.cookies)
+        self.assertTrue(response.cookies[PIN_COOKIE]["httponly"])
+
+        request = self.factory.get("/")
+        request.COOKIES[PIN_COOKIE] = response.cookies[PIN_COOKIE].value
+        ReplicaPinMiddleware(self.reading_view)(request)
+        ReplicaPinMiddleware(self.reading_view)(self.factory.get("/"))
+
+        self.assertEqual(self.databases_read, ["default", "replica"])
+
+    def test_reads_set_no_cookie(self):
+        response = ReplicaPinMiddleware(self.reading_view)(self.factory.get("/"))
+
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+    def test_the_pin_does_not_leak_out_of_the_request(self):
+        ReplicaPinMiddleware(self.writing_view)(self.factory.post("/"))
+
+        self.assertFalse(routers.is_pinned())
+
+    def test_invalid_cookie_is_ignored(self):
+        request = self.factory.get("/")
+        request.COOKIES[PIN_COOKIE] = "soon"
+        ReplicaPinMiddleware(self.reading_view)(request)
+
+        self.assertEqual(self.databases_read, ["replica"])
+
+    async def test_async_requests(self):
+        async def writing_view(request):
+            return self.writing_view(request)
+
+        response = await ReplicaPinMiddleware(writing_view)(self.factory.post("/"))
+
+        self.assertIn(PIN_COOKIE, response.cookies)
+
+
+@override_settings(DATABASE_REPLICAS=["replica"])
+class SqliteReplicaTestCase(TransactionTestCase):
+    """Test cases for reading from a second SQLite file refreshed from the primary."""
+
+    def setUp(self):
+        # A connection added outside of the DATABASES setting, so the test runner leaves it alone
+        self.directory = tempfile.mkdtemp()
+        primary = connections["default"]
+        connections["replica"] = type(primary)({**primary.settings_dict, "NAME": str(Path(self.directory) / "replica.sqlite3")}, "replica")
+        call_command("refresh_replicas", stdout=StringIO())
+        cache.clear()
+        routers._pinned_until.set(0.0)
+
+    def tearDown(self):
+        connections["replica"].close()
+        del connections["replica"]
+        shutil.rmtree(self.directory)
+        routers._pinned_until.set(0.0)
+
+    def test_replica_reads_lag_until_refreshed(self):
+        product = Product.objects.create(brand="Unilab", name="Biogesic")
+        routers._pinned_until.set(0.0)
+
+        self.assertEqual(Product.objects.all().db, "replica")
+        self.assertFalse(Product.objects.filter(pk=product.pk).exists())
+
+        out = StringIO()
+        call_command("refresh_replicas", stdout=out)
+
+        self.assertIn("Refreshed replica", out.getvalue())
+        self.assertTrue(Product.objects.filter(pk=product.pk).exists())
+
+    def test_reads_after_a_write_see_it(self):
+        product = Product.objects.create(brand="Unilab", name="Biogesic")
+
+        self.assertEqual(Product.objects.get(pk=product.pk).name, "Biogesic")
+
+    def test_caches_load_from_the_primary(self):
+        product = Product.objects.create(brand="Unilab", name="Biogesic")
+        routers._pinned_until.set(0.0)
+
+        self.assertEqual(detail_cache.get_many([product.pk])[product.pk]["name"], "Biogesic")
+
+    def test_unknown_replica(self):
+        with self.assertRaises(CommandError):
+            call_command("refresh_replicas", "default")
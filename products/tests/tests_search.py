@@ -0,0 +1,77 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+
+from .. import search
+from ..models import Product, Medicine, GeneralGood, MedicineForm, ProductCategory
+
+
+class ProductSearchTestCase(TestCase):
+    """Test cases for the FTS5 catalog search and the signals that keep it in sync."""
+
+    def setUp(self):
+        self.form = MedicineForm.objects.create(name="Tablet", description="Solid dose")
+        self.biogesic = self.create_medicine("Unilab", "Biogesic", "paracetamol", "For fever and mild pain")
+        self.amoxil = self.create_medicine("GSK", "Amoxil", "amoxicillin", "For bacterial infections")
+        product = Product.objects.create(brand="Safeguard", name="Bar Soap", category=ProductCategory.GENERAL_GOODS)
+        self.soap = GeneralGood.objects.create(product=product, type="TOILETRIES", notes="Antibacterial, fever free")
+
+    # Boilerplate; helper method to create a medicine product
+    def create_medicine(self, brand, name, generic_name, usage):
+        product = Product.objects.create(brand=brand, name=name)
+        Medicine.objects.create(product=product, generic_name=generic_name, dosage="500mg", form=self.form, usage=usage, side_effects="-")
+        return product
+
+    def search_names(self, query):
+        return [product.name for product in search.search_products(query)]
+
+    def test_search_by_product_name(self):
+        self.assertEqual(self.search_names("biogesic"), ["Biogesic"])
+
+    def test_search_by_brand(self):
+        self.assertEqual(self.search_names("gsk"), ["Amoxil"])
+
+    def test_search_by_generic_name_prefix(self):
+        """Test that a partial word matches the generic name of a medicine."""
+        self.assertEqual(self.search_names("amoxi"), ["Amoxil"])
+
+    def test_search_by_general_good_notes(self):
+        self.assertEqual(self.search_names("antibacterial"), ["Bar Soap"])
+
+    def test_search_ranks_name_matches_above_notes(self):
+        """Test that a match in the product name ranks above matches in the usage or notes."""
+        Product.objects.filter(pk=self.biogesic.pk).update(name="Fever Tabs")
+        search.index_products([self.biogesic.pk])
+
+        self.assertEqual(self.search_names("fever")[0], "Fever Tabs")
+
+    def test_search_ignores_query_syntax(self):
+        """Test that characters with a meaning in the FTS5 syntax don't raise errors."""
+        self.assertEqual(self.search_names('biogesic" OR NEAR(*'), [])
+        self.assertEqual(self.search_names("   "), [])
+
+    def test_update_refreshes_index(self):
+        self.biogesic.medicine.generic_name = "acetaminophen"
+        self.biogesic.medicine.save()
+
+        self.assertEqual(self.search_names("acetaminophen"), ["Biogesic"])
+        self.assertEqual(self.search_names("paracetamol"), [])
+
+    def test_delete_removes_from_index(self):
+        self.amoxil.delete()
+
+        self.assertEqual(self.search_names("amoxil"), [])
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT COUNT(*) FROM {search.FTS_TABLE}")
+            self.assertEqual(cursor.fetchone()[0], 2)
+
+    def test_rebuild_command(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {search.FTS_TABLE}")
+        out = StringIO()
+        call_command("rebuild_search_index", stdout=out)
+
+        self.assertIn("Indexed 3 products", out.getvalue())
+        self.assertEqual(self.search_names("biogesic"), ["Biogesic"])
@@ -0,0 +1,38 @@
+from django.db import connection
+from django.test import TestCase, override_settings
+
+from pharmacy_inventory.db import apply_sqlite_pragmas
+
+
+class SqlitePragmaTestCase(TestCase):
+    """Test cases for the connection_created hook that applies the SQLite pragmas."""
+
+    def pragma(self, name):
+        with connection.cursor() as cursor:
+            cursor.execute(f"PRAGMA {name}")
+            return cursor.fetchone()[0]
+
+    def restore_pragma(self, name):
+        original = self.pragma(name)
+
+        def restore():
+            with connection.cursor() as cursor:
+                cursor.execute(f"PRAGMA {name} = {original}")
+
+        # The connection is shared with the tests that run after this one
+        self.addCleanup(restore)
+
+    def test_configured_pragmas_are_applied(self):
+        self.restore_pragma("cache_size")
+        self.restore_pragma("busy_timeout")
+
+        with override_settings(SQLITE_PRAGMAS={"cache_size": -32000, "busy_timeout": 1234}):
+            apply_sqlite_pragmas(sender=connection.__class__, connection=connection)
+
+        self.assertEqual(self.pragma("cache_size"), -32000)
+        self.assertEqual(self.pragma("busy_timeout"), 1234)
+
+    def test_no_pragmas_configured(self):
+        with override_settings(SQLITE_PRAGMAS={}):
+            with self.assertNumQueries(0):
+                apply_sqlite_pragmas(sender=connection.__class__, connection=connection)
@@ -0,0 +1,164 @@
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from suppliers.models import Suppliers
+
+from .. import cache as detail_cache
+from ..generator import generate_catalog
+from ..lookups import medicine_forms
+from ..models import Product, Medicine, GeneralGood, MedicineForm, ProductCategory, SyncKind
+from ..sync import changes_page, record_changes
+
+
+# Boilerplate; helper method to read the whole feed after a cursor
+def read_all(cursor=0, limit=1000):
+    changes, cursor, _ = changes_page(cursor, limit)
+    return changes, cursor
+
+
+class ChangesFeedTestCase(TestCase):
+    """Test cases for the changes feed of the offline POS terminals."""
+
+    def setUp(self):
+        cache.clear()
+        self.form = MedicineForm.objects.create(name="Tablet", description="Solid dose")
+        self.product = Product.objects.create(brand="Unilab", name="Biogesic")
+        self.medicine = Medicine.objects.create(
+            product=self.product, generic_name="paracetamol", dosage="500mg", form=self.form, usage="Fever", side_effects="-",
+        )
+        self.supplier = Suppliers.objects.create(
+            name="Zuellig", address="-", telephone_number="-", mobile_number="-",
+            email_address="orders@example.com", contact_person="-", remarks="-",
+        )
+
+    def test_first_sync_returns_everything_once(self):
+        changes, _ = read_all()
+
+        self.assertEqual([(change["kind"], change["id"]) for change in changes], [
+            ("product", self.product.pk), ("supplier", self.supplier.pk),
+        ])
+        self.assertEqual(changes[0]["data"]["medicine"]["generic_name"], "paracetamol")
+        self.assertEqual(changes[1]["data"]["name"], "Zuellig")
+
+    def test_only_changes_after_the_cursor_are_returned(self):
+        _, cursor = read_all()
+        soap = Product.objects.create(brand="Safeguard", name="Bar Soap", category=ProductCategory.GENERAL_GOODS)
+        GeneralGood.objects.create(product=soap, type="TOILETRIES", notes="-")
+        self.medicine.dosage = "250mg"
+        self.medicine.save()
+
+        changes, next_cursor = read_all(cursor)
+
+        self.assertEqual([change["id"] for change in changes], [soap.pk, self.product.pk])
+        self.assertEqual(changes[1]["data"]["medicine"]["dosage"], "250mg")
+        self.assertGreater(next_cursor, cursor)
+        self.assertEqual(read_all(next_cursor), ([], next_cursor))
+
+    def test_repeated_edits_come_back_once(self):
+        _, cursor = read_all()
+        for i in range(20):
+            self.product.name = f"Biogesic {i}"
+            self.product.save()
+
+        changes, _ = read_all(cursor)
+
+        self.assertEqual(len(changes), 1)
+        self.assertEqual(changes[0]["data"]["name"], "Biogesic 19")
+
+    def test_deletes_leave_tombstones(self):
+        _, cursor = read_all()
+        product_id, supplier_id = self.product.pk, self.supplier.pk
+        self.product.delete()
+        self.supplier.delete()
+
+        changes, _ = read_all(cursor)
+
+        self.assertEqual([(change["kind"], change["id"], change["deleted"], change["data"]) for change in changes], [
+            ("product", product_id, True, None), ("supplier", supplier_id, True, None),
+        ])
+
+    def test_renaming_a_form_resends_its_medicines(self):
+        _, cursor = read_all()
+        self.form.name = "Caplet"
+        # The cached product details are dropped once the rename commits
+        with self.captureOnCommitCallbacks(execute=True):
+            self.form.save()
+
+        changes, _ = read_all(cursor)
+
+        self.assertEqual([change["id"] for change in changes], [self.product.pk])
+        self.assertEqual(changes[0]["data"]["medicine"]["form"], "Caplet")
+
+    def test_products_are_read_from_the_database(self):
+        _, cursor = read_all()
+        detail_cache.get(self.product.pk)
+        # A write the cache wasn't told about
+        Product.objects.filter(pk=self.product.pk).update(name="Biogesic Forte")
+        record_changes(SyncKind.PRODUCT, [self.product.pk])
+
+        changes, _ = read_all(cursor)
+
+        self.assertEqual(detail_cache.get(self.product.pk)["name"], "Biogesic")
+        self.assertEqual(changes[0]["data"]["name"], "Biogesic Forte")
+
+    def test_pages_are_bounded(self):
+        generate_catalog(25, suppliers=0, prices_per_product=0, seed=1)
+
+        seen, cursor, pages = [], 0, 0
+        while True:
+            changes, cursor, has_more = changes_page(cursor, limit=10)
+            seen.extend((change["kind"], change["id"]) for change in changes)
+            pages += 1
+            self.assertLessEqual(len(changes), 10)
+            if not has_more:
+                break
+
+        self.assertEqual(pages, 3)
+        self.assertEqual(len(seen), 27)
+        self.assertEqual(len(set(seen)), 27)
+
+    def test_page_query_count_is_fixed(self):
+        generate_catalog(30, suppliers=3, prices_per_product=0, seed=1)
+        medicine_forms.all()
+
+        # The page, the products and the suppliers
+        with self.assertNumQueries(3):
+            changes, _, _ = changes_page(0, limit=100)
+
+        self.assertEqual(len(changes), 35)
+
+    def test_date_updated_moves_on_save(self):
+        Product.objects.filter(pk=self.product.pk).update(date_updated=self.product.date_updated - timedelta(days=1))
+        self.product.refresh_from_db()
+        before = self.product.date_updated
+
+        self.product.save()
+
+        self.assertGreater(self.product.date_updated, before)
+
+
+@override_settings(ASYNC_DATABASE_THREADS=0)
+class ChangesApiTestCase(TestCase):
+    """Test cases for the changes feed endpoint."""
+
+    def setUp(self):
+        cache.clear()
+        generate_catalog(5, suppliers=1, prices_per_product=0, seed=1)
+
+    def test_feed(self):
+        url = reverse("products:api-changes")
+
+        body = self.client.get(url, {"limit": 4}).json()
+        self.assertEqual((len(body["changes"]), body["has_more"]), (4, True))
+
+        body = self.client.get(url, {"cursor": body["cursor"], "limit": 4}).json()
+        self.assertEqual((len(body["changes"]), body["has_more"]), (2, False))
+
+    def test_invalid_cursor(self):
+        url = reverse("products:api-changes")
+
+        self.assertEqual(self.client.get(url, {"cursor": "abc"}).status_code, 400)
+        self.assertEqual(self.client.get(url, {"cursor": "-1"}).status_code, 400)
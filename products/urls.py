@@ -0,0 +1,15 @@
+from django.urls import path
+
+from . import api, views
+
+app_name = "products"
+
+urlpatterns = [
+    path("catalog/export/", views.export_catalog, name="catalog-export"),
+    path("api/products/", api.product_list, name="api-product-list"),
+    path("api/products/search/", api.product_search, name="api-product-search"),
+    path("api/products/scan/", api.basket_scan, name="api-basket-scan"),
+    path("api/products/scan/<str:code>/", api.product_scan, name="api-product-scan"),
+    path("api/products/<int:pk>/", api.product_detail, name="api-product-detail"),
+    path("api/changes/", api.product_changes, name="api-changes"),
+]
@@ -0,0 +1,31 @@
+"""Validators for catalog fields."""
+from django.core.exceptions import ValidationError
+
+GTIN_LENGTHS = (8, 12, 13, 14)
+
+
+def gtin_check_digit(digits):
+    """Return the GS1 check digit for a string of digits without its check digit."""
+    # Weights alternate 3, 1, 3, ... starting from the digit next to the check digit
+    total = sum(int(digit) * (3 if i % 2 == 0 else 1) for i, digit in enumerate(reversed(digits)))
+    return str(-total % 10)
+
+
+def normalize_gtin(code):
+    """Return a scanned GTIN-8, UPC-A, EAN-13 or GTIN-14 as the 14-digit form it is stored in.
+
+    Raises ValueError for anything that isn't a GTIN with a valid check digit.
+    """
+    code = str(code).strip()
+    if not code.isdigit() or len(code) not in GTIN_LENGTHS:
+        raise ValueError(f"'{code}' is not an 8, 12, 13 or 14 digit GTIN.")
+    if gtin_check_digit(code[:-1]) != code[-1]:
+        raise ValueError(f"'{code}' has a wrong check digit.")
+    return code.zfill(14)
+
+
+def validate_gtin(value):
+    try:
+        normalize_gtin(value)
+    except ValueError as exc:
+        raise ValidationError(str(exc))
@@ -1,3 +1,18 @@
-from django.shortcuts import render
+from django.contrib.auth.decorators import permission_required
+from django.http import HttpResponseBadRequest, StreamingHttpResponse
+from django.views.decorators.http import require_GET
 
-# Create your views here.
+from .exporters import CONTENT_TYPES, export_lines
+
+
+@require_GET
+@permission_required("products.view_product", raise_exception=True)
+def export_catalog(request):
+    """Stream the full catalog as CSV (default) or JSON Lines (?format=jsonl)."""
+    format = request.GET.get("format", "csv")
+    if format not in CONTENT_TYPES:
+        return HttpResponseBadRequest(f"Unsupported format '{format}'.")
+
+    response = StreamingHttpResponse(export_lines(format), content_type=CONTENT_TYPES[format])
+    response["Content-Disposition"] = f'attachment; filename="catalog.{format}"'
+    return response
@@ -1,3 +1,30 @@
 from django.contrib import admin
 
-# Register your models here.
+from products.admin import CatalogModelAdmin
+
+from .matching import lookup_filter
+from .models import Suppliers, SupplierPrice
+
+
+@admin.register(Suppliers)
+class SuppliersAdmin(CatalogModelAdmin):
+    list_display = ("name", "contact_person", "telephone_number", "email_address", "date_created")
+    search_fields = ("^name", "^contact_person")
+    ordering = ("name", "id")
+
+    def get_search_results(self, request, queryset, search_term):
+        """Also match the search against the normalized email, phone and name keys."""
+        results, may_have_duplicates = super().get_search_results(request, queryset, search_term)
+        if search_term:
+            term = search_term.strip()
+            results |= queryset.filter(lookup_filter(email=term, phone=term, name=term))
+        return results, may_have_duplicates
+
+
+@admin.register(SupplierPrice)
+class SupplierPriceAdmin(CatalogModelAdmin):
+    list_display = ("product", "supplier", "supplier_sku", "unit_price", "valid_from", "valid_until")
+    list_select_related = ("product", "supplier")
+    search_fields = ("^product__name", "^supplier__name", "=supplier_sku")
+    autocomplete_fields = ("product", "supplier")
+    ordering = ("product", "unit_price", "id")
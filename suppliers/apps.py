@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class SuppliersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'suppliers'
+
+    def ready(self):
+        # Registers the receivers that keep the POS changes feed in sync
+        from . import signals  # noqa: F401
@@ -0,0 +1,140 @@
+"""Finding and merging duplicate suppliers.
+
+find_clusters() reads the lookup keys of every supplier once (see suppliers.matching)
+and hashes each supplier into one block per key: the suppliers sharing an email, a
+phone number or a canonical name. Suppliers that share a block are joined with a
+union-find, so a supplier matching one duplicate by email and another by phone ends up
+in a single cluster. No two suppliers are ever compared directly, so the work grows with
+the number of suppliers rather than with its square.
+
+merge_clusters() folds every cluster into its oldest supplier, a batch of clusters per
+transaction: the survivor takes over the details it lacks and the price list lines of
+products it doesn't already list, the rows of other apps that point at a duplicate, such
+as reorder policies and suggestions, are pointed at the survivor, and the duplicates are
+deleted.
+"""
+from django.db import transaction
+from django.db.models import SET_NULL
+
+from products import audit
+from products.models import SyncKind
+from products.sync import record_changes
+
+from .importers import UPSERT_FIELDS
+from .matching import KEY_FIELDS, SUPPLIER_FIELDS, blocks, is_blank
+from .models import Suppliers, SupplierPrice
+
+# Clusters merged per transaction
+BATCH_SIZE = 500
+
+
+class UnionFind:
+    """Disjoint sets of supplier ids; every set is named by its smallest id."""
+
+    def __init__(self):
+        self.parent = {}
+
+    def find(self, item):
+        root = self.parent.setdefault(item, item)
+        while self.parent[root] != root:
+            root = self.parent[root]
+        # Point the whole path at the root, so later finds are one step
+        while item != root:
+            self.parent[item], item = root, self.parent[item]
+        return root
+
+    def union(self, first, second):
+        first, second = self.find(first), self.find(second)
+        if first != second:
+            # The smallest id stays the root, so the oldest supplier names its cluster
+            first, second = min(first, second), max(first, second)
+            self.parent[second] = first
+        return first
+
+
+def find_clusters(queryset=None, chunk_size=5000):
+    """Return the groups of suppliers sharing a key, as sorted lists of ids, biggest group first."""
+    queryset = Suppliers.objects.all() if queryset is None else queryset
+    sets = UnionFind()
+    # Block -> the first supplier seen in it, which every later one in the block joins
+    first_seen = {}
+    for row in queryset.order_by("pk").values_list("pk", *KEY_FIELDS).iterator(chunk_size=chunk_size):
+        supplier_id = row[0]
+        for block in blocks(dict(zip(KEY_FIELDS, row[1:]))):
+            if block in first_seen:
+                sets.union(first_seen[block], supplier_id)
+            else:
+                first_seen[block] = supplier_id
+
+    clusters = {}
+    for supplier_id in sets.parent:
+        clusters.setdefault(sets.find(supplier_id), []).append(supplier_id)
+    groups = [sorted(members) for members in clusters.values() if len(members) > 1]
+    return sorted(groups, key=lambda members: (-len(members), members[0]))
+
+
+def merge_clusters(clusters, batch_size=BATCH_SIZE):
+    """Fold every cluster of supplier ids into its smallest id; returns the number of suppliers deleted."""
+    deleted = 0
+    for start in range(0, len(clusters), batch_size):
+        deleted += _merge_batch(clusters[start:start + batch_size])
+    return deleted
+
+
+def _group_by_supplier(prices):
+    grouped = {}
+    for price in prices:
+        grouped.setdefault(price.supplier_id, []).append(price.pk)
+    return grouped
+
+
+def _repointed_relations():
+    # The relations a delete would otherwise clear, e.g. ReorderPolicy.supplier; found
+    # through the model's meta as the apps holding them depend on this one
+    return [relation for relation in Suppliers._meta.related_objects if relation.on_delete is SET_NULL]
+
+
+def _merge_batch(clusters):
+    survivor_of = {duplicate: members[0] for members in clusters for duplicate in members[1:]}
+    with transaction.atomic():
+        suppliers = Suppliers.objects.in_bulk([supplier_id for members in clusters for supplier_id in members])
+        survivors = []
+        for members in clusters:
+            survivor = suppliers[members[0]]
+            # Empty details are filled from the duplicates, oldest first
+            for duplicate_id in members[1:]:
+                for field in SUPPLIER_FIELDS:
+                    if is_blank(getattr(survivor, field)) and not is_blank(getattr(suppliers[duplicate_id], field)):
+                        setattr(survivor, field, getattr(suppliers[duplicate_id], field))
+            survivor.update_keys()
+            survivors.append(survivor)
+        Suppliers.objects.bulk_create(survivors, update_conflicts=True, unique_fields=["id"], update_fields=UPSERT_FIELDS)
+
+        # A product keeps the survivor's own price, else the first duplicate's; the
+        # others go with their duplicate
+        listed = set(SupplierPrice.objects.filter(supplier_id__in=[survivor.pk for survivor in survivors]).values_list("supplier_id", "product_id"))
+        moved = []
+        for price in SupplierPrice.objects.filter(supplier_id__in=survivor_of).order_by("supplier_id", "pk").only("pk", "supplier_id", "product_id"):
+            target = survivor_of[price.supplier_id]
+            if (target, price.product_id) in listed:
+                continue
+            listed.add((target, price.product_id))
+            price.supplier_id = target
+            moved.append(price)
+        # One UPDATE per survivor rather than bulk_update's CASE over every moved line
+        for target, price_ids in _group_by_supplier(moved).items():
+            SupplierPrice.objects.filter(pk__in=price_ids).update(supplier_id=target)
+
+        duplicates_of = {}
+        for duplicate, target in survivor_of.items():
+            duplicates_of.setdefault(target, []).append(duplicate)
+        for relation in _repointed_relations():
+            for target, duplicate_ids in duplicates_of.items():
+                relation.related_model._base_manager.filter(**{f"{relation.field.name}__in": duplicate_ids}).update(**{relation.field.name: target})
+
+        Suppliers.objects.filter(pk__in=survivor_of).delete()
+        # bulk_create skips the receivers that feed the POS changes feed
+        record_changes(SyncKind.SUPPLIER, [survivor.pk for survivor in survivors])
+        for survivor in survivors:
+            audit.record_saved(survivor, created=False)
+    return len(survivor_of)
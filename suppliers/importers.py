@@ -0,0 +1,216 @@
+"""Bulk import of suppliers and of a supplier's price list from CSV or JSON Lines files.
+
+Each price list row is one price list line:
+
+    product_id, supplier_sku, unit_price, valid_from, valid_until
+
+A row may leave out product_id when its supplier_sku is already on the supplier's price
+list. Lines are upserted on (supplier, product) with one INSERT ... ON CONFLICT per
+batch, so re-importing a price list updates the prices in place. A row that fails
+validation or names an unknown product is reported and skipped.
+
+Each supplier row is one supplier:
+
+    name, address, telephone_number, mobile_number, email_address, contact_person, remarks
+
+Rows are matched on the normalized lookup keys (see suppliers.matching): email first,
+then phone numbers, then the canonical name, against the stored suppliers with one
+indexed query per batch, and against the earlier rows of the same batch. A matched
+supplier gets the row's non-empty details; a row matching nothing becomes a new supplier.
+"""
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Q
+
+from products import audit
+from products.importers import BaseImporter, ImportResult, RowError, get_reader, text_field
+from products.models import Product, SyncKind
+from products.sync import record_changes
+
+from .matching import KEY_FIELDS, SUPPLIER_FIELDS, blocks, is_blank
+from .models import Suppliers, SupplierPrice
+
+DEFAULT_BATCH_SIZE = 1000
+
+UPDATE_FIELDS = ["supplier_sku", "unit_price", "valid_from", "valid_until", "date_updated"]
+
+# Columns a supplier upsert writes over a stored supplier; date_updated is set by bulk_create
+UPSERT_FIELDS = [*SUPPLIER_FIELDS, *KEY_FIELDS, "date_updated"]
+
+
+class PriceListResult(ImportResult):
+    """Summary of a price list import."""
+
+    def __init__(self):
+        super().__init__()
+        self.updated = 0
+
+
+class PriceListImporter(BaseImporter):
+    """Turns input rows into price list lines of one supplier and upserts them in batches."""
+    result_class = PriceListResult
+
+    def __init__(self, supplier, batch_size=DEFAULT_BATCH_SIZE):
+        super().__init__(batch_size)
+        self.supplier = supplier
+        self.products_by_sku = dict(
+            SupplierPrice.objects.filter(supplier=supplier).exclude(supplier_sku="").values_list("supplier_sku", "product_id")
+        )
+
+    def build(self, row):
+        """Return an unsaved, validated SupplierPrice for a row; raises ValidationError."""
+        sku = text_field(row, "supplier_sku")
+        product_id = text_field(row, "product_id") or self.products_by_sku.get(sku)
+        if not product_id:
+            raise ValidationError({"product_id": ["Give a product_id or a supplier_sku already on the price list."]})
+
+        price = SupplierPrice(
+            supplier=self.supplier,
+            supplier_sku=sku,
+            unit_price=text_field(row, "unit_price"),
+            valid_from=text_field(row, "valid_from", None),
+            valid_until=text_field(row, "valid_until", None),
+        )
+        errors = {}
+        try:
+            price.product_id = int(product_id)
+        except ValueError:
+            errors["product_id"] = [f"'{product_id}' is not a product id."]
+        try:
+            # Unknown products are caught for the whole batch in write_batch
+            price.full_clean(exclude=["supplier", "product"], validate_unique=False, validate_constraints=False)
+        except ValidationError as exc:
+            errors.update(exc.message_dict)
+        if not errors and price.unit_price < 0:
+            errors["unit_price"] = ["Unit price can't be negative."]
+        if not errors and price.valid_from and price.valid_until and price.valid_until < price.valid_from:
+            errors["valid_until"] = ["Price can't expire before it starts."]
+
+        if errors:
+            raise ValidationError(errors)
+        return price
+
+    def write_batch(self, batch, result):
+        """Upsert one batch of (line_number, price) pairs in a single transaction."""
+        # A product listed twice in the same batch keeps its last line
+        prices = {price.product_id: (line_number, price) for line_number, price in batch}
+        with transaction.atomic():
+            known = set(Product.objects.filter(pk__in=prices.keys()).values_list("pk", flat=True))
+            existing = set(
+                SupplierPrice.objects.filter(supplier=self.supplier, product_id__in=known).values_list("product_id", flat=True)
+            )
+            lines = []
+            for product_id, (line_number, price) in prices.items():
+                if product_id in known:
+                    lines.append(price)
+                else:
+                    result.errors.append(RowError(line_number, [f"product_id: Product {product_id} does not exist."]))
+
+            SupplierPrice.objects.bulk_create(
+                lines, update_conflicts=True, unique_fields=["supplier", "product"], update_fields=UPDATE_FIELDS,
+            )
+        result.created += len(known) - len(existing)
+        result.updated += len(existing)
+
+
+def import_price_list(supplier, stream, format="csv", batch_size=DEFAULT_BATCH_SIZE):
+    """Import a supplier's price list from an open text stream in the given format ('csv' or 'jsonl')."""
+    return PriceListImporter(supplier, batch_size=batch_size).run(get_reader(format)(stream))
+
+
+def _blocks(supplier):
+    return blocks({field: getattr(supplier, field) for field in KEY_FIELDS})
+
+
+class SupplierImportResult(ImportResult):
+    """Summary of a supplier import."""
+
+    def __init__(self):
+        super().__init__()
+        self.updated = 0
+
+
+class SupplierImporter(BaseImporter):
+    """Turns input rows into suppliers and upserts them in batches, matching on the lookup keys."""
+    result_class = SupplierImportResult
+
+    def build(self, row):
+        """Return an unsaved, validated Suppliers for a row, with its keys set; raises ValidationError."""
+        supplier = Suppliers(**{field: text_field(row, field) for field in SUPPLIER_FIELDS})
+        if is_blank(supplier.name):
+            raise ValidationError({"name": ["A supplier needs a name."]})
+        # Details left empty aren't required: they may already be on the stored supplier
+        empty = [field for field in SUPPLIER_FIELDS if not getattr(supplier, field)]
+        supplier.full_clean(exclude=[*empty, *KEY_FIELDS], validate_unique=False)
+        supplier.update_keys()
+        return supplier
+
+    def matches(self, batch):
+        """Return {block: supplier} for the stored suppliers sharing a key with the batch, oldest first."""
+        wanted = {block for _, supplier in batch for block in _blocks(supplier)}
+        emails = [key for kind, key in wanted if kind == "email_key"]
+        phones = [key for kind, key in wanted if kind == "phone"]
+        names = [key for kind, key in wanted if kind == "name_key"]
+        found = {}
+        for supplier in Suppliers.objects.filter(
+            Q(email_key__in=emails) | Q(telephone_key__in=phones) | Q(mobile_key__in=phones) | Q(name_key__in=names)
+        ).order_by("pk"):
+            for block in _blocks(supplier):
+                found.setdefault(block, supplier)
+        return found
+
+    def write_batch(self, batch, result):
+        """Upsert one batch of (line_number, supplier) pairs in a single transaction."""
+        with transaction.atomic():
+            found = self.matches(batch)
+            created, updated = [], {}
+            for _, incoming in batch:
+                # The first block that matches wins, in the order email, phones, name
+                supplier = next((found[block] for block in _blocks(incoming) if block in found), None)
+                if supplier is None:
+                    supplier = incoming
+                    created.append(supplier)
+                else:
+                    changed = False
+                    for field in SUPPLIER_FIELDS:
+                        value = getattr(incoming, field)
+                        if not is_blank(value) and value != getattr(supplier, field):
+                            setattr(supplier, field, value)
+                            changed = True
+                    if changed:
+                        supplier.update_keys()
+                        if supplier.pk is not None:
+                            updated[supplier.pk] = supplier
+                # Later rows of the batch match this supplier too
+                for block in _blocks(supplier):
+                    found.setdefault(block, supplier)
+
+            for supplier in created:
+                # Placeholders like the other catalog screens use, for details never given
+                for field in SUPPLIER_FIELDS:
+                    if not getattr(supplier, field):
+                        setattr(supplier, field, "-")
+            Suppliers.objects.bulk_create(created)
+            # An upsert on the primary key: one INSERT ... ON CONFLICT DO UPDATE per batch,
+            # where bulk_update() would build a CASE expression per field and row
+            Suppliers.objects.bulk_create(
+                updated.values(), update_conflicts=True, unique_fields=["id"], update_fields=UPSERT_FIELDS,
+            )
+            # bulk_create and bulk_update skip the receivers that feed the POS changes feed
+            record_changes(SyncKind.SUPPLIER, [supplier.pk for supplier in created] + list(updated))
+            for supplier in created:
+                audit.record_saved(supplier, created=True)
+            for supplier in updated.values():
+                audit.record_saved(supplier, created=False)
+        result.created += len(created)
+        result.updated += len(updated)
+
+
+def upsert_suppliers(rows, batch_size=DEFAULT_BATCH_SIZE):
+    """Create or update suppliers from an iterable of dicts, matching them on the lookup keys; returns a SupplierImportResult."""
+    return SupplierImporter(batch_size=batch_size).run((line_number, row) for line_number, row in enumerate(rows, start=1))
+
+
+def import_suppliers(stream, format="csv", batch_size=DEFAULT_BATCH_SIZE):
+    """Import suppliers from an open text stream in the given format ('csv' or 'jsonl')."""
+    return SupplierImporter(batch_size=batch_size).run(get_reader(format)(stream))
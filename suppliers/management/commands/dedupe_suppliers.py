@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from products.audit import acting_as
+
+from ...dedupe import find_clusters, merge_clusters
+from ...models import Suppliers
+
+
+class Command(BaseCommand):
+    help = "Find suppliers that share an email, a phone number or a canonical name, and optionally merge them."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--merge", action="store_true", help="Fold every cluster into its oldest supplier instead of only reporting it.")
+        parser.add_argument("--show", type=int, default=20, help="Number of clusters to list.")
+
+    def handle(self, *args, **options):
+        clusters = find_clusters()
+        duplicates = sum(len(members) - 1 for members in clusters)
+
+        names = dict(Suppliers.objects.filter(pk__in=[members[0] for members in clusters[:options["show"]]]).values_list("pk", "name"))
+        for members in clusters[:options["show"]]:
+            self.stdout.write(f"{names[members[0]]} (#{members[0]}): {', '.join(f'#{pk}' for pk in members[1:])}")
+        if len(clusters) > options["show"]:
+            self.stdout.write(f"... and {len(clusters) - options['show']} more clusters")
+
+        if not options["merge"]:
+            self.stdout.write(self.style.SUCCESS(f"Found {len(clusters)} clusters holding {duplicates} duplicate suppliers."))
+            return
+
+        with acting_as("dedupe_suppliers"):
+            deleted = merge_clusters(clusters)
+        self.stdout.write(self.style.SUCCESS(f"Merged {len(clusters)} clusters; removed {deleted} duplicate suppliers."))
@@ -0,0 +1,29 @@
+from django.core.management.base import CommandError
+
+from products.management.importing import ImportCommand
+
+from ...importers import import_price_list
+from ...models import Suppliers
+
+
+class Command(ImportCommand):
+    help = "Bulk import or update a supplier's price list from a CSV or JSON Lines file."
+    batch_items = "Lines"
+
+    def add_arguments(self, parser):
+        parser.add_argument("supplier", type=int, help="Id of the supplier the price list belongs to.")
+        super().add_arguments(parser)
+
+    def handle(self, *args, **options):
+        try:
+            supplier = Suppliers.objects.get(pk=options["supplier"])
+        except Suppliers.DoesNotExist:
+            raise CommandError(f"Supplier {options['supplier']} does not exist.")
+
+        with self.open_input(options) as (stream, input_format):
+            result = import_price_list(supplier, stream, format=input_format, batch_size=options["batch_size"])
+
+        self.report_errors(result, options["max_errors"])
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported the price list of {supplier}: {result.created} new, {result.updated} updated, {result.failed} rows rejected."
+        ))
@@ -0,0 +1,17 @@
+from products.audit import acting_as
+from products.management.importing import ImportCommand
+
+from ...importers import import_suppliers
+
+
+class Command(ImportCommand):
+    help = "Bulk create or update suppliers from a CSV or JSON Lines file, matching them on email, phone and name."
+
+    def handle(self, *args, **options):
+        with self.open_input(options) as (stream, input_format), acting_as("import_suppliers"):
+            result = import_suppliers(stream, format=input_format, batch_size=options["batch_size"])
+
+        self.report_errors(result, options["max_errors"])
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported suppliers: {result.created} new, {result.updated} updated, {result.failed} rows rejected."
+        ))
@@ -0,0 +1,105 @@
+"""Normalized supplier keys, and the lookups and duplicate detection built on them.
+
+Supplier rows hold free text typed in by hand or imported from many sources, so the same
+supplier shows up as "Zuellig Pharma Corp." with "ORDERS@zuellig.com" and as "zuellig
+pharma" with "orders@zuellig.com ". Suppliers.save() keeps a normalized copy of the name,
+email and phone numbers in indexed columns:
+
+- email: trimmed and case-folded; anything without an "@" is no email at all;
+- phones: digits only, with the +63 country code turned into the local leading 0, and
+  anything shorter than MIN_PHONE_DIGITS dropped (placeholders like "-" or "n/a");
+- name: accents, punctuation and legal suffixes (Inc., Corp., ...) removed, case-folded,
+  and the words sorted, so word order doesn't matter either.
+
+Two suppliers sharing any non-empty key are taken to be the same supplier: the bulk
+upsert in suppliers.importers matches incoming rows on them, and suppliers.dedupe groups
+the existing duplicates by them.
+"""
+import re
+import unicodedata
+
+from django.db.models import Q
+
+# Words dropped from names: they vary between sources for the same company
+LEGAL_SUFFIXES = {
+    "co", "company", "corp", "corporation", "inc", "incorporated", "ltd", "limited", "llc", "opc",
+}
+
+MIN_PHONE_DIGITS = 7
+
+NAME_KEY_LENGTH = 150
+
+KEY_FIELDS = ("email_key", "telephone_key", "mobile_key", "name_key")
+
+# The details the keys are computed from, and the ones merged between duplicates
+SUPPLIER_FIELDS = ("name", "address", "telephone_number", "mobile_number", "email_address", "contact_person", "remarks")
+
+
+def normalize_email(value):
+    value = (value or "").strip().casefold()
+    return value if "@" in value else ""
+
+
+def normalize_phone(value):
+    digits = re.sub(r"\D", "", value or "")
+    # +63 917 123 4567 and 0917 123 4567 are the same number
+    if digits.startswith("63") and len(digits) == 12:
+        digits = "0" + digits[2:]
+    return digits if len(digits) >= MIN_PHONE_DIGITS else ""
+
+
+def normalize_name(value):
+    text = unicodedata.normalize("NFKD", value or "")
+    text = "".join(char for char in text if not unicodedata.combining(char)).casefold()
+    words = {word for word in re.split(r"[^\w]+", text) if word and word not in LEGAL_SUFFIXES}
+    # Decomposed characters can make the key a little longer than the name it came from
+    return " ".join(sorted(words))[:NAME_KEY_LENGTH]
+
+
+def is_blank(value):
+    """Return True for a detail left empty, including the "-" placeholder used across the catalog."""
+    return not value or value.strip() in ("", "-")
+
+
+def blocks(keys):
+    """Return the (kind, key) pairs two suppliers must share to be the same one.
+
+    Phone numbers match across the telephone and mobile columns.
+    """
+    pairs = []
+    for field in KEY_FIELDS:
+        if keys[field]:
+            pairs.append(("phone" if field in ("telephone_key", "mobile_key") else field, keys[field]))
+    return pairs
+
+
+def supplier_keys(name="", email_address="", telephone_number="", mobile_number=""):
+    """Return the normalized keys of a supplier's details, as {field: key}."""
+    return {
+        "name_key": normalize_name(name),
+        "email_key": normalize_email(email_address),
+        "telephone_key": normalize_phone(telephone_number),
+        "mobile_key": normalize_phone(mobile_number),
+    }
+
+
+def lookup_filter(email=None, phone=None, name=None):
+    """Return a Q object matching the suppliers with any of the given email, phone number or name."""
+    email, phone, name = normalize_email(email), normalize_phone(phone), normalize_name(name)
+    # Matches nothing when no usable detail is given
+    conditions = Q(pk__in=[])
+    if email:
+        conditions |= Q(email_key=email)
+    if phone:
+        conditions |= Q(telephone_key=phone) | Q(mobile_key=phone)
+    if name:
+        conditions |= Q(name_key=name)
+    return conditions
+
+
+def find_suppliers(email=None, phone=None, name=None):
+    """Return the suppliers matching any of the given details, oldest first; each key is an index lookup."""
+    # Imported here as the model computes its keys with this module
+    from .models import Suppliers
+
+    return Suppliers.objects.filter(lookup_filter(email, phone, name)).order_by("pk")
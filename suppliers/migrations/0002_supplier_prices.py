@@ -0,0 +1,32 @@
+# Generated by Django 5.2.3 on 2026-10-18 06:26
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0008_product_search_index'),
+        ('suppliers', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SupplierPrice',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('supplier_sku', models.CharField(blank=True, max_length=50)),
+                ('unit_price', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('valid_from', models.DateField(blank=True, null=True)),
+                ('valid_until', models.DateField(blank=True, null=True)),
+                ('date_updated', models.DateTimeField(auto_now=True)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='supplier_prices', to='products.product')),
+                ('supplier', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='prices', to='suppliers.suppliers')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['product', 'unit_price'], name='supplierprice_price_idx'), models.Index(fields=['supplier', 'supplier_sku'], name='supplierprice_sku_idx')],
+                'constraints': [models.UniqueConstraint(fields=('supplier', 'product'), name='supplierprice_supplier_product_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.3 on 2026-10-18 06:48
+
+from django.db import migrations, models
+
+
+def backfill(apps, schema_editor):
+    schema_editor.execute("UPDATE suppliers_suppliers SET date_updated = date_created")
+    schema_editor.execute(
+        "INSERT INTO products_syncchange (kind, object_id, deleted, date_changed) "
+        "SELECT 'SUPPLIER', id, %s, date_created FROM suppliers_suppliers ORDER BY id",
+        [False],
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('suppliers', '0002_supplier_prices'),
+        ('products', '0011_sync_changes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='suppliers',
+            name='date_updated',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddIndex(
+            model_name='suppliers',
+            index=models.Index(fields=['date_updated'], name='suppliers_date_updated_idx'),
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
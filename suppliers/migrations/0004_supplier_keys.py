@@ -0,0 +1,69 @@
+# Generated by Django 5.2.3 on 2026-10-18 06:57
+
+from django.db import migrations, models
+
+from suppliers.matching import supplier_keys
+
+BATCH_SIZE = 1000
+
+
+def backfill(apps, schema_editor):
+    Suppliers = apps.get_model('suppliers', 'Suppliers')
+    last = 0
+    while True:
+        batch = list(Suppliers.objects.filter(pk__gt=last).order_by('pk')[:BATCH_SIZE])
+        if not batch:
+            break
+        for supplier in batch:
+            keys = supplier_keys(supplier.name, supplier.email_address, supplier.telephone_number, supplier.mobile_number)
+            for field, key in keys.items():
+                setattr(supplier, field, key)
+        Suppliers.objects.bulk_update(batch, list(keys))
+        last = batch[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('suppliers', '0003_date_updated'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='suppliers',
+            name='email_key',
+            field=models.CharField(default='', editable=False, max_length=254),
+        ),
+        migrations.AddField(
+            model_name='suppliers',
+            name='mobile_key',
+            field=models.CharField(default='', editable=False, max_length=15),
+        ),
+        migrations.AddField(
+            model_name='suppliers',
+            name='name_key',
+            field=models.CharField(default='', editable=False, max_length=150),
+        ),
+        migrations.AddField(
+            model_name='suppliers',
+            name='telephone_key',
+            field=models.CharField(default='', editable=False, max_length=25),
+        ),
+        migrations.AddIndex(
+            model_name='suppliers',
+            index=models.Index(fields=['name_key'], name='suppliers_name_key_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='suppliers',
+            index=models.Index(fields=['email_key'], name='suppliers_email_key_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='suppliers',
+            index=models.Index(fields=['telephone_key'], name='suppliers_telephone_key_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='suppliers',
+            index=models.Index(fields=['mobile_key'], name='suppliers_mobile_key_idx'),
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,9 @@
 from django.db import models
 
+from products.models import Product
+
+from .matching import supplier_keys
+
 class Suppliers(models.Model):
     """General information about suppliers"""
     name = models.CharField(max_length=150)
@@ -10,3 +14,58 @@ class Suppliers(models.Model):
     contact_person = models.CharField(max_length=150)
     remarks = models.TextField()
     date_created = models.DateTimeField(auto_now_add=True)
+    date_updated = models.DateTimeField(auto_now=True)
+    # Normalized copies of the name, email and phone numbers, kept by save(); see suppliers.matching
+    name_key = models.CharField(max_length=150, default="", editable=False)
+    email_key = models.CharField(max_length=254, default="", editable=False)
+    telephone_key = models.CharField(max_length=25, default="", editable=False)
+    mobile_key = models.CharField(max_length=15, default="", editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["date_updated"], name="suppliers_date_updated_idx"),
+            models.Index(fields=["name_key"], name="suppliers_name_key_idx"),
+            models.Index(fields=["email_key"], name="suppliers_email_key_idx"),
+            models.Index(fields=["telephone_key"], name="suppliers_telephone_key_idx"),
+            models.Index(fields=["mobile_key"], name="suppliers_mobile_key_idx"),
+        ]
+
+    def save(self, *args, **kwargs):
+        """Refresh the lookup keys before saving."""
+        self.update_keys()
+        super().save(*args, **kwargs)
+
+    def update_keys(self):
+        # Also called before bulk_create and bulk_update, which skip save()
+        for field, key in supplier_keys(self.name, self.email_address, self.telephone_number, self.mobile_number).items():
+            setattr(self, field, key)
+
+    def __str__(self):
+        """Return a string representation of the model."""
+        return self.name
+
+class SupplierPrice(models.Model):
+    """A line of a supplier's price list: what the supplier sells a product for."""
+    supplier = models.ForeignKey(Suppliers, on_delete=models.CASCADE, related_name="prices")
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="supplier_prices")
+    supplier_sku = models.CharField(max_length=50, blank=True)
+    unit_price = models.DecimalField(max_digits=12, decimal_places=2)
+    # Leave empty for a price without a start or an end date
+    valid_from = models.DateField(null=True, blank=True)
+    valid_until = models.DateField(null=True, blank=True)
+    date_updated = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            # One current price per supplier and product; importing a price list upserts on it
+            models.UniqueConstraint(fields=["supplier", "product"], name="supplierprice_supplier_product_uniq"),
+        ]
+        indexes = [
+            # The best-price lookup reads a product's offers cheapest first
+            models.Index(fields=["product", "unit_price"], name="supplierprice_price_idx"),
+            models.Index(fields=["supplier", "supplier_sku"], name="supplierprice_sku_idx"),
+        ]
+
+    def __str__(self):
+        """Return a string representation of the model."""
+        return f"{self.product_id} from {self.supplier_id} at {self.unit_price}"
@@ -0,0 +1,61 @@
+"""Best-price lookups over the supplier price lists.
+
+The cheapest current offer of many products is picked by the database: the offers of
+the requested products are ranked by price with a window function and only the first
+one of each product comes back. The ranking walks the supplierprice_price_idx index,
+so a purchase order of a few hundred lines is one query.
+"""
+from collections import namedtuple
+
+from django.db.models import F, Q, Window
+from django.db.models.functions import RowNumber
+from django.utils import timezone
+
+from .models import SupplierPrice
+
+# Stays under the 999 bound parameters of older SQLite builds, dates included
+LOOKUP_BATCH_SIZE = 900
+
+Offer = namedtuple("Offer", ["product_id", "supplier_id", "supplier_name", "supplier_sku", "unit_price"])
+
+
+def current_prices(today=None):
+    """Price list lines that are valid today."""
+    today = today or timezone.localdate()
+    return (
+        SupplierPrice.objects
+        .filter(Q(valid_from__lte=today) | Q(valid_from__isnull=True))
+        .filter(Q(valid_until__gte=today) | Q(valid_until__isnull=True))
+    )
+
+
+def cheapest_offers(products, today=None):
+    """Return a dict of product id to the cheapest current Offer for every product that has one.
+
+    Ties on price go to the oldest price list line.
+    """
+    product_ids = sorted({getattr(product, "pk", product) for product in products})
+    offers = {}
+    for start in range(0, len(product_ids), LOOKUP_BATCH_SIZE):
+        rows = (
+            current_prices(today)
+            .filter(product_id__in=product_ids[start:start + LOOKUP_BATCH_SIZE])
+            .annotate(rank=Window(RowNumber(), partition_by=[F("product_id")], order_by=[F("unit_price").asc(), F("id").asc()]))
+            .filter(rank=1)
+            .values_list("product_id", "supplier_id", "supplier__name", "supplier_sku", "unit_price")
+        )
+        offers.update((row[0], Offer(*row)) for row in rows)
+    return offers
+
+
+def cheapest_offer(product, today=None):
+    """Return the cheapest current Offer for a product, or None when no supplier sells it."""
+    product_id = getattr(product, "pk", product)
+    row = (
+        current_prices(today)
+        .filter(product_id=product_id)
+        .order_by("unit_price", "id")
+        .values_list("product_id", "supplier_id", "supplier__name", "supplier_sku", "unit_price")
+        .first()
+    )
+    return Offer(*row) if row else None
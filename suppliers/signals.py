@@ -0,0 +1,37 @@
+"""Signal receivers that keep the POS changes feed and the audit log in sync with the suppliers."""
+from django.db.models.signals import post_init, post_save, post_delete
+from django.dispatch import receiver
+
+from products import audit, sync
+from products.models import SyncKind
+
+from .models import Suppliers
+
+
+@receiver(post_save, sender=Suppliers, dispatch_uid="suppliers_sync_supplier_saved")
+def record_saved_supplier_change(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    sync.record_changes(SyncKind.SUPPLIER, [instance.pk])
+
+
+@receiver(post_delete, sender=Suppliers, dispatch_uid="suppliers_sync_supplier_deleted")
+def record_deleted_supplier_change(sender, instance, **kwargs):
+    sync.record_changes(SyncKind.SUPPLIER, [instance.pk], deleted=True)
+
+
+@receiver(post_init, sender=Suppliers, dispatch_uid="suppliers_audit_supplier_loaded")
+def remember_audited_values(sender, instance, **kwargs):
+    instance._audit_state = audit.snapshot(instance)
+
+
+@receiver(post_save, sender=Suppliers, dispatch_uid="suppliers_audit_supplier_saved")
+def audit_saved_supplier(sender, instance, created=False, raw=False, **kwargs):
+    if raw:
+        return
+    audit.record_saved(instance, created)
+
+
+@receiver(post_delete, sender=Suppliers, dispatch_uid="suppliers_audit_supplier_deleted")
+def audit_deleted_supplier(sender, instance, **kwargs):
+    audit.record_deleted(instance)
@@ -0,0 +1,195 @@
+import tempfile
+from decimal import Decimal
+from io import StringIO
+from pathlib import Path
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from inventory.models import ReorderPolicy, ReorderSuggestion
+from products.models import Product, SyncChange, ProductCategory
+
+from ..dedupe import find_clusters, merge_clusters
+from ..importers import import_suppliers, upsert_suppliers
+from ..matching import find_suppliers, normalize_email, normalize_name, normalize_phone
+from ..models import Suppliers, SupplierPrice
+
+
+def create_supplier(name, email="-", telephone="-", mobile="-", **details):
+    return Suppliers.objects.create(
+        name=name, address=details.get("address", "-"), telephone_number=telephone, mobile_number=mobile,
+        email_address=email, contact_person=details.get("contact_person", "-"), remarks="-",
+    )
+
+
+class SupplierKeysTestCase(TestCase):
+    """Test cases for the normalized supplier lookup keys."""
+
+    def test_normalization(self):
+        self.assertEqual(normalize_email("  Orders@Zuellig.COM "), "orders@zuellig.com")
+        self.assertEqual(normalize_email("-"), "")
+        self.assertEqual(normalize_phone("+63 917 123 4567"), "09171234567")
+        self.assertEqual(normalize_phone("(02) 8123-4567"), "0281234567")
+        self.assertEqual(normalize_phone("n/a"), "")
+        self.assertEqual(normalize_name("Zuellig Pharma Corp."), normalize_name("PHARMA, ZUELLIG"))
+        self.assertEqual(normalize_name("Metro Drug, Inc."), "drug metro")
+        self.assertEqual(normalize_name("Botica Peñafrancia"), "botica penafrancia")
+
+    def test_keys_follow_saves(self):
+        supplier = create_supplier("Zuellig Pharma Corp.", email="Orders@Zuellig.com", mobile="+63 917 123 4567")
+        supplier.email_address = "sales@zuellig.com"
+        supplier.save()
+
+        self.assertEqual(
+            Suppliers.objects.filter(pk=supplier.pk).values("name_key", "email_key", "telephone_key", "mobile_key").get(),
+            {"name_key": "pharma zuellig", "email_key": "sales@zuellig.com", "telephone_key": "", "mobile_key": "09171234567"},
+        )
+
+    def test_find_suppliers(self):
+        zuellig = create_supplier("Zuellig", email="orders@zuellig.com", telephone="02 8123 4567")
+        metro = create_supplier("Metro Drug", mobile="0917 123 4567")
+
+        self.assertEqual(list(find_suppliers(email="ORDERS@zuellig.com")), [zuellig])
+        self.assertEqual(list(find_suppliers(phone="+639171234567")), [metro])
+        self.assertEqual(list(find_suppliers(phone="(02) 8123-4567")), [zuellig])
+        self.assertEqual(list(find_suppliers(name="metro drug inc")), [metro])
+        self.assertEqual(list(find_suppliers(email="-")), [])
+
+    def test_lookup_uses_an_index(self):
+        with connection.cursor() as cursor:
+            sql, params = find_suppliers(email="orders@zuellig.com").query.sql_with_params()
+            cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+            plan = " ".join(str(row[-1]) for row in cursor.fetchall())
+
+        self.assertIn("suppliers_email_key_idx", plan)
+
+
+class SupplierUpsertTestCase(TestCase):
+    """Test cases for the bulk supplier upsert."""
+
+    def setUp(self):
+        self.zuellig = create_supplier("Zuellig Pharma Corp.", email="orders@zuellig.com", address="Makati")
+
+    def test_rows_match_stored_suppliers_and_each_other(self):
+        result = upsert_suppliers([
+            {"name": "ZUELLIG PHARMA", "email_address": "ORDERS@zuellig.com", "contact_person": "Ana"},
+            {"name": "Metro Drug Inc.", "mobile_number": "+639171234567"},
+            {"name": "Metro Drug", "mobile_number": "09171234567", "address": "Pasig"},
+        ])
+
+        self.assertEqual((result.created, result.updated, result.failed), (1, 1, 0))
+        self.zuellig.refresh_from_db()
+        # Empty details in a row never overwrite stored ones
+        self.assertEqual((self.zuellig.name, self.zuellig.address, self.zuellig.contact_person), ("ZUELLIG PHARMA", "Makati", "Ana"))
+        metro = Suppliers.objects.get(mobile_key="09171234567")
+        self.assertEqual((metro.name, metro.address, metro.remarks), ("Metro Drug", "Pasig", "-"))
+
+    def test_unchanged_rows_are_not_written(self):
+        result = upsert_suppliers([{"name": "Zuellig Pharma Corp.", "email_address": "orders@zuellig.com"}])
+
+        self.assertEqual((result.created, result.updated), (0, 0))
+
+    def test_invalid_rows_are_reported(self):
+        result = upsert_suppliers([{"name": "", "email_address": "a@example.com"}, {"name": "Bad", "email_address": "not an email"}])
+
+        self.assertEqual(sorted(error.line for error in result.errors), [1, 2])
+        self.assertEqual(Suppliers.objects.count(), 1)
+
+    def test_query_count_is_per_batch(self):
+        rows = [{"name": f"Supplier {i}", "email_address": f"orders{i}@example.com"} for i in range(5)]
+        with CaptureQueriesContext(connection) as small:
+            upsert_suppliers(rows)
+        rows = [{"name": f"Supplier {i}", "email_address": f"orders{i}@example.com", "address": "Cebu"} for i in range(100)]
+        with CaptureQueriesContext(connection) as large:
+            result = upsert_suppliers(rows)
+
+        self.assertEqual((result.created, result.updated), (95, 5))
+        self.assertLessEqual(len(large), len(small) + 2)
+
+    def test_import_command_and_changes_feed(self):
+        cursor = SyncChange.objects.order_by("-pk").values_list("pk", flat=True).first() or 0
+        stream = StringIO("name,email_address,telephone_number\nZuellig,orders@zuellig.com,02 8123 4567\nUnilab,,\n")
+
+        result = import_suppliers(stream)
+
+        self.assertEqual((result.created, result.updated), (1, 1))
+        self.assertEqual(SyncChange.objects.filter(pk__gt=cursor).count(), 2)
+
+    def test_command(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "suppliers.ndjson"
+            path.write_text('{"name": "Mercury Drug", "email_address": "buying@mercury.ph"}\n{"email_address": "x@y.ph"}\n')
+            out, err = StringIO(), StringIO()
+            call_command("import_suppliers", str(path), stdout=out, stderr=err)
+
+        self.assertIn("1 new, 0 updated, 1 rows rejected", out.getvalue())
+        self.assertIn("line 2: name:", err.getvalue())
+
+
+class SupplierDedupeTestCase(TestCase):
+    """Test cases for finding and merging duplicate suppliers."""
+
+    def setUp(self):
+        self.zuellig = create_supplier("Zuellig Pharma", email="orders@zuellig.com")
+        # Matches the first by email, and the third by phone: all three are one supplier
+        self.by_email = create_supplier("ZP Distribution", email="ORDERS@ZUELLIG.COM", telephone="02 8123 4567", contact_person="Ana")
+        self.by_phone = create_supplier("Zuellig Warehouse", mobile="(02) 8123-4567")
+        self.metro = create_supplier("Metro Drug Inc.")
+        self.metro_again = create_supplier("metro drug")
+        self.unilab = create_supplier("Unilab")
+
+    def test_find_clusters(self):
+        self.assertEqual(find_clusters(), [
+            [self.zuellig.pk, self.by_email.pk, self.by_phone.pk],
+            [self.metro.pk, self.metro_again.pk],
+        ])
+
+    def test_merge_keeps_the_oldest_supplier_and_moves_prices(self):
+        soap = Product.objects.create(brand="Safeguard", name="Bar Soap", category=ProductCategory.GENERAL_GOODS)
+        paste = Product.objects.create(brand="Colgate", name="Toothpaste", category=ProductCategory.GENERAL_GOODS)
+        SupplierPrice.objects.create(supplier=self.zuellig, product=soap, unit_price=Decimal("20"))
+        SupplierPrice.objects.create(supplier=self.by_email, product=soap, unit_price=Decimal("18"))
+        SupplierPrice.objects.create(supplier=self.by_phone, product=paste, unit_price=Decimal("50"))
+
+        deleted = merge_clusters(find_clusters())
+
+        self.assertEqual(deleted, 3)
+        self.assertEqual(set(Suppliers.objects.values_list("pk", flat=True)), {self.zuellig.pk, self.metro.pk, self.unilab.pk})
+        self.assertEqual(
+            set(SupplierPrice.objects.values_list("supplier_id", "product_id", "unit_price")),
+            {(self.zuellig.pk, soap.pk, Decimal("20.00")), (self.zuellig.pk, paste.pk, Decimal("50.00"))},
+        )
+        self.zuellig.refresh_from_db()
+        self.assertEqual((self.zuellig.contact_person, self.zuellig.telephone_key), ("Ana", "0281234567"))
+        self.assertEqual(find_clusters(), [])
+
+    def test_merge_moves_reorder_settings_to_the_survivor(self):
+        soap = Product.objects.create(brand="Safeguard", name="Bar Soap", category=ProductCategory.GENERAL_GOODS)
+        paste = Product.objects.create(brand="Colgate", name="Toothpaste", category=ProductCategory.GENERAL_GOODS)
+        ReorderPolicy.objects.create(product=soap, supplier=self.by_phone)
+        ReorderPolicy.objects.create(product=paste, supplier=self.metro_again)
+        ReorderSuggestion.objects.create(
+            product=soap, supplier=self.by_email, average_daily_usage=2, safety_stock=5, reorder_point=19, stock_on_hand=10, quantity=23,
+        )
+
+        merge_clusters(find_clusters())
+
+        self.assertEqual(
+            dict(ReorderPolicy.objects.values_list("product_id", "supplier_id")),
+            {soap.pk: self.zuellig.pk, paste.pk: self.metro.pk},
+        )
+        self.assertEqual(ReorderSuggestion.objects.get().supplier_id, self.zuellig.pk)
+
+    def test_command(self):
+        out = StringIO()
+        call_command("dedupe_suppliers", stdout=out)
+        self.assertIn("Found 2 clusters holding 3 duplicate suppliers.", out.getvalue())
+        self.assertEqual(Suppliers.objects.count(), 6)
+
+        out = StringIO()
+        call_command("dedupe_suppliers", "--merge", stdout=out)
+
+        self.assertIn("removed 3 duplicate suppliers", out.getvalue())
+        self.assertEqual(Suppliers.objects.count(), 3)
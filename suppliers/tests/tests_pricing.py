@@ -0,0 +1,131 @@
+import tempfile
+from datetime import date
+from decimal import Decimal
+from io import StringIO
+from pathlib import Path
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from products.models import Product, ProductCategory
+
+from ..importers import import_price_list
+from ..models import Suppliers, SupplierPrice
+from ..pricing import cheapest_offer, cheapest_offers
+
+CSV_HEADER = "product_id,supplier_sku,unit_price,valid_from,valid_until\n"
+TODAY = date(2026, 1, 1)
+
+
+def create_supplier(name):
+    return Suppliers.objects.create(
+        name=name, address="-", telephone_number="-", mobile_number="-",
+        email_address="orders@example.com", contact_person="-", remarks="-",
+    )
+
+
+class PriceListImportTestCase(TestCase):
+    """Test cases for the bulk price list importer."""
+
+    def setUp(self):
+        self.supplier = create_supplier("Zuellig")
+        self.soap = Product.objects.create(brand="Safeguard", name="Bar Soap", category=ProductCategory.GENERAL_GOODS)
+        self.paste = Product.objects.create(brand="Colgate", name="Toothpaste", category=ProductCategory.GENERAL_GOODS)
+
+    def test_import_creates_then_updates_lines(self):
+        result = import_price_list(self.supplier, StringIO(
+            CSV_HEADER + f"{self.soap.pk},Z-1,25.50,,\n{self.paste.pk},Z-2,80,2026-01-01,2026-06-30\n"
+        ))
+        self.assertEqual((result.created, result.updated, result.failed), (2, 0, 0))
+
+        # The second import finds the soap by its SKU alone
+        result = import_price_list(self.supplier, StringIO(CSV_HEADER + ",Z-1,24.00,,\n"))
+
+        self.assertEqual((result.created, result.updated, result.failed), (0, 1, 0))
+        self.assertEqual(SupplierPrice.objects.get(product=self.soap).unit_price, Decimal("24.00"))
+        self.assertEqual(SupplierPrice.objects.get(product=self.paste).valid_until, date(2026, 6, 30))
+
+    def test_invalid_rows_are_reported_and_skipped(self):
+        result = import_price_list(self.supplier, StringIO(
+            CSV_HEADER
+            + f"{self.soap.pk},,abc,,\n"
+            + "999999,,10,,\n"
+            + ",UNKNOWN,10,,\n"
+            + f"{self.paste.pk},,10,2026-06-01,2026-01-01\n"
+            + f"{self.paste.pk},,-1,,\n"
+            + f"{self.soap.pk},,12.5,,\n"
+        ))
+
+        self.assertEqual((result.created, result.failed), (1, 5))
+        self.assertEqual(sorted(error.line for error in result.errors), [2, 3, 4, 5, 6])
+        self.assertEqual(SupplierPrice.objects.get().product, self.soap)
+
+    def test_query_count_does_not_depend_on_line_count(self):
+        products = Product.objects.bulk_create(
+            Product(brand="Brand", name=f"Product {i}", category=ProductCategory.GENERAL_GOODS) for i in range(100)
+        )
+        lines = "".join(f"{product.pk},SKU-{product.pk},{i + 1},,\n" for i, product in enumerate(products))
+
+        # SKU preload, product check, existing lines and upsert, plus the savepoint pair
+        with self.assertNumQueries(6):
+            result = import_price_list(self.supplier, StringIO(CSV_HEADER + lines), batch_size=1000)
+
+        self.assertEqual(result.created, 100)
+
+    def test_command(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "prices.jsonl"
+            path.write_text(f'{{"product_id": {self.soap.pk}, "unit_price": "19.75"}}\n')
+            out = StringIO()
+            call_command("import_price_list", str(self.supplier.pk), str(path), stdout=out)
+
+        self.assertIn("1 new, 0 updated", out.getvalue())
+        self.assertEqual(SupplierPrice.objects.get().unit_price, Decimal("19.75"))
+
+
+class CheapestOfferTestCase(TestCase):
+    """Test cases for the best-price lookup."""
+
+    def setUp(self):
+        self.first = create_supplier("Zuellig")
+        self.second = create_supplier("Metro Drug")
+        self.soap = Product.objects.create(brand="Safeguard", name="Bar Soap", category=ProductCategory.GENERAL_GOODS)
+        self.paste = Product.objects.create(brand="Colgate", name="Toothpaste", category=ProductCategory.GENERAL_GOODS)
+        self.unsold = Product.objects.create(brand="Brand", name="Unsold", category=ProductCategory.GENERAL_GOODS)
+
+        SupplierPrice.objects.create(supplier=self.first, product=self.soap, unit_price=Decimal("25.00"))
+        # Cheaper, but the promotion is over
+        SupplierPrice.objects.create(supplier=self.second, product=self.soap, unit_price=Decimal("20.00"), valid_until=date(2025, 12, 31))
+        SupplierPrice.objects.create(supplier=self.first, product=self.paste, unit_price=Decimal("80.00"))
+        SupplierPrice.objects.create(supplier=self.second, product=self.paste, unit_price=Decimal("75.00"), valid_from=date(2025, 1, 1))
+
+    def test_cheapest_current_offer(self):
+        offer = cheapest_offer(self.soap, today=TODAY)
+
+        self.assertEqual((offer.supplier_id, offer.supplier_name, offer.unit_price), (self.first.pk, "Zuellig", Decimal("25.00")))
+        self.assertEqual(cheapest_offer(self.paste, today=TODAY).supplier_id, self.second.pk)
+        self.assertIsNone(cheapest_offer(self.unsold, today=TODAY))
+
+    def test_cheapest_offers_of_many_products(self):
+        with self.assertNumQueries(1):
+            offers = cheapest_offers([self.soap, self.paste.pk, self.unsold], today=TODAY)
+
+        self.assertEqual(offers.keys(), {self.soap.pk, self.paste.pk})
+        self.assertEqual(offers[self.soap.pk].supplier_id, self.first.pk)
+        self.assertEqual(offers[self.paste.pk].unit_price, Decimal("75.00"))
+
+    def test_purchase_order_of_500_lines_is_one_query(self):
+        products = Product.objects.bulk_create(
+            Product(brand="Brand", name=f"Product {i}", category=ProductCategory.GENERAL_GOODS) for i in range(500)
+        )
+        SupplierPrice.objects.bulk_create(
+            SupplierPrice(supplier=supplier, product=product, unit_price=price)
+            for product in products
+            for supplier, price in ((self.first, 10), (self.second, 9))
+        )
+
+        with self.assertNumQueries(1):
+            offers = cheapest_offers(products, today=TODAY)
+
+        self.assertEqual(len(offers), 500)
+        self.assertEqual({offer.supplier_id for offer in offers.values()}, {self.second.pk})